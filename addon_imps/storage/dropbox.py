@@ -1,6 +1,10 @@
 import dataclasses
 import typing
+from collections import abc
+from http import HTTPStatus
 
+from addon_service.common.exceptions import ItemAccessDenied
+from addon_toolkit.constrained_network.http import HttpResponseInfo
 from addon_toolkit.interfaces import storage
 from addon_toolkit.interfaces.storage import ItemType
 
@@ -67,6 +71,7 @@ class DropboxStorageImp(storage.StorageAddonHttpRequestorImp):
                     "path": item_id,
                 },
             ) as _response:
+                _check_access(_response)
                 _parsed = _DropboxParsedJson(await _response.json_content())
                 return _parsed.single_item_result()
 
@@ -84,6 +89,7 @@ class DropboxStorageImp(storage.StorageAddonHttpRequestorImp):
                 "files/list_folder/continue",
                 json={"cursor": page_cursor},
             ) as _response:
+                _check_access(_response)
                 _parsed = _DropboxParsedJson(await _response.json_content())
                 return storage.ItemSampleResult(
                     items=list(_parsed.item_results(item_type=item_type)),
@@ -97,6 +103,7 @@ class DropboxStorageImp(storage.StorageAddonHttpRequestorImp):
                 "recursive": False,
             },
         ) as _response:
+            _check_access(_response)
             _parsed = _DropboxParsedJson(await _response.json_content())
             items = list(_parsed.item_results(item_type=item_type))
             return storage.ItemSampleResult(
@@ -105,6 +112,67 @@ class DropboxStorageImp(storage.StorageAddonHttpRequestorImp):
                 next_sample_cursor=_parsed.cursor,
             )
 
+    async def walk_item_tree__stream(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> abc.AsyncIterator[storage.TreeItemResult]:
+        """walk the subtree with dropbox's own recursive listing, not one per folder"""
+        self.check_tree_walk_depth(max_depth)
+        if self._is_root_id(item_id):
+            base_path_lower = ""
+        else:
+            async with self.network.POST(
+                "files/get_metadata", json={"path": item_id}
+            ) as _response:
+                _check_access(_response)
+                base_path_lower = (await _response.json_content())["path_lower"]
+        _base_path_length = len(base_path_lower)
+        # parents' ids by lowercase path (or else their path, which dropbox also accepts)
+        _item_ids_by_path = {base_path_lower: item_id}
+        _request = (
+            "files/list_folder",
+            # (no need to list deeper than the folder's own children)
+            {"path": base_path_lower, "recursive": max_depth > 1},
+        )
+        while _request is not None:
+            async with self.network.POST(_request[0], json=_request[1]) as _response:
+                _check_access(_response)
+                _parsed = _DropboxParsedJson(await _response.json_content())
+            for _entry in _parsed.response_json["entries"]:
+                if _entry[".tag"] not in _parsed.ITEM_TYPE:
+                    continue  # (e.g. deleted)
+                _relative_path_lower = _entry["path_lower"][_base_path_length:]
+                if not _relative_path_lower.strip("/"):
+                    continue  # (the walked folder itself)
+                _item_ids_by_path[_entry["path_lower"]] = _entry["id"]
+                _depth = _relative_path_lower.strip("/").count("/") + 1
+                if _depth > max_depth:
+                    continue
+                _parent_path_lower = _entry["path_lower"].rpartition("/")[0]
+                yield storage.TreeItemResult(
+                    item=_DropboxParsedJson(_entry).single_item_result(),
+                    parent_item_id=_item_ids_by_path.get(
+                        _parent_path_lower, _parent_path_lower
+                    ),
+                    path=_entry["path_display"][_base_path_length:].strip("/"),
+                    depth=_depth,
+                )
+            _request = (
+                ("files/list_folder/continue", {"cursor": _parsed.cursor})
+                if _parsed.cursor
+                else None
+            )
+
+
+###
+# module-private helpers
+
+
+def _check_access(response: HttpResponseInfo) -> None:
+    if response.http_status == HTTPStatus.FORBIDDEN:
+        raise ItemAccessDenied
+
 
 @dataclasses.dataclass
 class _DropboxParsedJson:
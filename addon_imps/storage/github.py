@@ -1,4 +1,7 @@
+from collections import abc
+
 from addon_service.common.exceptions import (
+    ItemAccessDenied,
     ItemNotFound,
     UnexpectedAddonError,
 )
@@ -83,6 +86,8 @@ class GitHubStorageImp(storage.StorageAddonHttpRequestorImp):
                 )
             elif response.http_status == 404:
                 raise ItemNotFound
+            elif response.http_status == 403:
+                raise ItemAccessDenied
             else:
                 raise UnexpectedAddonError
 
@@ -117,6 +122,8 @@ class GitHubStorageImp(storage.StorageAddonHttpRequestorImp):
                     return self._parse_github_repo(json)
             elif response.http_status == 404:
                 raise ItemNotFound
+            elif response.http_status == 403:
+                raise ItemAccessDenied
             else:
                 raise UnexpectedAddonError
 
@@ -155,9 +162,70 @@ class GitHubStorageImp(storage.StorageAddonHttpRequestorImp):
                 )
             elif response.http_status == 404:
                 raise ItemNotFound
+            elif response.http_status == 403:
+                raise ItemAccessDenied
             else:
                 raise UnexpectedAddonError
 
+    async def walk_item_tree__stream(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> abc.AsyncIterator[storage.TreeItemResult]:
+        """walk the subtree with one request for the repository's whole git tree
+
+        (falls back to listing folder by folder, if github truncates the tree)
+        """
+        self.check_tree_walk_depth(max_depth)
+        owner, repo, path = self._parse_github_item_id(item_id)
+        base_path = path.strip("/")
+        async with self.network.GET(
+            f"repos/{owner}/{repo}/git/trees/HEAD",
+            query={"recursive": "1"},
+        ) as response:
+            if response.http_status == 404:
+                raise ItemNotFound
+            if response.http_status == 403:
+                raise ItemAccessDenied
+            if response.http_status != 200:
+                raise UnexpectedAddonError
+            json = await response.json_content()
+        if json.get("truncated"):
+            async for tree_item in super().walk_item_tree__stream(item_id, max_depth):
+                yield tree_item
+            return
+        for entry in json["tree"]:
+            if base_path:
+                if not entry["path"].startswith(f"{base_path}/"):
+                    continue
+                relative_path = entry["path"].removeprefix(f"{base_path}/")
+            else:
+                relative_path = entry["path"]
+            depth = relative_path.count("/") + 1
+            if depth > max_depth or entry["type"] not in ("blob", "tree"):
+                continue  # (too deep, or a submodule)
+            item_type = ItemType.FOLDER if entry["type"] == "tree" else ItemType.FILE
+            yield storage.TreeItemResult(
+                item=storage.ItemResult(
+                    item_id=self._make_github_item_id(
+                        owner, repo, entry["path"], item_type
+                    ),
+                    item_name=entry["path"].rpartition("/")[2],
+                    item_type=item_type,
+                    may_contain_root_candidates=False,
+                    can_be_root=False,
+                ),
+                parent_item_id=(
+                    item_id
+                    if depth == 1
+                    else self._make_github_item_id(
+                        owner, repo, entry["path"].rpartition("/")[0], ItemType.FOLDER
+                    )
+                ),
+                path=relative_path,
+                depth=depth,
+            )
+
     def _parse_github_item_id(self, item_id: str) -> tuple[str, str, str]:
         try:
             owner_repo, path = item_id.split(":", maxsplit=1)
@@ -168,17 +236,26 @@ class GitHubStorageImp(storage.StorageAddonHttpRequestorImp):
                 f"Invalid item_id format: {item_id}. Expected 'owner/repo:path'"
             )
 
+    def _make_github_item_id(
+        self, owner: str, repo: str, path: str, item_type: ItemType
+    ) -> str:
+        # folders as "owner/repo:path" (the inverse of `_parse_github_item_id`);
+        # files by bare path, as they always have been (ids clients may have kept)
+        if item_type is ItemType.FILE:
+            return path
+        return f"{owner}/{repo}:{path}"
+
     def _parse_github_item(self, item_json: dict, full_name: str) -> storage.ItemResult:
+        # full_name: the id of any item in the same repository
         item_type = (
             ItemType.FILE if item_json.get("type") == "file" else ItemType.FOLDER
         )
         item_name = item_json["name"]
-        if item_json.get("type") == "dir":
-            item_id = full_name + item_name
-        else:
-            item_id = item_json["path"]
+        owner, repo, _ = self._parse_github_item_id(full_name)
         return storage.ItemResult(
-            item_id=item_id,
+            item_id=self._make_github_item_id(
+                owner, repo, item_json["path"], item_type
+            ),
             item_name=item_name,
             item_type=item_type,
             may_contain_root_candidates=False,
@@ -186,8 +263,9 @@ class GitHubStorageImp(storage.StorageAddonHttpRequestorImp):
         )
 
     def _parse_github_repo(self, repo_json: dict) -> storage.ItemResult:
+        owner, _, repo = repo_json["full_name"].partition("/")
         return storage.ItemResult(
-            item_id=repo_json["full_name"] + ":",
+            item_id=self._make_github_item_id(owner, repo, "", ItemType.FOLDER),
             item_name=repo_json["name"],
             item_type=ItemType.FOLDER,
             may_contain_root_candidates=False,
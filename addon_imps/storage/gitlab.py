@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import urllib
+from collections import abc
 from dataclasses import dataclass
 from http import HTTPStatus
 from urllib.parse import (
@@ -12,12 +13,14 @@ from urllib.parse import (
 from django.core.exceptions import ValidationError
 
 from addon_imps.storage.utils import ItemResultable
+from addon_service.common.exceptions import ItemAccessDenied
 from addon_toolkit.constrained_network.http import HttpResponseInfo
 from addon_toolkit.interfaces import storage
 from addon_toolkit.interfaces.storage import (
     ItemResult,
     ItemSampleResult,
     ItemType,
+    TreeItemResult,
 )
 
 
@@ -45,6 +48,8 @@ class GitlabStorageImp(storage.StorageAddonHttpRequestorImp):
             raise ValidationError(
                 f"Gitlab authentication error: {resp_json.get('error_description', 'invalid API Token')}",
             )
+        elif response.http_status == HTTPStatus.FORBIDDEN:
+            raise ItemAccessDenied
         elif response.http_status.is_client_error:
             raise ValidationError(
                 "Gitlab error occurred, please check your api token or try later"
@@ -202,6 +207,55 @@ class GitlabStorageImp(storage.StorageAddonHttpRequestorImp):
                 next_sample_cursor=self._get_next_cursor(response.headers),
             )
 
+    async def walk_item_tree__stream(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> abc.AsyncIterator[TreeItemResult]:
+        """walk the subtree with one recursive tree listing (paged), not one per folder"""
+        self.check_tree_walk_depth(max_depth)
+        parsed_id = ItemId.parse(item_id)
+        base_path = parsed_id.file_path.strip("/")
+        page_cursor = ""
+        while True:
+            query_params = self._page_cursor_or_query(
+                page_cursor,
+                {
+                    "pagination": "keyset",
+                    "path": base_path,
+                    "recursive": "true",
+                    "per_page": "100",
+                },
+            )
+            async with self.network.GET(
+                f"{self.url_base}projects/{parsed_id.repo_id}/repository/tree",
+                query=query_params,
+            ) as response:
+                await self.check_preconditions(response)
+                content = await response.json_content()
+                page_cursor = self._get_next_cursor(response.headers)
+            for raw_item in content:
+                path = (
+                    raw_item["path"].removeprefix(f"{base_path}/")
+                    if base_path
+                    else raw_item["path"]
+                )
+                depth = path.count("/") + 1
+                if depth > max_depth:
+                    continue
+                yield TreeItemResult(
+                    item=parse_item(parsed_id.repo_id, raw_item),
+                    parent_item_id=(
+                        item_id
+                        if depth == 1
+                        else f'{parsed_id.repo_id}:{raw_item["path"].rpartition("/")[0]}'
+                    ),
+                    path=path,
+                    depth=depth,
+                )
+            if not page_cursor:
+                return
+
 
 @dataclass(frozen=True)
 class ItemId:
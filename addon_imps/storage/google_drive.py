@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 from addon_imps.storage.utils import ItemResultable
 from addon_service.common.exceptions import (
+    ItemAccessDenied,
     ItemNotFound,
     UnexpectedAddonError,
 )
@@ -38,6 +39,8 @@ class GoogleDriveStorageImp(storage.StorageAddonHttpRequestorImp):
                 return File.from_json(json).item_result
             elif response.http_status == 404:
                 raise ItemNotFound
+            elif response.http_status == 403:
+                raise ItemAccessDenied
             else:
                 raise UnexpectedAddonError
 
@@ -56,6 +59,8 @@ class GoogleDriveStorageImp(storage.StorageAddonHttpRequestorImp):
             query["q"] += " and mimeType!='application/vnd.google-apps.folder'"
 
         async with self.network.GET("drive/v3/files", query=query) as response:
+            if response.http_status == 403:
+                raise ItemAccessDenied
             return GoogleDriveResult.from_json(
                 await response.json_content()
             ).item_sample_result
@@ -5,6 +5,7 @@ from unittest.mock import (
 )
 
 from addon_imps.storage.dropbox import DropboxStorageImp
+from addon_service.common.exceptions import ItemAccessDenied
 from addon_toolkit.constrained_network.http import HttpRequestor
 from addon_toolkit.interfaces.storage import (
     ItemResult,
@@ -151,3 +152,108 @@ class TestDropboxStorageImp(unittest.IsolatedAsyncioTestCase):
                 call().__aexit__(None, None, None),
             ]
         )
+
+    async def test_walk_item_tree(self):
+        self.network.POST.return_value.__aenter__.return_value.json_content = AsyncMock(
+            side_effect=[
+                {"path_lower": "/docs"},
+                {
+                    "entries": [
+                        {
+                            ".tag": "folder",
+                            "id": "id:docs",
+                            "name": "Docs",
+                            "path_lower": "/docs",
+                            "path_display": "/Docs",
+                        },
+                        {
+                            ".tag": "folder",
+                            "id": "id:sub",
+                            "name": "Sub",
+                            "path_lower": "/docs/sub",
+                            "path_display": "/Docs/Sub",
+                        },
+                    ],
+                    "cursor": "more",
+                    "has_more": True,
+                },
+                {
+                    "entries": [
+                        {
+                            ".tag": "file",
+                            "id": "id:file",
+                            "name": "File.txt",
+                            "path_lower": "/docs/sub/file.txt",
+                            "path_display": "/Docs/Sub/File.txt",
+                        },
+                        {
+                            ".tag": "deleted",
+                            "name": "gone.txt",
+                            "path_lower": "/docs/gone.txt",
+                            "path_display": "/Docs/gone.txt",
+                        },
+                    ],
+                    "cursor": "done",
+                    "has_more": False,
+                },
+            ]
+        )
+
+        result = await self.imp.walk_item_tree("id:docs", max_depth=2)
+
+        self.assertEqual(
+            [
+                (item.item.item_id, item.parent_item_id, item.path, item.depth)
+                for item in result.items
+            ],
+            [
+                ("id:sub", "id:docs", "Sub", 1),
+                ("id:file", "id:sub", "Sub/File.txt", 2),
+            ],
+        )
+        self.network.POST.assert_has_calls(
+            [
+                call("files/get_metadata", json={"path": "id:docs"}),
+                call("files/list_folder", json={"path": "/docs", "recursive": True}),
+                call("files/list_folder/continue", json={"cursor": "more"}),
+            ],
+            any_order=True,
+        )
+
+    async def test_walk_item_tree_one_level(self):
+        self.network.POST.return_value.__aenter__.return_value.json_content = AsyncMock(
+            return_value={
+                "entries": [
+                    {
+                        ".tag": "folder",
+                        "id": "id:docs",
+                        "name": "Docs",
+                        "path_lower": "/docs",
+                        "path_display": "/Docs",
+                    },
+                ],
+                "cursor": "done",
+                "has_more": False,
+            }
+        )
+
+        result = await self.imp.walk_item_tree("/", max_depth=1)
+
+        self.assertEqual(
+            [
+                (item.item.item_id, item.parent_item_id, item.path, item.depth)
+                for item in result.items
+            ],
+            [("id:docs", "/", "Docs", 1)],
+        )
+        self.network.POST.assert_called_once_with(
+            "files/list_folder", json={"path": "", "recursive": False}
+        )
+
+    async def test_access_denied(self):
+        self._patch_post({"error_summary": "no_permission/"})
+        self.network.POST.return_value.__aenter__.return_value.http_status = 403
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.get_item_info("id:secret")
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.list_child_items("id:secret")
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import AsyncMock
 
 from addon_imps.storage.github import GitHubStorageImp
+from addon_service.common.exceptions import ItemAccessDenied
 from addon_toolkit.constrained_network.http import HttpRequestor
 from addon_toolkit.interfaces.storage import (
     ItemResult,
@@ -165,3 +166,64 @@ class TestGitHubStorageImp(unittest.IsolatedAsyncioTestCase):
         self._assert_get(
             "repos/testuser/repo1/contents/", {"page": "1", "per_page": "30"}
         )
+
+    async def test_walk_item_tree(self):
+        self._patch_get(
+            {
+                "tree": [
+                    {"path": "README.md", "type": "blob"},
+                    {"path": "src", "type": "tree"},
+                    {"path": "src/lib", "type": "tree"},
+                    {"path": "src/lib/a.py", "type": "blob"},
+                    {"path": "src/vendored", "type": "commit"},
+                ],
+                "truncated": False,
+            }
+        )
+
+        result = await self.imp.walk_item_tree("owner/repo:src", max_depth=5)
+
+        self.assertEqual(
+            [
+                (item.item.item_id, item.parent_item_id, item.path, item.depth)
+                for item in result.items
+            ],
+            [
+                ("owner/repo:src/lib", "owner/repo:src", "lib", 1),
+                ("src/lib/a.py", "owner/repo:src/lib", "lib/a.py", 2),
+            ],
+        )
+        self.assertEqual(result.items[0].item.item_type, ItemType.FOLDER)
+        self._assert_get("repos/owner/repo/git/trees/HEAD", {"recursive": "1"})
+
+    async def test_walk_item_tree_matches_listing(self):
+        self._patch_get(
+            {
+                "tree": [
+                    {"path": "src", "type": "tree"},
+                    {"path": "src/lib", "type": "tree"},
+                    {"path": "src/main.py", "type": "blob"},
+                ],
+                "truncated": False,
+            }
+        )
+        walked = await self.imp.walk_item_tree("owner/repo:src", max_depth=1)
+        self._patch_get(
+            [
+                {"name": "lib", "path": "src/lib", "type": "dir"},
+                {"name": "main.py", "path": "src/main.py", "type": "file"},
+            ]
+        )
+        listed = await self.imp.list_child_items("owner/repo:src")
+        self.assertEqual(
+            [item.item.item_id for item in walked.items],
+            [item.item_id for item in listed.items],
+        )
+
+    async def test_access_denied(self):
+        self._patch_get({"message": "Resource not accessible"})
+        self.network.GET.return_value.__aenter__.return_value.http_status = 403
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.get_item_info("testuser/repo1:secret.md")
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.list_child_items("testuser/repo1:")
@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock
 from django.core.exceptions import ValidationError
 
 from addon_imps.storage.gitlab import GitlabStorageImp
+from addon_service.common.exceptions import ItemAccessDenied
 from addon_toolkit.constrained_network.http import HttpRequestor
 from addon_toolkit.interfaces.storage import (
     ItemResult,
@@ -135,6 +136,41 @@ class TestGitlabStorageImp(unittest.IsolatedAsyncioTestCase):
             {"pagination": "keyset", "path": "", "sort": "asc", "order_by": "name"},
         )
 
+    async def test_walk_item_tree(self):
+        self._patch_get(
+            [
+                {"name": "lib", "path": "src/lib", "type": "tree"},
+                {"name": "a.py", "path": "src/lib/a.py", "type": "blob"},
+                {"name": "b.py", "path": "src/lib/deeper/b.py", "type": "blob"},
+                {"name": "main.py", "path": "src/main.py", "type": "blob"},
+            ]
+        )
+
+        result = [
+            tree_item async for tree_item in self.imp.walk_item_tree__stream("1:src", 2)
+        ]
+
+        self.assertEqual(
+            [
+                (item.item.item_id, item.parent_item_id, item.path, item.depth)
+                for item in result
+            ],
+            [
+                ("1:src/lib", "1:src", "lib", 1),
+                ("1:src/lib/a.py", "1:src/lib", "lib/a.py", 2),
+                ("1:src/main.py", "1:src", "main.py", 1),
+            ],
+        )
+        self._assert_get(
+            "projects/1/repository/tree",
+            {
+                "pagination": "keyset",
+                "path": "src",
+                "recursive": "true",
+                "per_page": "100",
+            },
+        )
+
     async def test_get_item_info_file_not_found(self):
         self._patch_get({}, status=HTTPStatus.NOT_FOUND)
 
@@ -210,3 +246,8 @@ class TestGitlabStorageImp(unittest.IsolatedAsyncioTestCase):
         ]
         self.assertEqual(result_page_2.items, expected_items_page_2)
         self.assertIsNone(result_page_2.next_sample_cursor)
+
+    async def test_access_denied(self):
+        self._patch_get({"message": "403 Forbidden"}, status=403)
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.list_child_items("repo1:")
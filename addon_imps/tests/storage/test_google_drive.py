@@ -9,6 +9,7 @@ from addon_imps.storage.google_drive import (
     File,
     GoogleDriveStorageImp,
 )
+from addon_service.common.exceptions import ItemAccessDenied
 from addon_toolkit.constrained_network.http import HttpRequestor
 from addon_toolkit.interfaces.storage import (
     ItemResult,
@@ -212,3 +213,11 @@ class TestGoogleDriveStorageImp(unittest.IsolatedAsyncioTestCase):
                 mimeType="application/vnd.google-apps.file", name="file", id="file_id"
             )
         )
+
+    async def test_access_denied(self):
+        self._patch_get({"error": {"code": 403}})
+        self.network.GET.return_value.__aenter__.return_value.http_status = 403
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.get_item_info("secret")
+        with self.assertRaises(ItemAccessDenied):
+            await self.imp.list_child_items("secret")
@@ -1,12 +1,28 @@
+"""getting ready instances of addon imps, for an account and config
+
+each invocation gets its own instance, bound to the given account -- but imps with
+their own clients (e.g. boto3) may reuse a client made before in the same thread with
+the same credentials (kept up to `ADDON_IMP_POOL_TTL_SECONDS`, at most
+`ADDON_IMP_POOL_MAX_SIZE` per thread), so repeat operations skip building a client
+(which may log in); imps using the gravyvalet network already share the thread's
+client session (see `get_singleton_client_session`)
+"""
+
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import collections
+import threading
+import time
+import typing
+import weakref
 
 from asgiref.sync import async_to_sync
+from django.conf import settings
 
 from addon_service.common.aiohttp_session import get_singleton_client_session
 from addon_service.common.network import GravyvaletHttpRequestor
 from addon_toolkit import AddonImp
+from addon_toolkit.credentials import Credentials
 from addon_toolkit.interfaces.citation import (
     CitationAddonImp,
     CitationConfig,
@@ -31,7 +47,7 @@ from addon_toolkit.interfaces.storage import (
 )
 
 
-if TYPE_CHECKING:
+if typing.TYPE_CHECKING:
     from addon_service.authorized_account.link.models import AuthorizedLinkAccount
     from addon_service.authorized_account.models import AuthorizedAccount
     from addon_service.models import (
@@ -46,6 +62,7 @@ async def get_addon_instance(
     account: AuthorizedAccount,
     config: StorageConfig | CitationConfig | ComputingConfig | LinkConfig,
 ) -> AddonImp:
+    """get a ready instance of the imp for the account and config (a new one)"""
     if issubclass(imp_cls, StorageAddonImp):
         return await get_storage_addon_instance(imp_cls, account, config)
     elif issubclass(imp_cls, CitationAddonImp):
@@ -57,7 +74,26 @@ async def get_addon_instance(
     raise ValueError(f"unknown addon type {imp_cls}")
 
 
-get_addon_instance__blocking = async_to_sync(get_addon_instance)
+def get_addon_instance__blocking(
+    imp_cls: type[AddonImp],
+    account: AuthorizedAccount,
+    config: StorageConfig | CitationConfig | ComputingConfig | LinkConfig,
+) -> AddonImp:
+    """get a ready instance of the imp for the account and config (a new one)
+
+    (same as `get_addon_instance`, for use in synchronous context)
+    """
+    if issubclass(imp_cls, _CLIENT_REQUESTOR_IMPS):
+        # made in this thread, so it may reuse a client made here before
+        # (`async_to_sync` would run in a new thread each time)
+        return _client_requestor_instance(imp_cls, account.credentials, config)
+    return async_to_sync(get_addon_instance)(imp_cls, account, config)
+
+
+def clear_addon_client_pools() -> None:
+    """forget all pooled clients"""
+    for _pool in list(_per_thread_client_pools.values()):
+        _pool.clear()
 
 
 async def get_storage_addon_instance(
@@ -83,7 +119,9 @@ async def get_storage_addon_instance(
             ),
         )
     if issubclass(imp_cls, StorageAddonClientRequestorImp):
-        imp = imp_cls(credentials=await account.get_credentials__async(), config=config)
+        imp = _client_requestor_instance(
+            imp_cls, await account.get_credentials__async(), config
+        )
 
     return imp
 
@@ -137,7 +175,9 @@ async def get_computing_addon_instance(
             ),
         )
     if issubclass(imp_cls, ComputingAddonClientRequestorImp):
-        imp = imp_cls(credentials=await account.get_credentials__async(), config=config)
+        imp = _client_requestor_instance(
+            imp_cls, await account.get_credentials__async(), config
+        )
 
     return imp
 
@@ -162,9 +202,81 @@ async def get_link_addon_instance(
             config=config,
         )
     if issubclass(imp_cls, LinkAddonClientRequestorImp):
-        imp = imp_cls(credentials=await account.get_credentials__async(), config=config)
+        imp = _client_requestor_instance(
+            imp_cls, await account.get_credentials__async(), config
+        )
 
     return imp
 
 
 get_link_addon_instance__blocking = async_to_sync(get_link_addon_instance)
+
+
+###
+# module-private helpers
+
+# imps with their own clients (not the thread's network session)
+_CLIENT_REQUESTOR_IMPS = (
+    StorageAddonClientRequestorImp,
+    ComputingAddonClientRequestorImp,
+    LinkAddonClientRequestorImp,
+)
+
+
+def _client_requestor_instance(
+    imp_cls: type[AddonImp],
+    credentials: Credentials,
+    config: StorageConfig | CitationConfig | ComputingConfig | LinkConfig,
+) -> AddonImp:
+    if not settings.ADDON_IMP_POOL_MAX_SIZE:
+        return imp_cls(credentials=credentials, config=config)
+    # (clients are not shared between threads -- e.g. boto3 sessions are not thread-safe)
+    _pool = _per_thread_client_pools.setdefault(
+        threading.current_thread(), _ClientPool()
+    )
+    _pool_key = (imp_cls, credentials)
+    _client = _pool.get(_pool_key)
+    if _client is None:
+        _client = imp_cls.create_client(credentials)
+        _pool.put(_pool_key, _client)
+    return imp_cls(credentials=credentials, config=config, reusable_client=_client)
+
+
+class _ClientPool:
+    """clients by key, least recent first"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[tuple, tuple[float, typing.Any]] = (
+            collections.OrderedDict()
+        )
+
+    def get(self, key: tuple) -> typing.Any:
+        with self._lock:
+            _entry = self._entries.get(key)
+            if _entry is None:
+                return None
+            _expires_at, _client = _entry
+            if _expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return _client
+
+    def put(self, key: tuple, client: typing.Any) -> None:
+        _expires_at = time.monotonic() + settings.ADDON_IMP_POOL_TTL_SECONDS
+        with self._lock:
+            self._entries[key] = (_expires_at, client)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.ADDON_IMP_POOL_MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# (forgotten along with each thread)
+_per_thread_client_pools: typing.MutableMapping[threading.Thread, _ClientPool] = (
+    weakref.WeakKeyDictionary()
+)
@@ -2,6 +2,9 @@ import dataclasses
 import typing
 from functools import cached_property
 
+import jsonschema
+from django.core.exceptions import ValidationError
+
 from addon_service.common.static_dataclass_model import StaticDataclassModel
 from addon_toolkit import (
     AddonCapabilities,
@@ -67,6 +70,13 @@ class AddonOperationModel(StaticDataclassModel):
     def kwargs_jsonschema(self) -> dict:
         return JsonschemaDocBuilder(self.declaration.operation_fn).build()
 
+    @cached_property
+    def kwargs_validator(self) -> jsonschema.protocols.Validator:
+        """validator for `kwargs_jsonschema` (schema checked once, when first built)"""
+        _validator_cls = jsonschema.validators.validator_for(self.kwargs_jsonschema)
+        _validator_cls.check_schema(self.kwargs_jsonschema)
+        return _validator_cls(self.kwargs_jsonschema)
+
     @cached_property
     def result_jsonschema(self) -> dict:
         return JsonschemaDocBuilder(self.declaration.result_dataclass).build()
@@ -83,5 +93,16 @@ class AddonOperationModel(StaticDataclassModel):
                 _imps.add(_imp_model)
         return tuple(_imps)
 
+    ###
+    # instance methods
+
+    def validate_kwargs(self, operation_kwargs: dict) -> None:
+        """raise `ValidationError` if the kwargs do not fit this operation's signature"""
+        _error = jsonschema.exceptions.best_match(
+            self.kwargs_validator.iter_errors(operation_kwargs)
+        )
+        if _error is not None:
+            raise ValidationError(_error)
+
     class JSONAPIMeta:
         resource_name = "addon-operations"
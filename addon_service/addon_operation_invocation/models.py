@@ -1,21 +1,112 @@
+import datetime
+import functools
+import hashlib
+import json
 import traceback
+import zlib
 
-import jsonschema
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import (
+    connection,
+    models,
+    transaction,
+)
+from django.utils import timezone
 
+from addon_service.addon_operation_invocation import partitions
 from addon_service.authorized_account.utils import get_config_for_account
+from addon_service.common import invocation_events
 from addon_service.common.base_model import AddonsServiceBaseModel
 from addon_service.common.invocation_status import InvocationStatus
 from addon_service.common.validators import validate_invocation_status
 from addon_service.configured_addon.utils import get_config_for_addon
 from addon_service.models import AddonOperationModel
-from addon_toolkit import AddonImp
+from addon_toolkit import (
+    AddonImp,
+    AddonOperationType,
+)
 from addon_toolkit.interfaces.citation import CitationConfig
 from addon_toolkit.interfaces.computing import ComputingConfig
 from addon_toolkit.interfaces.storage import StorageConfig
 
 
+# keep only so much of an exception's message on the invocation itself
+EXCEPTION_MESSAGE_MAX_LENGTH = 1000
+
+
+class InvocationPayload(models.Model):
+    """compressed text (a traceback or json result) shared by invocations with the same
+
+    content-addressed: stored once per distinct content, however many invocations refer
+    to it (see `AddonOperationInvocation.store_payloads`)
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)  # sha256 of the content
+    compressed_content = models.BinaryField()
+    content_length = models.PositiveIntegerField()
+    # when last stored (updated at most daily, to keep repeated stores cheap)
+    last_stored = models.DateTimeField()
+
+    @classmethod
+    def store(cls, content: str) -> "InvocationPayload":
+        _content_bytes = content.encode()
+        _payload = cls(
+            digest=hashlib.sha256(_content_bytes).hexdigest(),
+            compressed_content=zlib.compress(_content_bytes),
+            content_length=len(_content_bytes),
+            last_stored=timezone.now(),
+        )
+        _table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as _cursor:
+            _cursor.execute(
+                f"INSERT INTO {_table}"
+                " (digest, compressed_content, content_length, last_stored)"
+                " VALUES (%s, %s, %s, %s)"
+                " ON CONFLICT (digest) DO UPDATE SET last_stored = EXCLUDED.last_stored"
+                f" WHERE {_table}.last_stored < EXCLUDED.last_stored - interval '1 day'",
+                [
+                    _payload.digest,
+                    _payload.compressed_content,
+                    _payload.content_length,
+                    _payload.last_stored,
+                ],
+            )
+        _payload._state.adding = False
+        _payload.__dict__["content"] = content  # no need to decompress
+        return _payload
+
+    @classmethod
+    def prune_unused(cls) -> int:
+        """delete payloads no invocation refers to (and not stored in the last two days)"""
+        _deleted_count, _ = (
+            cls.objects.filter(
+                last_stored__lt=timezone.now() - datetime.timedelta(days=2)
+            )
+            .exclude(
+                models.Exists(
+                    AddonOperationInvocation.objects.filter(
+                        operation_result_payload=models.OuterRef("pk")
+                    )
+                )
+            )
+            .exclude(
+                models.Exists(
+                    AddonOperationInvocation.objects.filter(
+                        exception_context_payload=models.OuterRef("pk")
+                    )
+                )
+            )
+            .delete()
+        )
+        return _deleted_count
+
+    @functools.cached_property
+    def content(self) -> str:
+        return zlib.decompress(self.compressed_content).decode()
+
+
 class AddonOperationInvocation(AddonsServiceBaseModel):
     int_invocation_status = models.IntegerField(
         validators=[validate_invocation_status],
@@ -28,15 +119,41 @@ class AddonOperationInvocation(AddonsServiceBaseModel):
     )
     thru_account = models.ForeignKey("AuthorizedAccount", on_delete=models.CASCADE)
     by_user = models.ForeignKey("UserReference", on_delete=models.CASCADE)
-    operation_result = models.JSONField(null=True, default=None, blank=True)
+    # `operation_result` is kept inline when small, or else in an `InvocationPayload`
+    operation_result_inline = models.JSONField(
+        null=True, default=None, blank=True, db_column="operation_result"
+    )
+    operation_result_payload = models.ForeignKey(
+        InvocationPayload,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+    )
+    # whether `operation_result` was reused from a recent invocation (see `invocation_result_cache`)
+    result_from_cache = models.BooleanField(default=False)
     exception_type = models.TextField(blank=True, default="")
-    exception_message = models.TextField(blank=True, default="")
-    exception_context = models.TextField(blank=True, default="")
+    exception_message = models.TextField(blank=True, default="")  # (truncated)
+    # groups invocations that failed the same way (see `set_exception`)
+    exception_fingerprint = models.CharField(max_length=64, blank=True, default="")
+    # the full traceback (see `exception_context`)
+    exception_context_payload = models.ForeignKey(
+        InvocationPayload,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+    )
+    # how long to keep this invocation (set when first saved, by status and operation,
+    # and not changed after; the table is partitioned by `created` and `retention_days`
+    # -- see `partitions`)
+    retention_days = models.PositiveIntegerField(editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["operation_identifier"]),
             models.Index(fields=["exception_type"]),
+            models.Index(fields=["exception_fingerprint"]),
         ]
 
     class JSONAPIMeta:
@@ -50,6 +167,32 @@ class AddonOperationInvocation(AddonsServiceBaseModel):
     def invocation_status(self, value):
         self.int_invocation_status = InvocationStatus(value).value
 
+    @property
+    def operation_result(self):
+        if self.operation_result_payload_id is None:
+            return self.operation_result_inline
+        return json.loads(self.operation_result_payload.content)
+
+    @operation_result.setter
+    def operation_result(self, value):
+        self.operation_result_inline = value
+        self.operation_result_payload = None
+
+    _staged_exception_context: str | None = None  # set but not yet stored
+
+    @property
+    def exception_context(self) -> str:
+        if self._staged_exception_context is not None:
+            return self._staged_exception_context
+        if self.exception_context_payload_id is None:
+            return ""
+        return self.exception_context_payload.content
+
+    @exception_context.setter
+    def exception_context(self, value: str):
+        self._staged_exception_context = value
+        self.exception_context_payload = None
+
     @property
     def operation(self) -> AddonOperationModel:
         return AddonOperationModel.get_by_static_key(self.operation_identifier)
@@ -66,6 +209,11 @@ class AddonOperationInvocation(AddonsServiceBaseModel):
     def owner_uri(self) -> str:
         return self.by_user.user_uri
 
+    @property
+    def is_ephemeral(self) -> bool:
+        """whether this invocation is recorded after performing (instead of before)"""
+        return self.operation.declaration.ephemeral_invocation
+
     @property
     def imp_cls(self) -> type[AddonImp]:
         return self.thru_account.imp_cls
@@ -76,15 +224,84 @@ class AddonOperationInvocation(AddonsServiceBaseModel):
             return get_config_for_addon(self.thru_addon)
         return get_config_for_account(self.thru_account)
 
+    @sync_to_async
+    def get_config__async(self) -> StorageConfig | CitationConfig | ComputingConfig:
+        # wrap db access in `sync_to_async`
+        return self.config
+
+    def set_retention_days(self) -> None:
+        self.retention_days = partitions.retention_days_for(
+            self.operation_name, self.invocation_status
+        )
+
+    def store_payloads(self) -> None:
+        """move any traceback (and a large result) into the side store"""
+        if self._staged_exception_context:
+            self.exception_context_payload = InvocationPayload.store(
+                self._staged_exception_context
+            )
+        self._staged_exception_context = None
+        if (
+            self.operation_result_inline is not None
+            and self.operation_result_payload_id is None
+        ):
+            _result_json = json.dumps(self.operation_result_inline)
+            if len(_result_json) > settings.INVOCATION_RESULT_INLINE_MAX_LENGTH:
+                self.operation_result_payload = InvocationPayload.store(_result_json)
+                self.operation_result_inline = None
+
+    def save(self, *args, **kwargs):
+        self.store_payloads()
+        if self.retention_days is None:  # (not yet saved; see `partitions`)
+            self.set_retention_days()
+        super().save(*args, **kwargs)
+        if self.operation.operation_type is AddonOperationType.EVENTUAL:
+            # let any waiting clients know (once the new status is visible to them)
+            transaction.on_commit(
+                functools.partial(
+                    invocation_events.publish_invocation_event,
+                    self.pk,
+                    "status",
+                    self.status_event_data(),
+                ),
+                robust=True,
+            )
+
+    def status_event_data(self) -> dict:
+        return {
+            "id": self.pk,
+            "invocation_status": self.invocation_status.name,
+            "modified": self.modified.isoformat() if self.modified else None,
+        }
+
+    def publish_status(self) -> None:
+        """let any waiting clients know this invocation's (maybe not yet saved) status"""
+        invocation_events.publish_invocation_event(
+            self.pk, "status", self.status_event_data()
+        )
+
+    def publish_progress(self, progress: dict) -> None:
+        """let any waiting clients know how this invocation is going (not saved)"""
+        invocation_events.publish_invocation_event(
+            self.pk, "progress", {"id": self.pk, "progress": progress}
+        )
+
+    def clean_ephemeral(self) -> None:
+        """validate an unsaved invocation without hitting the database"""
+        self.clean_fields(
+            exclude=[
+                "thru_addon",
+                "thru_account",
+                "by_user",
+                "created",
+                "modified",
+                "retention_days",
+            ]
+        )
+
     def clean_fields(self, *args, **kwargs):
         super().clean_fields(*args, **kwargs)
-        try:
-            jsonschema.validate(
-                instance=self.operation_kwargs,
-                schema=self.operation.kwargs_jsonschema,
-            )
-        except jsonschema.exceptions.ValidationError as _exception:
-            raise ValidationError(_exception)
+        self.operation.validate_kwargs(self.operation_kwargs)
         if self.thru_addon is not None and (
             self.thru_addon.base_account_id != self.thru_account_id
         ):
@@ -95,11 +312,28 @@ class AddonOperationInvocation(AddonsServiceBaseModel):
     def set_exception(self, exception: BaseException) -> None:
         self.invocation_status = InvocationStatus.ERROR
         self.exception_type = type(exception).__qualname__
-        self.exception_message = repr(exception)
+        self.exception_message = repr(exception)[:EXCEPTION_MESSAGE_MAX_LENGTH]
         _tb = traceback.TracebackException.from_exception(exception)
+        self.exception_fingerprint = _exception_fingerprint(_tb)
         self.exception_context = "\n".join(_tb.format(chain=True))
 
     def clear_exception(self) -> None:
         self.exception_type = ""
         self.exception_message = ""
+        self.exception_fingerprint = ""
         self.exception_context = ""
+
+
+def _exception_fingerprint(tb: traceback.TracebackException) -> str:
+    # same exception types raised from the same functions, regardless of
+    # message and line numbers (so a fingerprint outlasts unrelated code changes)
+    _hash = hashlib.sha256()
+    _tb: traceback.TracebackException | None = tb
+    while _tb is not None:
+        _hash.update(
+            f"{_tb.exc_type.__module__}.{_tb.exc_type.__qualname__}\n".encode()
+        )
+        for _frame in _tb.stack:
+            _hash.update(f"{_frame.filename}:{_frame.name}\n".encode())
+        _tb = _tb.__cause__ or (None if _tb.__suppress_context__ else _tb.__context__)
+    return _hash.hexdigest()
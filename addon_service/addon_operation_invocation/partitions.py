@@ -0,0 +1,261 @@
+"""time-partitioned storage for `AddonOperationInvocation` (postgres only)
+
+the invocation table is partitioned by range of `created`, one partition per
+`PARTITION_PERIOD` -- each of those is partitioned again by list of `retention_days`
+(one partition per retention in the current policy, plus a default partition), so
+invocations can be pruned by dropping whole partitions once all they hold has outlived
+its retention, instead of deleting row by row (see `prune_invocation_partitions`)
+
+each invocation's retention is decided by its status and operation name, according to
+`settings.INVOCATION_RETENTION_POLICY` (see `retention_days_for`) -- once, when first
+saved, so a row never moves between partitions (an invocation not yet finished gets
+the longest retention it may have once finished)
+
+the primary key must include the partition keys, so is `(id, created, retention_days)`
+-- ids are unique only as long as each invocation is inserted once (see
+`save_invocation_records__celery`, which checks for ids saved before)
+"""
+
+import datetime
+import re
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+from addon_service.common.invocation_status import InvocationStatus
+
+
+__all__ = (
+    "DEFAULT_PARTITION",
+    "PARTITION_PERIOD",
+    "PARTITIONED_TABLE",
+    "ensure_invocation_partitions",
+    "prune_invocation_partitions",
+    "retention_classes",
+    "retention_days_for",
+)
+
+
+PARTITIONED_TABLE = "addon_service_addonoperationinvocation"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_pdefault"  # (for periods not yet partitioned)
+PARTITION_PERIOD = datetime.timedelta(days=7)
+PARTITIONS_AHEAD = 2  # keep partitions ready for so many periods to come
+
+_FINISHED_STATUSES = (InvocationStatus.SUCCESS, InvocationStatus.ERROR)
+_PERIOD_EPOCH = datetime.date(2024, 1, 1)  # a monday; periods start on mondays
+_PARTITION_NAME = re.compile(
+    rf"^{PARTITIONED_TABLE}_p(?P<start>\d{{8}})(?:_r(?P<retention>\d+|default))?$"
+)
+
+
+def retention_days_for(operation_name: str, invocation_status: InvocationStatus) -> int:
+    """how many days to keep an invocation, by the most specific matching policy entry
+
+    (for an invocation not yet finished, the longest it may get once finished)
+    """
+    if invocation_status not in _FINISHED_STATUSES:
+        return max(
+            retention_days_for(operation_name, _finished_status)
+            for _finished_status in _FINISHED_STATUSES
+        )
+    _policy = settings.INVOCATION_RETENTION_POLICY
+    for _policy_key in (
+        f"{operation_name}:{invocation_status.name}",
+        operation_name,
+        invocation_status.name,
+    ):
+        if _policy_key in _policy:
+            return _policy[_policy_key]
+    return settings.INVOCATION_RETENTION_DAYS
+
+
+def retention_classes() -> frozenset[int]:
+    """all retentions (in days) the current policy may give"""
+    return frozenset(
+        (
+            settings.INVOCATION_RETENTION_DAYS,
+            *settings.INVOCATION_RETENTION_POLICY.values(),
+        )
+    )
+
+
+def ensure_invocation_partitions(
+    *,
+    since: datetime.date | None = None,
+    today: datetime.date | None = None,
+    connection=default_connection,
+) -> list[str]:
+    """create any missing partitions, from the period including `since` thru periods ahead
+
+    a period's partition gets a sub-partition for each retention class when created,
+    or later if the period has no invocations with unexpected retention yet
+    (a policy change otherwise applies fully from the next period on)
+
+    invocations that landed in the top-level default partition (for want of their
+    period's partition) are moved into partitions created for them -- so they are
+    pruned like any others, and do not block creating those partitions
+
+    returns names of created partitions
+    """
+    if connection.vendor != "postgresql":
+        return []
+    _today = today or timezone.now().date()
+    _period_starts = set()
+    _period_start = _period_start_for(since or _today)
+    _last_period_start = _period_start_for(_today) + (
+        PARTITION_PERIOD * PARTITIONS_AHEAD
+    )
+    while _period_start <= _last_period_start:
+        _period_starts.add(_period_start)
+        _period_start += PARTITION_PERIOD
+    _created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as _cursor:
+        _existing = set(_partition_names(_cursor))
+        _stray_period_starts = set()
+        if DEFAULT_PARTITION in _existing:
+            # (periods start on mondays, like postgres weeks)
+            _cursor.execute(
+                "SELECT DISTINCT date_trunc('week', created AT TIME ZONE 'UTC')::date"
+                f" FROM {_quoted(connection, DEFAULT_PARTITION)}"
+            )
+            _stray_period_starts = {_start for (_start,) in _cursor.fetchall()}
+        _has_strays = bool(_stray_period_starts)
+        if _has_strays:
+            _period_starts.update(_stray_period_starts)
+            # (postgres would refuse new partitions for rows in the default partition)
+            _cursor.execute(
+                f"ALTER TABLE {_quoted(connection, PARTITIONED_TABLE)}"
+                f" DETACH PARTITION {_quoted(connection, DEFAULT_PARTITION)}"
+            )
+        for _period_start in sorted(_period_starts):
+            _period_table = _period_table_name(_period_start)
+            _default_table = f"{_period_table}_rdefault"
+            if _period_table not in _existing:
+                _cursor.execute(
+                    f"CREATE TABLE {_quoted(connection, _period_table)}"
+                    f" PARTITION OF {_quoted(connection, PARTITIONED_TABLE)}"
+                    f" FOR VALUES FROM ({_timestamp_literal(_period_start)})"
+                    f" TO ({_timestamp_literal(_period_start + PARTITION_PERIOD)})"
+                    " PARTITION BY LIST (retention_days)"
+                )
+                _cursor.execute(
+                    f"CREATE TABLE {_quoted(connection, _default_table)}"
+                    f" PARTITION OF {_quoted(connection, _period_table)} DEFAULT"
+                )
+                _created.extend((_period_table, _default_table))
+                _period_is_empty = True
+            else:
+                _cursor.execute(
+                    f"SELECT 1 FROM {_quoted(connection, _default_table)} LIMIT 1"
+                )
+                _period_is_empty = _cursor.fetchone() is None
+            if _period_is_empty:
+                for _retention_days in sorted(retention_classes()):
+                    _retention_table = f"{_period_table}_r{_retention_days}"
+                    if _retention_table not in _existing:
+                        _cursor.execute(
+                            f"CREATE TABLE {_quoted(connection, _retention_table)}"
+                            f" PARTITION OF {_quoted(connection, _period_table)}"
+                            f" FOR VALUES IN ({int(_retention_days)})"
+                        )
+                        _created.append(_retention_table)
+        if _has_strays:
+            _cursor.execute(
+                f"INSERT INTO {_quoted(connection, PARTITIONED_TABLE)}"
+                f" SELECT * FROM {_quoted(connection, DEFAULT_PARTITION)}"
+            )
+            _cursor.execute(f"DELETE FROM {_quoted(connection, DEFAULT_PARTITION)}")
+            _cursor.execute(
+                f"ALTER TABLE {_quoted(connection, PARTITIONED_TABLE)}"
+                f" ATTACH PARTITION {_quoted(connection, DEFAULT_PARTITION)} DEFAULT"
+            )
+    return _created
+
+
+def prune_invocation_partitions(
+    *,
+    today: datetime.date | None = None,
+    connection=default_connection,
+) -> list[str]:
+    """drop partitions holding only invocations that have outlived their retention
+
+    returns names of dropped partitions
+    """
+    if connection.vendor != "postgresql":
+        return []
+    _today = today or timezone.now().date()
+    _longest_retention = max(retention_classes())
+    _dropped = []
+    with connection.cursor() as _cursor:
+        _periods: dict[datetime.date, list[int]] = {}
+        _periods_with_default: set[datetime.date] = set()
+        for _name in _partition_names(_cursor):
+            _match = _PARTITION_NAME.match(_name)
+            if _match is None:
+                continue  # not a period partition (e.g. the top-level default)
+            _retention = _match["retention"]
+            _period_start = datetime.datetime.strptime(_match["start"], "%Y%m%d").date()
+            _period_retentions = _periods.setdefault(_period_start, [])
+            if _retention == "default":
+                _periods_with_default.add(_period_start)
+            elif _retention is not None:
+                _period_retentions.append(int(_retention))
+        for _period_start, _period_retentions in sorted(_periods.items()):
+            _period_end = _period_start + PARTITION_PERIOD
+            _period_retention = max((_longest_retention, *_period_retentions))
+            if _period_start in _periods_with_default:
+                # (may hold longer retentions, from an earlier policy)
+                _cursor.execute(
+                    "SELECT max(retention_days) FROM "
+                    + _quoted(
+                        connection, f"{_period_table_name(_period_start)}_rdefault"
+                    )
+                )
+                (_default_retention,) = _cursor.fetchone()
+                if _default_retention is not None:
+                    _period_retention = max(_period_retention, _default_retention)
+            if _period_end + datetime.timedelta(days=_period_retention) <= _today:
+                _to_drop = [_period_table_name(_period_start)]
+            else:
+                _to_drop = [
+                    f"{_period_table_name(_period_start)}_r{_retention_days}"
+                    for _retention_days in _period_retentions
+                    if _period_end + datetime.timedelta(days=_retention_days) <= _today
+                ]
+            for _table in _to_drop:
+                _cursor.execute(f"DROP TABLE {_quoted(connection, _table)}")
+                _dropped.append(_table)
+    return _dropped
+
+
+###
+# module-private helpers
+
+
+def _period_start_for(day: datetime.date) -> datetime.date:
+    _periods_since_epoch = (day - _PERIOD_EPOCH) // PARTITION_PERIOD
+    return _PERIOD_EPOCH + (PARTITION_PERIOD * _periods_since_epoch)
+
+
+def _period_table_name(period_start: datetime.date) -> str:
+    return f"{PARTITIONED_TABLE}_p{period_start:%Y%m%d}"
+
+
+def _timestamp_literal(day: datetime.date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def _quoted(connection, name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _partition_names(cursor) -> list[str]:
+    cursor.execute(
+        "SELECT _class.relname FROM pg_partition_tree(%s::regclass) AS _tree"
+        " JOIN pg_class AS _class ON _class.oid = _tree.relid"
+        " WHERE _tree.level > 0",
+        [PARTITIONED_TABLE],
+    )
+    return [_name for (_name,) in cursor.fetchall()]
@@ -41,6 +41,7 @@ class AddonOperationInvocationSerializer(serializers.HyperlinkedModelSerializer)
             "invocation_status",
             "operation_kwargs",
             "operation_result",
+            "result_from_cache",
             "operation",
             "by_user",
             "thru_account",
@@ -56,6 +57,7 @@ class AddonOperationInvocationSerializer(serializers.HyperlinkedModelSerializer)
     invocation_status = EnumNameChoiceField(enum_cls=InvocationStatus, read_only=True)
     operation_kwargs = serializers.JSONField()
     operation_result = serializers.JSONField(read_only=True)
+    result_from_cache = serializers.BooleanField(read_only=True)
     created = serializers.DateTimeField(read_only=True)
     modified = serializers.DateTimeField(read_only=True)
     operation_name = serializers.CharField(required=True)
@@ -103,6 +105,15 @@ class AddonOperationInvocationSerializer(serializers.HyperlinkedModelSerializer)
         validated_data = super().to_internal_value(data)
         return validated_data
 
+    def to_representation(self, instance):
+        _representation = super().to_representation(instance)
+        if instance._state.adding or instance._state.db is None:
+            # not in the database -- an ephemeral invocation not yet (or perhaps
+            # ever) saved, or a duplicate collapsed into one -- so no self link
+            # (see `invocation_write_behind` and `invocation_collapsing`)
+            _representation.pop("url", None)
+        return _representation
+
     def create(self, validated_data):
         _thru_addon = validated_data.get("thru_addon")
         _thru_account = validated_data.get("thru_account")
@@ -115,7 +126,7 @@ class AddonOperationInvocationSerializer(serializers.HyperlinkedModelSerializer)
         _operation = _imp_cls.get_operation_declaration(_operation_name)
         _request = self.context["request"]
         _user_uri = get_user_uri(_request) or f"{settings.OSF_BASE_URL}/anonymous"
-        _user, _ = UserReference.objects.get_or_create(user_uri=_user_uri)
+        _user = UserReference.objects.for_user_uri(_user_uri)
         return AddonOperationInvocation(
             operation=AddonOperationModel(_imp_cls.ADDON_INTERFACE, _operation),
             operation_kwargs=validated_data["operation_kwargs"],
@@ -1,9 +1,37 @@
+import asyncio
+import functools
+import json
+import time
+import typing
+from http import (
+    HTTPMethod,
+    HTTPStatus,
+)
+
+from asgiref.sync import sync_to_async
+from django import http as django_http
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
 from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
 )
+from rest_framework import exceptions as drf_exceptions
 from rest_framework.response import Response
+from rest_framework_json_api import serializers as jsonapi_serializers
 
+from addon_service.authentication import GVCombinedAuthentication
+from addon_service.common import (
+    invocation_collapsing,
+    invocation_latency,
+    osf,
+    rate_limiting,
+)
+from addon_service.common.invocation_events import InvocationEventSubscription
+from addon_service.common.invocation_status import InvocationStatus
 from addon_service.common.permissions import (
     IsAuthenticated,
     SessionUserMayAccessInvocation,
@@ -11,10 +39,15 @@ from addon_service.common.permissions import (
 )
 from addon_service.common.viewsets import RetrieveCreateViewSet
 from addon_service.tasks.invocation import (
+    aggregate_invocation__async,
+    perform_invocation__async,
     perform_invocation__blocking,
-    perform_invocation__celery,
+    stream_invocation__async,
 )
+from addon_service.tasks.invocation_scheduling import schedule_invocation
 from addon_toolkit import AddonOperationType
+from addon_toolkit import exceptions as toolkit_exceptions
+from addon_toolkit.interfaces import AllAddonInterfaces
 
 from ..authorized_account.citation.serializers import (
     AuthorizedCitationAccountSerializer,
@@ -30,8 +63,15 @@ from ..configured_addon.computing.serializers import ConfiguredComputingAddonSer
 from ..configured_addon.link.serializers import ConfiguredLinkAddonSerializer
 from ..configured_addon.models import ConfiguredAddon
 from ..configured_addon.storage.serializers import ConfiguredStorageAddonSerializer
+from ..models import (
+    AddonOperationModel,
+    UserReference,
+)
 from .models import AddonOperationInvocation
-from .serializers import AddonOperationInvocationSerializer
+from .serializers import (
+    RESOURCE_TYPE,
+    AddonOperationInvocationSerializer,
+)
 
 
 @extend_schema_view(
@@ -46,6 +86,8 @@ from .serializers import AddonOperationInvocationSerializer
 class AddonOperationInvocationViewSet(RetrieveCreateViewSet):
     queryset = AddonOperationInvocation.objects.all()
     serializer_class = AddonOperationInvocationSerializer
+    throttle_scope = rate_limiting.INVOCATION_SCOPE
+    _accepted = False  # whether to respond `202 Accepted` (see `create`)
 
     def get_permissions(self):
         match self.action:
@@ -60,6 +102,12 @@ class AddonOperationInvocationViewSet(RetrieveCreateViewSet):
                     f"no permission implemented for action '{self.action}'"
                 )
 
+    def get_throttles(self):
+        # (only creating invocations is rate-limited, not polling them)
+        if self.action == "create":
+            return [rate_limiting.RateLimitThrottle()]
+        return []
+
     def retrieve_related(self, request, *args, **kwargs):
         instance = self.get_related_instance()
         if isinstance(instance, AuthorizedAccount):
@@ -105,7 +153,56 @@ class AddonOperationInvocationViewSet(RetrieveCreateViewSet):
         return Response(serializer.data)
 
     def perform_create(self, serializer):
-        super().perform_create(serializer)
+        # (same as `_CreateWithPermissionsMixin.perform_create`, but may not save yet)
+        serializer.save()  # builds an unsaved invocation; see serializer `create`
+        _new_invocation = serializer.instance
+        self.check_object_permissions(self.request, _new_invocation)
+        rate_limiting.check_rate_limits(
+            self.request, rate_limiting.invocation_rate_limit_scopes(_new_invocation)
+        )
+        # a duplicate gets the earlier invocation instead (see `invocation_collapsing`)
+        _claim = invocation_collapsing.claim_invocation(
+            _new_invocation,
+            self.request.headers.get(invocation_collapsing.IDEMPOTENCY_KEY_HEADER),
+        )
+        if _claim is not None and _claim.is_duplicate:
+            # (not waiting for an earlier invocation still performing, in this
+            # request's transaction -- performed again instead)
+            _earlier_invocation = _claim.earlier_invocation(_new_invocation, wait=False)
+            if _earlier_invocation is not None:
+                serializer.instance = _earlier_invocation
+                self._accepted = (
+                    _earlier_invocation.invocation_status.name
+                    not in _FINAL_STATUS_NAMES
+                )
+                return
+            _claim = None  # (performed after all)
+        try:
+            self._perform_new_invocation(serializer)
+        except BaseException:
+            if _claim is not None:
+                _claim.give_up()  # (the request's transaction is rolled back)
+            raise
+        if _claim is not None:
+            _claim.settle(serializer.instance)  # (once committed; see `settle`)
+
+    def create(self, request, *args, **kwargs):
+        _response = super().create(request, *args, **kwargs)
+        if self._accepted:
+            _response.status_code = HTTPStatus.ACCEPTED
+        return _response
+
+    def _perform_new_invocation(self, serializer):
+        _new_invocation = serializer.instance
+        # an immediate operation recently slow (see `invocation_latency`) is scheduled
+        # like an eventual one, with a `202 Accepted` response (see `create`)
+        self._accepted = invocation_latency.expects_slow(_new_invocation)
+        if _new_invocation.is_ephemeral and not self._accepted:
+            # perform without saving first; recorded after (see `invocation_write_behind`)
+            _new_invocation.clean_ephemeral()
+            perform_invocation__blocking(_new_invocation)
+            return
+        _new_invocation.save()
         # after creating the AddonOperationInvocation, look into invoking it
         _invocation = (
             AddonOperationInvocation.objects.filter(pk=serializer.instance.pk)
@@ -117,15 +214,20 @@ class AddonOperationInvocationViewSet(RetrieveCreateViewSet):
         )
         if _invocation.thru_addon:
             _invocation.thru_addon.base_account = _invocation.thru_account
+        serializer.instance = _invocation
         _operation_type = _invocation.operation.operation_type
+        # (scheduled once the request's transaction commits, so a worker finds it saved)
+        _schedule = functools.partial(schedule_invocation, _invocation)
         match _operation_type:
             case AddonOperationType.REDIRECT | AddonOperationType.IMMEDIATE:
-                perform_invocation__blocking(_invocation)
+                if self._accepted:
+                    transaction.on_commit(_schedule)
+                else:
+                    perform_invocation__blocking(_invocation)
             case AddonOperationType.EVENTUAL:
-                perform_invocation__celery.delay(_invocation.pk)
+                transaction.on_commit(_schedule)
             case _:
                 raise ValueError(f"unknown operation type: {_operation_type}")
-        serializer.instance = _invocation
 
     def _get_narrowed_down_selects(self, serializer):
         addon_resource_name = serializer.initial_data.get(
@@ -137,3 +239,643 @@ class AddonOperationInvocationViewSet(RetrieveCreateViewSet):
             f"thru_account__authorized{addon_type}account",
             f"thru_account__external_service__external{addon_type}service",
         ]
+
+
+###
+# async invocation views -- same request and response as `AddonOperationInvocationViewSet.create`,
+# but IMMEDIATE and REDIRECT operations are awaited on the event loop instead of
+# holding a thread (with its own event loop) for the duration of the operation
+
+
+@extend_schema(exclude=True)
+@transaction.non_atomic_requests  # async views and ATOMIC_REQUESTS do not mix
+async def async_invocation_view(request: django_http.HttpRequest):
+    """create and perform an addon operation invocation, asynchronously"""
+    if request.method != HTTPMethod.POST:
+        return django_http.HttpResponseNotAllowed([HTTPMethod.POST])
+    try:
+        _loader = await _InvocationLoader.for_request(request)
+        _invocation = await _loader.build_invocation(
+            _parse_request_document(request.body, many=False)
+        )
+        # a duplicate gets the earlier invocation instead (see `invocation_collapsing`)
+        _claim = await invocation_collapsing.claim_invocation__async(
+            _invocation,
+            request.headers.get(invocation_collapsing.IDEMPOTENCY_KEY_HEADER),
+        )
+        if _claim is not None and _claim.is_duplicate:
+            _earlier_invocation = await _claim.earlier_invocation__async(_invocation)
+            if _earlier_invocation is not None:
+                return await _invocation_response__async(
+                    request,
+                    invocation=_earlier_invocation,
+                    status=(
+                        HTTPStatus.CREATED
+                        if _earlier_invocation.invocation_status.name
+                        in _FINAL_STATUS_NAMES
+                        else HTTPStatus.ACCEPTED
+                    ),
+                )
+            _claim = None  # (performed after all)
+        await _prepare_invocation__async(_invocation)
+        try:
+            _status = await _dispatch_invocation__async(_invocation)
+        finally:
+            if _claim is not None:
+                await _claim.settle__async(_invocation)
+    except Exception as _e:
+        return await _invocation_response__async(request, exception=_e)
+    return await _invocation_response__async(
+        request, invocation=_invocation, status=_status
+    )
+
+
+@extend_schema(exclude=True)
+@transaction.non_atomic_requests  # async views and ATOMIC_REQUESTS do not mix
+async def batch_invocation_view(request: django_http.HttpRequest):
+    """create and perform several addon operation invocations concurrently
+
+    responds with the invocations that could be created (whether their operations
+    succeeded or not) as `data`, and problems with any others in `meta.errors`
+    (each with a `source.pointer` to its index in the request's `data`)
+    """
+    if request.method != HTTPMethod.POST:
+        return django_http.HttpResponseNotAllowed([HTTPMethod.POST])
+    try:
+        _loader = await _InvocationLoader.for_request(request)
+        _resources = _parse_request_document(request.body, many=True)
+    except Exception as _e:
+        return await _invocation_response__async(request, exception=_e)
+    await _loader.prefetch_permissions(_resources)
+    _concurrency = asyncio.Semaphore(settings.INVOCATION_BATCH_CONCURRENCY)
+
+    async def _invoke(resource: dict) -> AddonOperationInvocation:
+        async with _concurrency:
+            _invocation = await _loader.create_invocation(resource)
+            try:
+                await _dispatch_invocation__async(_invocation)
+            except Exception:
+                pass  # problem recorded on the invocation
+            return _invocation
+
+    _outcomes = await asyncio.gather(
+        *map(_invoke, _resources),
+        return_exceptions=True,
+    )
+    _invocations = []
+    _errors = []
+    for _index, _outcome in enumerate(_outcomes):
+        if isinstance(_outcome, AddonOperationInvocation):
+            _invocations.append(_outcome)
+        elif isinstance(_outcome, Exception):
+            _errors.extend(_batch_errors(_index, _outcome))
+        else:
+            raise _outcome  # e.g. asyncio.CancelledError
+    return await _invocation_response__async(
+        request,
+        invocations=_invocations,
+        meta={"errors": _errors},
+    )
+
+
+@extend_schema(exclude=True)
+@transaction.non_atomic_requests  # async views and ATOMIC_REQUESTS do not mix
+async def stream_invocation_view(request: django_http.HttpRequest):
+    """create and perform a listing invocation, streaming its result items
+
+    responds with newline-delimited json, one result item per line, sent while the
+    addon is still fetching more -- if the operation fails partway, the last line is
+    a json:api error document instead of an item
+    """
+    if request.method != HTTPMethod.POST:
+        return django_http.HttpResponseNotAllowed([HTTPMethod.POST])
+    try:
+        _loader = await _InvocationLoader.for_request(request)
+        _invocation = await _loader.create_invocation(
+            _parse_request_document(request.body, many=False),
+            listing=True,
+        )
+    except Exception as _e:
+        return await _invocation_response__async(request, exception=_e)
+    return django_http.StreamingHttpResponse(
+        _ndjson_lines(_invocation),
+        content_type="application/x-ndjson",
+    )
+
+
+@extend_schema(exclude=True)
+@transaction.non_atomic_requests  # async views and ATOMIC_REQUESTS do not mix
+async def aggregate_invocation_view(request: django_http.HttpRequest):
+    """create and perform a listing invocation, with all its pages in one result
+
+    responds like `async_invocation_view`, with the pages' items merged into one
+    `operation_result` -- if limits were reached, its `next_sample_cursor` is where
+    to continue (see `aggregate_invocation__async`)
+    """
+    if request.method != HTTPMethod.POST:
+        return django_http.HttpResponseNotAllowed([HTTPMethod.POST])
+    try:
+        _loader = await _InvocationLoader.for_request(request)
+        _invocation = await _loader.create_invocation(
+            _parse_request_document(request.body, many=False),
+            listing=True,
+        )
+        await aggregate_invocation__async(_invocation)
+    except Exception as _e:
+        return await _invocation_response__async(request, exception=_e)
+    return await _invocation_response__async(
+        request, invocation=_invocation, status=HTTPStatus.CREATED
+    )
+
+
+@extend_schema(exclude=True)
+@transaction.non_atomic_requests  # async views and ATOMIC_REQUESTS do not mix
+async def invocation_events_view(request: django_http.HttpRequest, pk: str):
+    """stream live events for an invocation, as server-sent events
+
+    sends a `status` event with the invocation's current status, then `status` and
+    `progress` events as they happen, until the invocation succeeds or fails (or
+    `INVOCATION_EVENTS_MAX_SECONDS` pass, after which a client may reconnect)
+    """
+    if request.method != HTTPMethod.GET:
+        return django_http.HttpResponseNotAllowed([HTTPMethod.GET])
+    try:
+        _user = await GVCombinedAuthentication().authenticate__async(request)
+        if _user is None:
+            raise drf_exceptions.NotAuthenticated
+        _invocation = await _get_invocation__async(pk)
+        if not await SessionUserMayAccessInvocation().has_object_permission__async(
+            request, None, _invocation
+        ):
+            raise drf_exceptions.PermissionDenied
+    except Exception as _e:
+        return await _invocation_response__async(request, exception=_e)
+    return django_http.StreamingHttpResponse(
+        _server_sent_events(_invocation),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# like rest_framework views, rely on authentication other than cookies
+# (note: `csrf_exempt` decorator does not preserve async-ness in this django version)
+async_invocation_view.csrf_exempt = True  # type: ignore[attr-defined]
+batch_invocation_view.csrf_exempt = True  # type: ignore[attr-defined]
+stream_invocation_view.csrf_exempt = True  # type: ignore[attr-defined]
+aggregate_invocation_view.csrf_exempt = True  # type: ignore[attr-defined]
+invocation_events_view.csrf_exempt = True  # type: ignore[attr-defined]
+
+_FINAL_STATUS_NAMES = frozenset(
+    (InvocationStatus.SUCCESS.name, InvocationStatus.ERROR.name)
+)
+
+
+class _InvocationLoader:
+    """builds invocations for one authenticated request
+
+    loads each distinct addon and account only once, and checks permission only
+    once per distinct (addon, account, capability) -- even when used concurrently
+    """
+
+    def __init__(self, request: django_http.HttpRequest, user: UserReference):
+        self._request = request
+        self._user = user
+        self._memo: dict[tuple, asyncio.Future] = {}
+
+    @classmethod
+    async def for_request(cls, request: django_http.HttpRequest) -> typing.Self:
+        _user = await GVCombinedAuthentication().authenticate__async(request)
+        if _user is None:
+            raise drf_exceptions.NotAuthenticated
+        await rate_limiting.check_rate_limits__async(
+            request, [rate_limiting.INVOCATION_SCOPE]
+        )
+        return cls(request, _user)
+
+    async def create_invocation(
+        self, resource: dict, *, listing: bool = False
+    ) -> AddonOperationInvocation:
+        """build an invocation from a json:api resource, ready to perform"""
+        _invocation = await self.build_invocation(resource, listing=listing)
+        await _prepare_invocation__async(_invocation)
+        return _invocation
+
+    async def build_invocation(
+        self, resource: dict, *, listing: bool = False
+    ) -> AddonOperationInvocation:
+        """build an (unsaved) invocation from a json:api resource, checking permission"""
+        _attributes, _relationships = _parse_invocation_resource(resource)
+        _thru_addon = None
+        _thru_account = None
+        if "thru_addon" in _relationships:
+            _ref = _relationships["thru_addon"]
+            _thru_addon = await self._memoized(
+                ("thru_addon", _ref.get("id")), lambda: _get_thru_addon__async(_ref)
+            )
+        if "thru_account" in _relationships:
+            _ref = _relationships["thru_account"]
+            _thru_account = await self._memoized(
+                ("thru_account", _ref.get("id")),
+                lambda: _get_thru_account__async(_ref),
+            )
+        if _thru_addon is None and _thru_account is None:
+            raise drf_exceptions.ValidationError(
+                "must include either 'thru_addon' or 'thru_account'"
+            )
+        if _thru_account is None:
+            _thru_account = _thru_addon.base_account
+        elif (
+            _thru_addon is not None and _thru_addon.base_account_id == _thru_account.pk
+        ):
+            _thru_addon.base_account = _thru_account
+        _imp_cls = _thru_account.imp_cls
+        try:
+            _operation = _imp_cls.get_operation_declaration(
+                _attributes["operation_name"]
+            )
+        except (
+            toolkit_exceptions.NotAnOperation,
+            toolkit_exceptions.OperationNotImplemented,
+        ):
+            raise drf_exceptions.ValidationError(
+                {"operation_name": f"unknown operation for {_imp_cls.__name__}"}
+            )
+        if listing and not (
+            _operation.is_listing
+            and _operation.operation_type is AddonOperationType.IMMEDIATE
+        ):
+            raise drf_exceptions.ValidationError(
+                {
+                    "operation_name": "only immediate listing operations may be streamed or aggregated"
+                }
+            )
+        _invocation = AddonOperationInvocation(
+            operation=AddonOperationModel(_imp_cls.ADDON_INTERFACE, _operation),
+            operation_kwargs=_attributes.get("operation_kwargs", {}),
+            thru_addon=_thru_addon,
+            thru_account=_thru_account,
+            by_user=self._user,
+        )
+        _may_perform = await self._memoized(
+            (
+                "permission",
+                _invocation.thru_addon_id,
+                _thru_account.pk,
+                _operation.capability,
+            ),
+            lambda: SessionUserMayPerformInvocation().has_object_permission__async(
+                self._request, None, _invocation
+            ),
+        )
+        if not _may_perform:
+            raise drf_exceptions.PermissionDenied
+        await rate_limiting.check_rate_limits__async(
+            self._request, rate_limiting.invocation_rate_limit_scopes(_invocation)
+        )
+        return _invocation
+
+    async def prefetch_permissions(self, resources: list[dict]) -> None:
+        """resolve permission on the osf resources of all given invocations' addons at once
+
+        (see `osf.prefetch_osf_permissions__async`) -- any problem with a resource is
+        left for `build_invocation` to raise, for that invocation alone
+        """
+        _addon_refs = {}
+        for _resource in resources:
+            try:
+                _ref = _parse_invocation_resource(_resource)[1]["thru_addon"]
+                _addon_refs[("thru_addon", _ref.get("id"))] = _ref
+            except (drf_exceptions.APIException, KeyError, AttributeError):
+                continue
+        _addons = await asyncio.gather(
+            *(
+                self._memoized(_key, functools.partial(_get_thru_addon__async, _ref))
+                for _key, _ref in _addon_refs.items()
+            ),
+            return_exceptions=True,
+        )
+        await osf.prefetch_osf_permissions__async(
+            self._request,
+            {
+                _addon.authorized_resource.resource_uri
+                for _addon in _addons
+                if isinstance(_addon, ConfiguredAddon)
+                and _addon.owner_uri != self._user.user_uri  # (owners need not ask)
+            },
+        )
+
+    def _memoized(
+        self, key: tuple, make_awaitable: typing.Callable[[], typing.Awaitable]
+    ) -> asyncio.Future:
+        try:
+            return self._memo[key]
+        except KeyError:
+            _future = self._memo[key] = asyncio.ensure_future(make_awaitable())
+            return _future
+
+
+async def _prepare_invocation__async(invocation: AddonOperationInvocation) -> None:
+    if invocation.is_ephemeral:
+        invocation.clean_ephemeral()  # recorded after performing
+    else:
+        await invocation.asave()
+
+
+async def _dispatch_invocation__async(
+    invocation: AddonOperationInvocation,
+) -> HTTPStatus:
+    """perform (or schedule) the invocation; return the http status to respond with"""
+    _operation_type = invocation.operation.operation_type
+    match _operation_type:
+        case AddonOperationType.REDIRECT:
+            await perform_invocation__async(invocation)
+        case AddonOperationType.IMMEDIATE:
+            return await _perform_immediate__async(invocation)
+        case AddonOperationType.EVENTUAL:
+            await sync_to_async(schedule_invocation)(invocation)
+        case _:
+            raise ValueError(f"unknown operation type: {_operation_type}")
+    return HTTPStatus.CREATED
+
+
+async def _perform_immediate__async(
+    invocation: AddonOperationInvocation,
+) -> HTTPStatus:
+    """perform an immediate invocation -- unless it is (or turns out to be) slow
+
+    if its operation has recently been slow (see `invocation_latency`), schedule it
+    like an eventual invocation instead; if it is still going after the soft deadline,
+    leave it going in the background (without starting over) -- either way, respond
+    `202 Accepted` with the invocation to poll
+
+    (one left going by a process that stops is failed later; see `fail_stale_invocations`)
+    """
+    if not invocation_latency.is_promotable(invocation):
+        await perform_invocation__async(invocation)
+        return HTTPStatus.CREATED
+    if await invocation_latency.expects_slow__async(invocation):
+        if invocation._state.adding:  # ephemeral, not yet saved
+            await invocation.asave()
+        await sync_to_async(schedule_invocation)(invocation)
+        return HTTPStatus.ACCEPTED
+    _performing = asyncio.ensure_future(perform_invocation__async(invocation))
+    try:
+        await asyncio.wait(
+            (_performing,),
+            timeout=settings.INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS,
+        )
+    except asyncio.CancelledError:
+        _performing.cancel()
+        raise
+    if _performing.done():
+        _performing.result()  # (raise any exception)
+        return HTTPStatus.CREATED
+    # past the soft deadline -- respond now, saving the invocation (as going) first
+    # so it can be polled, then saving again when done (see `perform_invocation__async`)
+    invocation.invocation_status = InvocationStatus.GOING
+    _adding = invocation._state.adding
+    if _adding:  # ephemeral, not yet saved
+        invocation.created = timezone.now()
+        invocation._state.adding = False  # (so its eventual save is an update)
+    await invocation.asave(force_insert=_adding)
+    _finishing = asyncio.ensure_future(_finish_in_background(invocation, _performing))
+    _finishing_in_background.add(_finishing)  # (hold a reference until done)
+    _finishing.add_done_callback(_finishing_in_background.discard)
+    return HTTPStatus.ACCEPTED
+
+
+async def _finish_in_background(
+    invocation: AddonOperationInvocation, performing: asyncio.Future
+) -> None:
+    try:
+        await performing
+    except Exception:
+        pass  # problem recorded on the invocation
+    finally:
+        # (immediate invocations do not publish status on save)
+        await sync_to_async(invocation.publish_status, thread_sensitive=False)()
+
+
+_finishing_in_background: set[asyncio.Future] = set()
+
+
+def _parse_request_document(request_body: bytes, *, many: bool) -> typing.Any:
+    """get the primary data from a json:api request document"""
+    try:
+        _data = json.loads(request_body)["data"]
+    except (ValueError, KeyError, TypeError):
+        raise drf_exceptions.ParseError
+    if many:
+        if not isinstance(_data, list):
+            raise drf_exceptions.ParseError("expected a list as primary data")
+        if len(_data) > settings.INVOCATION_BATCH_MAX_SIZE:
+            raise drf_exceptions.ValidationError(
+                f"at most {settings.INVOCATION_BATCH_MAX_SIZE} invocations per batch"
+            )
+    elif not isinstance(_data, dict):
+        raise drf_exceptions.ParseError("expected a single resource as primary data")
+    return _data
+
+
+def _parse_invocation_resource(resource: dict) -> tuple[dict, dict]:
+    """get (attributes, relationship refs) from a json:api invocation resource object"""
+    try:
+        if resource["type"] != RESOURCE_TYPE:
+            raise drf_exceptions.ValidationError(
+                {"type": f"expected type '{RESOURCE_TYPE}'"}
+            )
+        _attributes = resource["attributes"]
+        _relationships = {
+            _name: _relationship["data"]
+            for _name, _relationship in resource.get("relationships", {}).items()
+            if _relationship.get("data")
+        }
+        _attributes["operation_name"]  # required
+    except (KeyError, TypeError, AttributeError):
+        raise drf_exceptions.ParseError
+    return _attributes, _relationships
+
+
+def _addon_type_from_resource_type(resource_type: str) -> str:
+    # e.g. "configured-storage-addons" or "authorized-storage-accounts" => "storage"
+    _addon_type = resource_type.split("-")[1]
+    if _addon_type.upper() not in AllAddonInterfaces.__members__:
+        raise drf_exceptions.ValidationError(f"unknown resource type '{resource_type}'")
+    return _addon_type
+
+
+def _account_selects(addon_type: str) -> list[str]:
+    # related objects needed for permissions and imp instantiation
+    return [
+        "account_owner",
+        "_credentials",
+        f"authorized{addon_type}account",
+        f"external_service__external{addon_type}service",
+    ]
+
+
+async def _get_thru_addon__async(addon_ref: dict) -> ConfiguredAddon:
+    _addon_type = _addon_type_from_resource_type(addon_ref["type"])
+    try:
+        return await (
+            ConfiguredAddon.objects.active()
+            .select_related(
+                "authorized_resource",
+                f"configured{_addon_type}addon",
+                *(
+                    f"base_account__{_select}"
+                    for _select in _account_selects(_addon_type)
+                ),
+            )
+            .aget(pk=addon_ref["id"])
+        )
+    except (ObjectDoesNotExist, DjangoValidationError, ValueError):
+        raise drf_exceptions.ValidationError({"thru_addon": "not found"})
+
+
+async def _get_thru_account__async(account_ref: dict) -> AuthorizedAccount:
+    _addon_type = _addon_type_from_resource_type(account_ref["type"])
+    try:
+        return await (
+            AuthorizedAccount.objects.active()
+            .select_related(*_account_selects(_addon_type))
+            .aget(pk=account_ref["id"])
+        )
+    except (ObjectDoesNotExist, DjangoValidationError, ValueError):
+        raise drf_exceptions.ValidationError({"thru_account": "not found"})
+
+
+async def _ndjson_lines(
+    invocation: AddonOperationInvocation,
+) -> typing.AsyncIterator[str]:
+    try:
+        async for _item_json in stream_invocation__async(invocation):
+            yield json.dumps(_item_json) + "\n"
+    except Exception as _e:
+        # too late for an error status; end with an error document
+        yield json.dumps({"errors": _error_objects(_e)}) + "\n"
+
+
+async def _server_sent_events(
+    invocation: AddonOperationInvocation,
+) -> typing.AsyncIterator[str]:
+    # (subscribe where the events are iterated, in case that is another event loop)
+    _subscription = await InvocationEventSubscription.open(invocation.pk)
+    _give_up_at = time.monotonic() + settings.INVOCATION_EVENTS_MAX_SECONDS
+    try:
+        # current status, as of after subscribing (lest changes be missed in between)
+        await invocation.arefresh_from_db(fields=["int_invocation_status", "modified"])
+        _event: tuple[str, dict] | None = ("status", invocation.status_event_data())
+        while True:
+            if _event is None:
+                yield ": keepalive\n\n"  # (a comment, to keep idle connections open)
+            else:
+                _event_type, _data = _event
+                yield f"event: {_event_type}\ndata: {json.dumps(_data)}\n\n"
+                if (
+                    _event_type == "status"
+                    and _data["invocation_status"] in _FINAL_STATUS_NAMES
+                ):
+                    return
+            _remaining = _give_up_at - time.monotonic()
+            if _remaining <= 0:
+                return
+            _event = await _subscription.next_event(
+                timeout=min(_remaining, settings.INVOCATION_EVENTS_KEEPALIVE_SECONDS)
+            )
+    finally:
+        await _subscription.close()
+
+
+async def _get_invocation__async(pk: str) -> AddonOperationInvocation:
+    try:
+        return await AddonOperationInvocation.objects.select_related(
+            "by_user",
+            "thru_account__account_owner",
+            "thru_addon__authorized_resource",
+        ).aget(pk=pk)
+    except (ObjectDoesNotExist, DjangoValidationError, ValueError):
+        raise drf_exceptions.NotFound
+
+
+def _batch_errors(index: int, exception: Exception) -> list[dict]:
+    """json:api error objects for a batch item that could not be invoked"""
+    return [
+        {**_error, "source": {"pointer": f"/data/{index}"}}
+        for _error in _error_objects(exception)
+    ]
+
+
+def _error_objects(exception: Exception) -> list[dict]:
+    """json:api error objects for an exception (with details only for api exceptions)"""
+    if isinstance(exception, DjangoValidationError):
+        exception = drf_exceptions.ValidationError(
+            detail=jsonapi_serializers.as_serializer_error(exception)
+        )
+    elif not isinstance(exception, drf_exceptions.APIException):
+        exception = drf_exceptions.APIException()  # (no details on unexpected errors)
+    return [
+        {
+            "status": str(exception.status_code),
+            "code": _detail.code,
+            "detail": str(_detail),
+        }
+        for _detail in _flat_error_details(exception.detail)
+    ]
+
+
+def _flat_error_details(detail) -> typing.Iterator[drf_exceptions.ErrorDetail]:
+    if isinstance(detail, dict):
+        for _value in detail.values():
+            yield from _flat_error_details(_value)
+    elif isinstance(detail, list):
+        for _value in detail:
+            yield from _flat_error_details(_value)
+    else:
+        yield detail
+
+
+@sync_to_async
+def _invocation_response__async(
+    request: django_http.HttpRequest,
+    *,
+    invocation: AddonOperationInvocation | None = None,
+    invocations: list[AddonOperationInvocation] | None = None,
+    meta: dict | None = None,
+    status: HTTPStatus = HTTPStatus.OK,
+    exception: Exception | None = None,
+) -> Response:
+    """render a json:api response the same way `AddonOperationInvocationViewSet` would
+
+    (serializing and rendering are sync; do them together in one hop)
+    """
+    _view = AddonOperationInvocationViewSet(
+        action_map={"post": "create"},
+        args=(),
+        kwargs={},
+        format_kwarg=None,
+        headers={},
+    )
+    _drf_request = _view.initialize_request(request)
+    _view.request = _drf_request
+    (
+        _drf_request.accepted_renderer,
+        _drf_request.accepted_media_type,
+    ) = _view.perform_content_negotiation(_drf_request)
+    if exception is not None:
+        # inner transaction to contain rest_framework's `set_rollback` on error,
+        # (this view is not in a request transaction, but may be in some other)
+        with transaction.atomic():
+            _response = _view.handle_exception(exception)
+    elif invocations is not None:
+        _response = Response(
+            {
+                "results": _view.get_serializer(invocations, many=True).data,
+                "meta": meta or {},
+            },
+            status=status,
+        )
+    else:
+        _response = Response(_view.get_serializer(invocation).data, status=status)
+    _view.response = _view.finalize_response(_drf_request, _response)
+    return _view.response.render()
@@ -7,3 +7,9 @@ class AddonServiceConfig(AppConfig):
     def ready(self):
         # need to import openapi extensions here for them to be registered
         import addon_service.common.openapi_extensions  # noqa: F401
+
+        # build each operation's kwargs validator once, up front
+        from addon_service.addon_operation.models import AddonOperationModel
+
+        for _operation in AddonOperationModel.iter_all():
+            _operation.kwargs_validator
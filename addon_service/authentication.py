@@ -1,3 +1,4 @@
+from django import http as django_http
 from rest_framework import authentication as drf_authentication
 from rest_framework.request import Request as DrfRequest
 
@@ -11,11 +12,25 @@ class GVCombinedAuthentication(drf_authentication.BaseAuthentication):
     def authenticate(self, request: DrfRequest):
         _user_uri = osf.get_osf_user_uri(request)
         if _user_uri:
-            UserReference.objects.get_or_create(user_uri=_user_uri)
+            UserReference.objects.for_user_uri(_user_uri)
             request.user_uri = _user_uri
             return True, None
         return None  # unauthenticated
 
+    async def authenticate__async(
+        self, request: django_http.HttpRequest
+    ) -> UserReference | None:
+        """same as `authenticate`, for use in async (non-rest_framework) views
+
+        returns the authenticated user's `UserReference`, or None if unauthenticated
+        """
+        _user_uri = await osf.get_osf_user_uri__async(request)
+        if not _user_uri:
+            return None  # unauthenticated
+        _user = await UserReference.objects.for_user_uri__async(_user_uri)
+        request.user_uri = _user_uri
+        return _user
+
     def authenticate_header(self, request):
         """Specify the value for the WWW-Authenticate header in a 401 response.
 
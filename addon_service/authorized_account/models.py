@@ -12,6 +12,7 @@ from django.utils import timezone
 from addon_service.addon_imp.instantiation import get_addon_instance
 from addon_service.addon_operation.models import AddonOperationModel
 from addon_service.authorized_account.utils import get_config_for_account
+from addon_service.common import invocation_result_cache
 from addon_service.common.base_model import AddonsServiceBaseModel
 from addon_service.common.credentials_formats import CredentialsFormats
 from addon_service.common.service_types import ServiceTypes
@@ -111,6 +112,15 @@ class AuthorizedAccount(AddonsServiceBaseModel):
             self._temporary_oauth1_credentials.delete()
             self._temporary_oauth1_credentials = None
         self._set_credentials("_credentials", credentials_data)
+        if not self._state.adding:
+            invocation_result_cache.invalidate_account_results_on_commit(self.pk)
+
+    def set_refreshed_credentials(self, credentials_data: Credentials) -> None:
+        """replace credentials with refreshed ones granting the same access
+
+        (unlike setting `credentials`, keeps cached operation results)
+        """
+        self._set_credentials("_credentials", credentials_data)
 
     @property
     def temporary_oauth1_credentials(self) -> OAuth1Credentials | None:
@@ -156,7 +166,10 @@ class AuthorizedAccount(AddonsServiceBaseModel):
     @authorized_capabilities.setter
     def authorized_capabilities(self, new_capabilities: AddonCapabilities):
         """set int_authorized_capabilities without caring its int"""
+        _changed = self.int_authorized_capabilities != new_capabilities.value
         self.int_authorized_capabilities = new_capabilities.value
+        if _changed and not self._state.adding:
+            invocation_result_cache.invalidate_account_results_on_commit(self.pk)
 
     @property
     def owner_uri(self) -> str:
@@ -267,6 +280,7 @@ class AuthorizedAccount(AddonsServiceBaseModel):
         # reset credentials
         self._credentials = None
         self.save()
+        invocation_result_cache.invalidate_account_results_on_commit(self.pk)
 
     def clean(self):
         super().clean()
@@ -10,5 +10,9 @@ class ItemNotFound(AddonServiceException):
     pass
 
 
+class ItemAccessDenied(AddonServiceException):
+    pass
+
+
 class UnexpectedAddonError(AddonServiceException):
     pass
@@ -1,7 +1,7 @@
 import base64
-import functools
 import hashlib
 import hmac
+import logging
 import re
 import urllib.parse
 from datetime import (
@@ -10,16 +10,24 @@ from datetime import (
     timedelta,
 )
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http import HttpRequest
+from redis.exceptions import RedisError
+
+from addon_service.common.redis_client import get_redis_client
 
 
 __all__ = (
     "make_signed_headers",
     "get_signed_headers",
+    "get_signed_headers__async",
     "validate_signed_request",
     "TIMESTAMP_HEADER",
 )
 
+_logger = logging.getLogger(__name__)
+
 # this is but one way to hmac-sign an http request -- aligns with how osf sends them:
 # https://github.com/CenterForOpenScience/osf.io/blob/develop/osf/external/gravy_valet/auth_helpers.py
 
@@ -58,38 +66,44 @@ def make_signed_headers(
     )
 
 
-@functools.lru_cache
 def get_signed_headers(
     request: HttpRequest, hmac_key: str, expiration_seconds: int | None = None
 ) -> dict[str, str]:
-    _authorization = request.headers.get("Authorization", "")
-    if not _authorization.startswith(_AUTH_HEADER_SCHEME):
-        raise NotUsingHmac
-    match = _AUTH_HEADER_REGEX.match(_authorization)
-    if not match:
-        raise UnsupportedHmacAuthorization(
-            "Message was not authorized via valid HMAC-SHA256 signed headers"
-        )
-    expected_signature = match.group("signature")
-    signed_header_names = match.group("headers").split(";")
-    signed_headers = {
-        _header_name: str(request.headers[_header_name])
-        for _header_name in signed_header_names
-    }
-    computed_signature = _sign_message(
-        message=_reconstruct_string_to_sign_from_request(
-            request, signed_headers=signed_headers
-        ),
-        hmac_key=hmac_key,
+    """get the request's signed headers, once verified
+
+    raises `NotUsingHmac` or `RejectedHmac` if not verified -- verifies at most once
+    per request (for a given key and expiration), and (if `OSF_HMAC_REJECT_REPLAYS`)
+    rejects a signature already accepted for another request
+    """
+    _memo = _request_memo(request)
+    _memo_key = (hmac_key, expiration_seconds)
+    try:
+        _outcome = _memo[_memo_key]
+    except KeyError:
+        try:
+            _outcome = _verify_signed_headers(request, hmac_key, expiration_seconds)
+        except (NotUsingHmac, RejectedHmac) as _e:
+            _outcome = _e
+        _memo[_memo_key] = _outcome
+    if isinstance(_outcome, Exception):
+        raise _outcome
+    return _outcome
+
+
+async def get_signed_headers__async(
+    request: HttpRequest, hmac_key: str, expiration_seconds: int | None = None
+) -> dict[str, str]:
+    """(same as `get_signed_headers`, for use in async context)"""
+    if (
+        ((hmac_key, expiration_seconds) in _request_memo(request))
+        or not _is_hmac_authorization(request)
+        or not _may_check_replay(expiration_seconds)
+    ):
+        # (skip the thread)
+        return get_signed_headers(request, hmac_key, expiration_seconds)
+    return await sync_to_async(get_signed_headers, thread_sensitive=False)(
+        request, hmac_key, expiration_seconds
     )
-    if not hmac.compare_digest(computed_signature, expected_signature):
-        raise IncorrectHmacSignature("HMAC Signed Request has incorrect signature!")
-    if expiration_seconds is not None:
-        _validate_timestamp(signed_headers.get(TIMESTAMP_HEADER), expiration_seconds)
-    content_hash = signed_headers.get(CONTENT_HASH_HEADER)
-    if content_hash:
-        _validate_content_hash(content_hash, request.body)
-    return signed_headers
 
 
 def validate_signed_request(
@@ -133,9 +147,86 @@ class IncorrectHmacContentHash(RejectedHmac):
     pass
 
 
+class ReplayedHmacSignature(RejectedHmac):
+    pass
+
+
 ###
 # private helpers
 
+_SEEN_SIGNATURE_KEY_PREFIX = "gv:hmac-seen"
+
+
+def _request_memo(request: HttpRequest) -> dict:
+    # verification outcomes, by (hmac_key, expiration_seconds) -- kept on the django
+    # request, so shared with any rest_framework request wrapping it
+    _http_request = getattr(request, "_request", request)
+    try:
+        return _http_request._hmac_memo
+    except AttributeError:
+        _http_request._hmac_memo = {}
+        return _http_request._hmac_memo
+
+
+def _is_hmac_authorization(request: HttpRequest) -> bool:
+    return request.headers.get("Authorization", "").startswith(_AUTH_HEADER_SCHEME)
+
+
+def _verify_signed_headers(
+    request: HttpRequest, hmac_key: str, expiration_seconds: int | None
+) -> dict[str, str]:
+    if not _is_hmac_authorization(request):
+        raise NotUsingHmac
+    match = _AUTH_HEADER_REGEX.match(request.headers["Authorization"])
+    if not match:
+        raise UnsupportedHmacAuthorization(
+            "Message was not authorized via valid HMAC-SHA256 signed headers"
+        )
+    expected_signature = match.group("signature")
+    signed_header_names = match.group("headers").split(";")
+    signed_headers = {
+        _header_name: str(request.headers[_header_name])
+        for _header_name in signed_header_names
+    }
+    computed_signature = _sign_message(
+        message=_reconstruct_string_to_sign_from_request(
+            request, signed_headers=signed_headers
+        ),
+        hmac_key=hmac_key,
+    )
+    if not hmac.compare_digest(computed_signature, expected_signature):
+        raise IncorrectHmacSignature("HMAC Signed Request has incorrect signature!")
+    if expiration_seconds is not None:
+        _validate_timestamp(signed_headers.get(TIMESTAMP_HEADER), expiration_seconds)
+    content_hash = signed_headers.get(CONTENT_HASH_HEADER)
+    if content_hash:
+        _validate_content_hash(content_hash, request.body)
+    if _may_check_replay(expiration_seconds):
+        _validate_first_use(expected_signature, expiration_seconds)
+    return signed_headers
+
+
+def _may_check_replay(expiration_seconds: int | None) -> bool:
+    # (only signatures that expire -- no need to remember them longer)
+    return bool(settings.OSF_HMAC_REJECT_REPLAYS and expiration_seconds)
+
+
+def _validate_first_use(signature: str, expiration_seconds: int) -> None:
+    # remember the (verified, unexpired) signature until it expires, unless already seen
+    try:
+        _is_first_use = get_redis_client().set(
+            f"{_SEEN_SIGNATURE_KEY_PREFIX}:{signature}",
+            1,
+            nx=True,
+            ex=expiration_seconds,
+        )
+    except RedisError:
+        # (the signature is otherwise valid; better a possible replay than no auth)
+        _logger.warning("could not check for a replayed hmac signature", exc_info=True)
+        return
+    if not _is_first_use:
+        raise ReplayedHmacSignature("HMAC Signed Request was already received")
+
 
 def _reconstruct_string_to_sign_from_request(
     request: HttpRequest, signed_headers: dict[str, str]
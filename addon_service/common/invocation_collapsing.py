@@ -0,0 +1,297 @@
+"""collapsing duplicate invocations, so repeats (double clicks, retries) are not performed again
+
+an invocation is a duplicate of an earlier one by the same user if created with the
+same `Idempotency-Key` header within `INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS`, or
+(without that header) the same in account, addon, operation and kwargs within
+`INVOCATION_COLLAPSE_WINDOW_SECONDS` -- a duplicate is neither saved nor performed,
+but gets the earlier invocation to respond with:
+
+- if finished successfully, with the outcome kept in redis (so even an ephemeral
+  invocation, saved later or not at all, may be shared) -- unless its result is
+  longer than `INVOCATION_RESULT_INLINE_MAX_LENGTH` (as json), in which case only
+  a saved invocation is shared, as loaded from the database
+- if saved and still going (e.g. scheduled), as loaded from the database
+- if still being performed, once it is -- after `INVOCATION_COLLAPSE_WAIT_SECONDS`,
+  the duplicate is performed after all (as it is right away, where waiting would
+  hold a transaction open)
+
+an invocation that fails gives up its claim, so a retry is performed again
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import datetime
+import functools
+import hashlib
+import json
+import time
+import typing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from rest_framework import exceptions
+
+from addon_service.common.invocation_status import InvocationStatus
+from addon_service.common.redis_client import get_redis_client
+
+
+if typing.TYPE_CHECKING:
+    from addon_service.addon_operation_invocation.models import AddonOperationInvocation
+
+
+__all__ = (
+    "IDEMPOTENCY_KEY_HEADER",
+    "InvocationClaim",
+    "claim_invocation",
+    "claim_invocation__async",
+)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+_KEY_PREFIX = "gv:invocation-collapse"
+_WAIT_INTERVAL = 0.05  # seconds between looks at an earlier invocation still performing
+
+# what an earlier invocation's claim says about it
+_PERFORMING = "performing"
+_SAVED = "saved"  # and still going -- load it from the database
+_FINISHED = "finished"  # with its outcome in the claim
+
+
+@dataclasses.dataclass(frozen=True)
+class InvocationClaim:
+    """an invocation's claim on its collapse key -- or, for a duplicate, the earlier one's"""
+
+    collapse_key: str
+    fingerprint: str  # (see `_invocation_fingerprint`)
+    invocation_pk: str  # the invocation that holds the claim
+    earlier_entry: dict | None = None  # the earlier claim (if a duplicate)
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.earlier_entry is not None
+
+    def earlier_invocation(
+        self, invocation: AddonOperationInvocation, *, wait: bool = True
+    ) -> AddonOperationInvocation | None:
+        """get the earlier invocation to respond with instead (None to perform after all)
+
+        may wait for the earlier invocation to finish (unless not `wait`);
+        expects a duplicate claim
+        """
+        _entry = self.earlier_entry
+        if not wait and _is_performing(_entry):
+            return None
+        _give_up_at = time.monotonic() + settings.INVOCATION_COLLAPSE_WAIT_SECONDS
+        while _is_performing(_entry) and (time.monotonic() < _give_up_at):
+            time.sleep(_WAIT_INTERVAL)
+            _entry = _get_entry(self.collapse_key)
+        if (_entry is None) or _is_performing(_entry):
+            return None  # (gave up its claim, or taking too long)
+        if _entry["state"] == _SAVED:
+            return _with_relations_of(
+                invocation,
+                type(invocation).objects.filter(pk=_entry["pk"]).first(),
+            )
+        return _with_outcome(invocation, _entry)
+
+    async def earlier_invocation__async(
+        self, invocation: AddonOperationInvocation
+    ) -> AddonOperationInvocation | None:
+        """(same as `earlier_invocation`, for use in async context)"""
+        _entry = self.earlier_entry
+        _give_up_at = time.monotonic() + settings.INVOCATION_COLLAPSE_WAIT_SECONDS
+        while _is_performing(_entry) and (time.monotonic() < _give_up_at):
+            await asyncio.sleep(_WAIT_INTERVAL)
+            _entry = await sync_to_async(_get_entry, thread_sensitive=False)(
+                self.collapse_key
+            )
+        if (_entry is None) or _is_performing(_entry):
+            return None  # (gave up its claim, or taking too long)
+        if _entry["state"] == _SAVED:
+            return _with_relations_of(
+                invocation,
+                await type(invocation).objects.filter(pk=_entry["pk"]).afirst(),
+            )
+        return _with_outcome(invocation, _entry)
+
+    def settle(self, invocation: AddonOperationInvocation) -> None:
+        """update the claim after performing (or scheduling) the invocation
+
+        keeps a successful outcome for duplicates to share; gives up the claim on error
+        (a saved invocation is shared only once its transaction commits, if in one)
+        """
+        match invocation.invocation_status:
+            case InvocationStatus.SUCCESS if _result_fits(invocation):
+                _entry = {
+                    **self._entry(_FINISHED),
+                    "outcome": {
+                        "invocation_status": invocation.invocation_status.name,
+                        "operation_result": invocation.operation_result,
+                        "result_from_cache": invocation.result_from_cache,
+                        "created": _isoformat(invocation.created),
+                        "modified": _isoformat(invocation.modified),
+                        "saved": not invocation._state.adding,
+                    },
+                }
+            case InvocationStatus.ERROR:
+                _entry = None
+            case _:  # still going (or a large result, to load from the database)
+                _entry = None if invocation._state.adding else self._entry(_SAVED)
+        if _entry is None:
+            self.give_up()
+        elif invocation._state.adding:
+            self._keep(_entry)  # (not saved, so nothing to commit)
+        else:
+            transaction.on_commit(functools.partial(self._keep, _entry))
+
+    async def settle__async(self, invocation: AddonOperationInvocation) -> None:
+        """(same as `settle`, for use in async context)"""
+        await sync_to_async(self.settle, thread_sensitive=False)(invocation)
+
+    def give_up(self) -> None:
+        """give up the claim (if still held), so a duplicate is performed again"""
+        if _pk_of(_get_entry(self.collapse_key)) == self.invocation_pk:
+            get_redis_client().delete(self.collapse_key)
+
+    def _keep(self, entry: dict) -> None:
+        # (unless the claim expired meanwhile)
+        get_redis_client().set(
+            self.collapse_key, json.dumps(entry), xx=True, keepttl=True
+        )
+
+    def _entry(self, state: str) -> dict:
+        return {
+            "pk": self.invocation_pk,
+            "fingerprint": self.fingerprint,
+            "state": state,
+        }
+
+
+def claim_invocation(
+    invocation: AddonOperationInvocation, idempotency_key: str | None = None
+) -> InvocationClaim | None:
+    """claim the (unsaved, not yet performed) invocation's collapse key, unless already claimed
+
+    returns None if the invocation may not be collapsed (no idempotency key, and
+    `INVOCATION_COLLAPSE_WINDOW_SECONDS` is 0); raises `ValidationError` if the
+    idempotency key was used for a different invocation
+    """
+    _fingerprint = _invocation_fingerprint(invocation)
+    if idempotency_key:
+        _idempotency_digest = hashlib.sha256(idempotency_key.encode()).hexdigest()
+        _collapse_key = (
+            f"{_KEY_PREFIX}:idempotency:{invocation.by_user_id}:{_idempotency_digest}"
+        )
+        _ttl = settings.INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS
+    elif settings.INVOCATION_COLLAPSE_WINDOW_SECONDS:
+        _collapse_key = f"{_KEY_PREFIX}:same:{invocation.by_user_id}:{_fingerprint}"
+        _ttl = settings.INVOCATION_COLLAPSE_WINDOW_SECONDS
+    else:
+        return None
+    _client = get_redis_client()
+    _entry = {"pk": invocation.pk, "fingerprint": _fingerprint, "state": _PERFORMING}
+    while not _client.set(_collapse_key, json.dumps(_entry), nx=True, ex=_ttl):
+        _earlier_entry = _get_entry(_collapse_key)
+        if _earlier_entry is None:
+            continue  # given up (or expired) meanwhile; try again
+        if _earlier_entry["fingerprint"] != _fingerprint:
+            raise exceptions.ValidationError(
+                {
+                    IDEMPOTENCY_KEY_HEADER: "already used for a different invocation",
+                }
+            )
+        return InvocationClaim(
+            _collapse_key, _fingerprint, _earlier_entry["pk"], _earlier_entry
+        )
+    return InvocationClaim(_collapse_key, _fingerprint, invocation.pk)
+
+
+async def claim_invocation__async(
+    invocation: AddonOperationInvocation, idempotency_key: str | None = None
+) -> InvocationClaim | None:
+    """(same as `claim_invocation`, for use in async context)"""
+    if not (idempotency_key or settings.INVOCATION_COLLAPSE_WINDOW_SECONDS):
+        return None  # (skip the thread)
+    return await sync_to_async(claim_invocation, thread_sensitive=False)(
+        invocation, idempotency_key
+    )
+
+
+###
+# module-private helpers
+
+
+def _invocation_fingerprint(invocation: AddonOperationInvocation) -> str:
+    return hashlib.sha256(
+        json.dumps(
+            [
+                invocation.operation_identifier,
+                invocation.thru_account_id,
+                invocation.thru_addon_id,
+                invocation.operation_kwargs,
+            ],
+            sort_keys=True,
+            separators=(",", ":"),
+        ).encode()
+    ).hexdigest()
+
+
+def _get_entry(collapse_key: str) -> dict | None:
+    _entry_json = get_redis_client().get(collapse_key)
+    return None if _entry_json is None else json.loads(_entry_json)
+
+
+def _pk_of(entry: dict | None) -> str | None:
+    return None if entry is None else entry["pk"]
+
+
+def _is_performing(entry: dict | None) -> bool:
+    return entry is not None and entry["state"] == _PERFORMING
+
+
+def _result_fits(invocation: AddonOperationInvocation) -> bool:
+    # whether the result is small enough to keep in redis
+    return (invocation.operation_result_payload_id is None) and (
+        len(json.dumps(invocation.operation_result))
+        <= settings.INVOCATION_RESULT_INLINE_MAX_LENGTH
+    )
+
+
+def _with_relations_of(
+    invocation: AddonOperationInvocation,
+    earlier: AddonOperationInvocation | None,
+) -> AddonOperationInvocation | None:
+    # same user, account and addon (already loaded) as the duplicate
+    if earlier is not None:
+        earlier.by_user = invocation.by_user
+        earlier.thru_account = invocation.thru_account
+        earlier.thru_addon = invocation.thru_addon
+    return earlier
+
+
+def _with_outcome(
+    invocation: AddonOperationInvocation, entry: dict
+) -> AddonOperationInvocation:
+    # the duplicate, made to look like the earlier (finished) invocation
+    _outcome = entry["outcome"]
+    invocation.pk = entry["pk"]
+    invocation.invocation_status = InvocationStatus[_outcome["invocation_status"]]
+    invocation.operation_result = _outcome["operation_result"]
+    invocation.result_from_cache = _outcome["result_from_cache"]
+    invocation.created = _from_isoformat(_outcome["created"])
+    invocation.modified = _from_isoformat(_outcome["modified"])
+    invocation._state.adding = False  # (not to be saved as new)
+    if not _outcome["saved"]:
+        invocation._state.db = None  # (nor in the database, perhaps ever)
+    return invocation
+
+
+def _isoformat(when: datetime.datetime | None) -> str | None:
+    return None if when is None else when.isoformat()
+
+
+def _from_isoformat(when: str | None) -> datetime.datetime | None:
+    return None if when is None else datetime.datetime.fromisoformat(when)
@@ -0,0 +1,72 @@
+"""live events for invocations (status transitions and progress), over redis pub/sub
+
+published by `AddonOperationInvocation` (for eventual operations only) and relayed to
+clients as server-sent events, so they need not poll for an invocation's outcome
+"""
+
+import json
+import time
+import typing
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from addon_service.common.redis_client import get_redis_client
+
+
+__all__ = (
+    "InvocationEventSubscription",
+    "publish_invocation_event",
+)
+
+_CHANNEL_PREFIX = "gv:invocation-events"
+
+
+def publish_invocation_event(invocation_pk: str, event_type: str, data: dict) -> None:
+    """send an event to any current subscribers for the invocation (or to nobody)"""
+    get_redis_client().publish(
+        _channel_name(invocation_pk),
+        json.dumps({"event": event_type, "data": data}),
+    )
+
+
+class InvocationEventSubscription:
+    """receives events for one invocation, from when opened until closed"""
+
+    def __init__(
+        self, client: redis.asyncio.Redis, pubsub: redis.asyncio.client.PubSub
+    ):
+        self._client = client
+        self._pubsub = pubsub
+
+    @classmethod
+    async def open(cls, invocation_pk: str) -> typing.Self:
+        _client = redis.asyncio.Redis.from_url(settings.REDIS_HOST)
+        _pubsub = _client.pubsub()
+        await _pubsub.subscribe(_channel_name(invocation_pk))
+        return cls(_client, _pubsub)
+
+    async def next_event(self, timeout: float) -> tuple[str, dict] | None:
+        """wait up to `timeout` seconds for the next (event type, data), or None"""
+        _give_up_at = time.monotonic() + timeout
+        while (_remaining := _give_up_at - time.monotonic()) > 0:
+            _message = await self._pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=_remaining
+            )
+            if _message is not None:
+                _event = json.loads(_message["data"])
+                return _event["event"], _event["data"]
+        return None
+
+    async def close(self) -> None:
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+
+###
+# module-private helpers
+
+
+def _channel_name(invocation_pk: str) -> str:
+    return f"{_CHANNEL_PREFIX}:{invocation_pk}"
@@ -0,0 +1,132 @@
+"""recent latencies of immediate operations, for deciding which to perform in the background
+
+how long each immediate invocation took to perform (unless its result came from the
+result cache) is kept in redis, for the same operation thru the same external service
+and for the same operation thru the same account -- the latest `_SAMPLES_PER_SCOPE` of
+each, forgotten `_SAMPLES_TTL` seconds after the last
+
+an invocation `expects_slow` once the median of either of those (with at least
+`INVOCATION_PROMOTION_MIN_SAMPLES`) passes `INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS`
+-- such invocations are scheduled like eventual ones, instead of performed while a
+client waits (see `_perform_immediate__async`, in the async invocation views)
+
+invocations performed that way are still timed, so an operation that speeds up again
+stops being promoted
+"""
+
+from __future__ import annotations
+
+import contextlib
+import statistics
+import time
+import typing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from addon_service.common.redis_client import get_redis_client
+from addon_toolkit import AddonOperationType
+
+
+if typing.TYPE_CHECKING:
+    from addon_service.addon_operation_invocation.models import AddonOperationInvocation
+
+
+__all__ = (
+    "expects_slow",
+    "expects_slow__async",
+    "is_promotable",
+    "record_latency",
+    "timing",
+    "timing__async",
+)
+
+_KEY_PREFIX = "gv:invocation-latency"
+_SAMPLES_PER_SCOPE = 20
+_SAMPLES_TTL = 3600  # seconds
+
+
+def is_promotable(invocation: AddonOperationInvocation) -> bool:
+    """whether the invocation may be performed in the background, if slow"""
+    return bool(settings.INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS) and (
+        invocation.operation.operation_type is AddonOperationType.IMMEDIATE
+    )
+
+
+def expects_slow(invocation: AddonOperationInvocation) -> bool:
+    """whether the invocation's operation has recently been slow (for its service or account)"""
+    if not is_promotable(invocation):
+        return False
+    with get_redis_client().pipeline() as _pipeline:
+        for _key in _latency_keys(invocation):
+            _pipeline.lrange(_key, 0, -1)
+        _samples_by_scope = _pipeline.execute()
+    return any(
+        (len(_samples) >= settings.INVOCATION_PROMOTION_MIN_SAMPLES)
+        and (
+            statistics.median(map(float, _samples))
+            >= settings.INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS
+        )
+        for _samples in _samples_by_scope
+    )
+
+
+async def expects_slow__async(invocation: AddonOperationInvocation) -> bool:
+    """(same as `expects_slow`, for use in async context)"""
+    if not is_promotable(invocation):
+        return False  # (skip the thread)
+    return await sync_to_async(expects_slow, thread_sensitive=False)(invocation)
+
+
+def record_latency(invocation: AddonOperationInvocation, seconds: float) -> None:
+    """keep the time it took to perform the invocation (if that may be promoted)"""
+    if not is_promotable(invocation):
+        return
+    with get_redis_client().pipeline() as _pipeline:
+        for _key in _latency_keys(invocation):
+            _pipeline.lpush(_key, seconds)
+            _pipeline.ltrim(_key, 0, _SAMPLES_PER_SCOPE - 1)
+            _pipeline.expire(_key, _SAMPLES_TTL)
+        _pipeline.execute()
+
+
+@contextlib.contextmanager
+def timing(invocation: AddonOperationInvocation):
+    """context manager to record how long the invocation takes to perform
+
+    (whether it succeeds or raises an exception -- but not if interrupted)
+    """
+    _started = time.monotonic()
+    try:
+        yield
+    except Exception:
+        record_latency(invocation, time.monotonic() - _started)
+        raise
+    record_latency(invocation, time.monotonic() - _started)
+
+
+@contextlib.asynccontextmanager
+async def timing__async(invocation: AddonOperationInvocation):
+    """(same as `timing`, for use in async context)"""
+    _started = time.monotonic()
+    _record = sync_to_async(record_latency, thread_sensitive=False)
+    try:
+        yield
+    except Exception:
+        if is_promotable(invocation):
+            await _record(invocation, time.monotonic() - _started)
+        raise
+    if is_promotable(invocation):
+        await _record(invocation, time.monotonic() - _started)
+
+
+###
+# module-private helpers
+
+
+def _latency_keys(invocation: AddonOperationInvocation) -> tuple[str, str]:
+    _operation_key = f"{_KEY_PREFIX}:{invocation.operation_identifier}"
+    return (
+        f"{_operation_key}:service:{invocation.thru_account.external_service_id}",
+        f"{_operation_key}:account:{invocation.thru_account_id}",
+    )
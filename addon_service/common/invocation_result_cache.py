@@ -0,0 +1,264 @@
+"""a shared (redis) cache for results of operations that declare `result_cache_ttl`
+
+cached results are keyed by account, addon (if any), operation name and canonicalized
+operation kwargs -- a result is fresh until its ttl passes, then may be served stale
+for `settings.INVOCATION_RESULT_CACHE_STALE_SECONDS` while a fresh result is fetched
+
+"not found" and "access denied" problems (see `NEGATIVE_RESULT_EXCEPTIONS`) are also
+cached, briefly, so repeated requests for missing or unreachable items can fail fast --
+at most `settings.INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT` of those per account at once
+
+all cached results for an account are dropped together (see `invalidate_account_results`)
+when the account is re-authorized or its capabilities (or its configured addons) change
+(once committed; not when only its oauth access token is refreshed)
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import functools
+import hashlib
+import json
+import time
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from addon_service.common.exceptions import (
+    ItemAccessDenied,
+    ItemNotFound,
+)
+
+
+if typing.TYPE_CHECKING:
+    from addon_service.addon_operation_invocation.models import AddonOperationInvocation
+
+
+__all__ = (
+    "NEGATIVE_RESULT_EXCEPTIONS",
+    "ResultCacheLookup",
+    "invalidate_account_results",
+    "invalidate_account_results__async",
+    "invalidate_account_results_on_commit",
+    "lookup_cached_result",
+    "lookup_cached_result__async",
+)
+
+_KEY_PREFIX = "gv:invocation-result"
+
+# exception types that are a well-known answer (rather than a failure) worth caching
+NEGATIVE_RESULT_EXCEPTIONS: dict[str, type[Exception]] = {
+    _exception_type.__qualname__: _exception_type
+    for _exception_type in (ItemNotFound, ItemAccessDenied)
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class ResultCacheLookup:
+    """what the result cache holds (or could hold) for a given invocation"""
+
+    cache_key: str
+    account_pk: str
+    generation: int  # the account's result generation when looked up
+    ttl: datetime.timedelta
+    cached_result: typing.Any = None  # json-serialized operation result
+    cached_at: float | None = None  # unix timestamp
+    cached_problem: tuple[str, str] | None = None  # (exception type name, message)
+
+    @property
+    def is_hit(self) -> bool:
+        return self.cached_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            self.is_hit
+            and (self.cached_problem is None)  # cached problems simply expire
+            and ((time.time() - self.cached_at) > self.ttl.total_seconds())
+        )
+
+    def get_cached_problem(self) -> Exception | None:
+        """get an exception like the one cached for this invocation, if any"""
+        if self.cached_problem is None:
+            return None
+        _type_name, _message = self.cached_problem
+        return NEGATIVE_RESULT_EXCEPTIONS[_type_name](_message)
+
+    def store(self, operation_result: typing.Any) -> None:
+        cache.set(self.cache_key, self._entry(operation_result), self._timeout())
+
+    async def store__async(self, operation_result: typing.Any) -> None:
+        await cache.aset(self.cache_key, self._entry(operation_result), self._timeout())
+
+    def store_problem(self, exception: BaseException) -> None:
+        """cache the exception, if it is a negative result (and the account has room)"""
+        _entry = self._problem_entry(exception)
+        if _entry is not None and self._claim_negative_slot():
+            cache.set(
+                self.cache_key, _entry, settings.INVOCATION_NEGATIVE_CACHE_SECONDS
+            )
+
+    async def store_problem__async(self, exception: BaseException) -> None:
+        """(same as `store_problem`, for use in async context)"""
+        _entry = self._problem_entry(exception)
+        if _entry is not None and await self._claim_negative_slot__async():
+            await cache.aset(
+                self.cache_key, _entry, settings.INVOCATION_NEGATIVE_CACHE_SECONDS
+            )
+
+    def claim_revalidation(self) -> bool:
+        """return True at most once per stale period, for whoever should refresh"""
+        return cache.add(*self._revalidation_claim())
+
+    async def claim_revalidation__async(self) -> bool:
+        """(same as `claim_revalidation`, for use in async context)"""
+        return await cache.aadd(*self._revalidation_claim())
+
+    def _entry(self, operation_result: typing.Any) -> dict:
+        return {
+            "result": operation_result,
+            "cached_at": time.time(),
+            "generation": self.generation,
+        }
+
+    def _problem_entry(self, exception: BaseException) -> dict | None:
+        _type_name = type(exception).__qualname__
+        if NEGATIVE_RESULT_EXCEPTIONS.get(_type_name) is not type(exception):
+            return None
+        return {
+            "problem": (_type_name, str(exception)),
+            "cached_at": time.time(),
+            "generation": self.generation,
+        }
+
+    def _claim_negative_slot(self) -> bool:
+        _counter_key = self._negative_counter_key()
+        cache.add(_counter_key, 0, settings.INVOCATION_NEGATIVE_CACHE_SECONDS)
+        return (
+            cache.incr(_counter_key)
+            <= settings.INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT
+        )
+
+    async def _claim_negative_slot__async(self) -> bool:
+        _counter_key = self._negative_counter_key()
+        await cache.aadd(_counter_key, 0, settings.INVOCATION_NEGATIVE_CACHE_SECONDS)
+        return (
+            await cache.aincr(_counter_key)
+            <= settings.INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT
+        )
+
+    def _negative_counter_key(self) -> str:
+        # count negative entries per account (per generation, per expiry period)
+        return f"{_KEY_PREFIX}:negative-count:{self.account_pk}:{self.generation}"
+
+    def _timeout(self) -> int:
+        return (
+            int(self.ttl.total_seconds())
+            + settings.INVOCATION_RESULT_CACHE_STALE_SECONDS
+        )
+
+    def _revalidation_claim(self) -> tuple[str, bool, int]:
+        return (
+            f"{self.cache_key}:revalidating",
+            True,
+            settings.INVOCATION_RESULT_CACHE_STALE_SECONDS,
+        )
+
+
+def lookup_cached_result(
+    invocation: AddonOperationInvocation,
+) -> ResultCacheLookup | None:
+    """get what the cache holds for the invocation (or None, if its result is not cacheable)"""
+    _keys = _cache_keys(invocation)
+    if _keys is None:
+        return None
+    return _build_lookup(invocation, *_keys, cache.get_many(_keys))
+
+
+async def lookup_cached_result__async(
+    invocation: AddonOperationInvocation,
+) -> ResultCacheLookup | None:
+    """(same as `lookup_cached_result`, for use in async context)"""
+    _keys = _cache_keys(invocation)
+    if _keys is None:
+        return None
+    return _build_lookup(invocation, *_keys, await cache.aget_many(_keys))
+
+
+def invalidate_account_results(account_pk: str) -> None:
+    """drop all cached results for the given account"""
+    cache.set(_generation_key(account_pk), time.time_ns(), timeout=None)
+
+
+async def invalidate_account_results__async(account_pk: str) -> None:
+    """(same as `invalidate_account_results`, for use in async context)"""
+    await cache.aset(_generation_key(account_pk), time.time_ns(), timeout=None)
+
+
+def invalidate_account_results_on_commit(account_pk: str) -> None:
+    """drop all cached results for the given account once the current transaction commits
+
+    (not before, or results from the account's old state could be cached again in the
+    meantime -- and not at all, if rolled back)
+    """
+    transaction.on_commit(functools.partial(invalidate_account_results, account_pk))
+
+
+###
+# module-private helpers
+
+
+def _generation_key(account_pk: str) -> str:
+    return f"{_KEY_PREFIX}:generation:{account_pk}"
+
+
+def _cache_keys(invocation: AddonOperationInvocation) -> tuple[str, str] | None:
+    if not settings.INVOCATION_RESULT_CACHE_ENABLED:
+        return None
+    _declaration = invocation.operation.declaration
+    if _declaration.result_cache_ttl is None:
+        return None
+    _kwargs_digest = hashlib.sha256(
+        json.dumps(
+            invocation.operation_kwargs,
+            sort_keys=True,
+            separators=(",", ":"),
+        ).encode()
+    ).hexdigest()
+    _cache_key = ":".join(
+        (
+            _KEY_PREFIX,
+            invocation.thru_account_id,
+            invocation.thru_addon_id or "",
+            _declaration.name,
+            _kwargs_digest,
+        )
+    )
+    return _cache_key, _generation_key(invocation.thru_account_id)
+
+
+def _build_lookup(
+    invocation: AddonOperationInvocation,
+    cache_key: str,
+    generation_key: str,
+    cached_values: dict[str, typing.Any],
+) -> ResultCacheLookup:
+    _generation = cached_values.get(generation_key, 0)
+    _entry = cached_values.get(cache_key)
+    _lookup = ResultCacheLookup(
+        cache_key=cache_key,
+        account_pk=invocation.thru_account_id,
+        generation=_generation,
+        ttl=invocation.operation.declaration.result_cache_ttl,
+    )
+    if _entry is None or _entry["generation"] != _generation:
+        return _lookup  # miss
+    return dataclasses.replace(
+        _lookup,
+        cached_result=_entry.get("result"),
+        cached_at=_entry["cached_at"],
+        cached_problem=(tuple(_entry["problem"]) if "problem" in _entry else None),
+    )
@@ -1,7 +1,9 @@
+import asyncio
 import enum
 import functools
 import logging
 import re
+import typing
 from http import HTTPStatus
 
 from asgiref.sync import async_to_sync
@@ -10,15 +12,24 @@ from django.conf import settings
 from django.core.exceptions import PermissionDenied
 
 from addon_service.common import hmac as hmac_utils
+from addon_service.common import osf_token_cache
 from addon_service.common.aiohttp_session import get_singleton_client_session
 from addon_service.common.get_user_uri import get_user_uri
+from addon_service.common.osf_permission_cache import (
+    OSFPermissionLookup,
+    lookup_many_osf_permissions__async,
+    lookup_osf_permissions__async,
+)
 from addon_toolkit import AddonCapabilities
 
 
 __all__ = (
     "OSFPermission",
     "get_osf_user_uri",
+    "get_osf_user_uri__async",
     "has_osf_permission_on_resource",
+    "has_osf_permission_on_resource__async",
+    "prefetch_osf_permissions__async",
 )
 
 _logger = logging.getLogger(__name__)
@@ -45,11 +56,10 @@ class OSFPermission(enum.StrEnum):
         raise ValueError(capabilities)
 
 
-@async_to_sync
-async def get_osf_user_uri(request: django_http.HttpRequest) -> str | None:
+async def get_osf_user_uri__async(request: django_http.HttpRequest) -> str | None:
     """get a uri identifying the user making this request"""
     try:
-        return _get_hmac_verified_user_iri(request)
+        return await _get_hmac_verified_user_iri__async(request)
     except hmac_utils.RejectedHmac as e:
         _logger.critical(f"rejected hmac signature!?\n\tpath:{request.path}")
         raise PermissionDenied(e)
@@ -65,23 +75,27 @@ async def get_osf_user_uri(request: django_http.HttpRequest) -> str | None:
     _auth_headers = _osf_token_auth_headers(request)
     if not _auth_headers:
         return None
-    _client = await get_singleton_client_session()
-    async with _client.get(_osfapi_me_url(), headers=_auth_headers) as _response:
-        if HTTPStatus(_response.status).is_client_error:
-            return None
-        _response_content = await _response.json()
-        return _iri_from_osfapi_resource(_response_content["data"])
+    _memo = _request_memo(request)
+    if "token_user_uri" not in _memo:
+        _memo["token_user_uri"] = await _get_token_user_uri__async(_auth_headers)
+    return _memo["token_user_uri"]
+
+
+get_osf_user_uri = async_to_sync(get_osf_user_uri__async)
+"""get a uri identifying the user making this request
+
+(same as `get_osf_user_uri__async`, for use in non-async context)
+"""
 
 
-@async_to_sync
-async def has_osf_permission_on_resource(
+async def has_osf_permission_on_resource__async(
     request: django_http.HttpRequest,
     resource_uri: str,
     required_permission: OSFPermission,
 ) -> bool:
     """check for a permission on a resource via the osf api"""
     try:
-        return _has_hmac_verified_osf_permission(
+        return await _has_hmac_verified_osf_permission__async(
             request, resource_uri, required_permission
         )
     except hmac_utils.RejectedHmac:
@@ -91,9 +105,159 @@ async def has_osf_permission_on_resource(
         return False
     except hmac_utils.NotUsingHmac:
         pass  # the only acceptable hmac-related error is not using hmac at all
-    # not hmac -- ask osf
+    # not hmac -- ask osf (or recall what it said lately), at most once per request
+    _memo_key = ("permissions", resource_uri)
+    _memo = _request_memo(request)
+    if _memo_key not in _memo:
+        _memo[_memo_key] = await _get_osf_permissions__async(request, resource_uri)
+    return required_permission in _memo[_memo_key]
+
+
+has_osf_permission_on_resource = async_to_sync(has_osf_permission_on_resource__async)
+"""check for a permission on a resource via the osf api
+
+(same as `has_osf_permission_on_resource__async`, for use in non-async context)
+"""
+
+
+async def prefetch_osf_permissions__async(
+    request: django_http.HttpRequest, resource_uris: typing.Iterable[str]
+) -> None:
+    """resolve the requesting user's permissions on many resources at once
+
+    for a request about to check permission on many resources: those not already
+    resolved for this request are looked up together in the shared cache, then any
+    still unknown asked of osf concurrently -- later checks on those resources
+    (see `has_osf_permission_on_resource__async`) need not ask again
+    """
+    if await _is_using_hmac__async(request):
+        return  # (osf already said, in signed headers)
+    _memo = _request_memo(request)
+    _resource_uris = {
+        _resource_uri
+        for _resource_uri in resource_uris
+        if ("permissions", _resource_uri) not in _memo
+    }
+    if not _resource_uris:
+        return
+    _cache_user_uri = _get_cache_user_uri(request)
+    _lookups = (
+        None
+        if _cache_user_uri is None
+        else await lookup_many_osf_permissions__async(
+            _cache_user_uri,
+            _resource_uris,
+            request.GET.get("view_only"),
+            credential=_get_cache_credential(request),
+        )
+    ) or {}
+    _concurrency = asyncio.Semaphore(_PREFETCH_CONCURRENCY)
+
+    async def _resolve(resource_uri: str) -> None:
+        async with _concurrency:
+            _memo[("permissions", resource_uri)] = (
+                await _resolve_osf_permissions__async(
+                    request, resource_uri, _lookups.get(resource_uri)
+                )
+            )
+
+    await asyncio.gather(*map(_resolve, _resource_uris))
+
+
+def _make_guid_query_params(request):
+    params = {
+        "resolve": "f",  # do not redirect to the referent
+        "embed": "referent",  # instead, include the referent in the response
+        "fields[nodes]": "current_user_permissions",
+    }
+    if view_only := request.GET.get("view_only"):
+        params["view_only"] = view_only
+    return params
+
+
+###
+# module-private helpers
+
+_HeaderList = list[tuple[str, str]]
+
+_PREFETCH_CONCURRENCY = (
+    8  # osf api requests at once (see `prefetch_osf_permissions__async`)
+)
+
+# osf api responses that mean "no permissions" (rather than some other problem)
+_NO_PERMISSION_STATUSES = frozenset(
+    (HTTPStatus.FORBIDDEN, HTTPStatus.NOT_FOUND, HTTPStatus.GONE)
+)
+
+
+def _request_memo(request: django_http.HttpRequest) -> dict:
+    # what was learned from osf while handling this request (kept on the django
+    # request, so shared with any rest_framework request wrapping it)
+    _http_request = getattr(request, "_request", request)
+    try:
+        return _http_request._osf_memo
+    except AttributeError:
+        _http_request._osf_memo = {}
+        return _http_request._osf_memo
+
+
+async def _get_token_user_uri__async(auth_headers: _HeaderList) -> str | None:
+    [(_, _auth_header)] = auth_headers
+    _user_uri = await osf_token_cache.get_token_user_uri__async(_auth_header)
+    if _user_uri is None:
+        _user_uri = await _fetch_token_user_uri__async(auth_headers)
+        if _user_uri is not None:
+            await osf_token_cache.store_token_user_uri__async(_auth_header, _user_uri)
+    return _user_uri
+
+
+async def _fetch_token_user_uri__async(auth_headers: _HeaderList) -> str | None:
     _client = await get_singleton_client_session()
+    async with _client.get(_osfapi_me_url(), headers=auth_headers) as _response:
+        if HTTPStatus(_response.status).is_client_error:
+            return None
+        _response_content = await _response.json()
+        return _iri_from_osfapi_resource(_response_content["data"])
 
+
+async def _get_osf_permissions__async(
+    request: django_http.HttpRequest, resource_uri: str
+) -> frozenset[str]:
+    _cache_user_uri = _get_cache_user_uri(request)
+    _lookup = (
+        None
+        if _cache_user_uri is None
+        else await lookup_osf_permissions__async(
+            _cache_user_uri,
+            resource_uri,
+            request.GET.get("view_only"),
+            credential=_get_cache_credential(request),
+        )
+    )
+    return await _resolve_osf_permissions__async(request, resource_uri, _lookup)
+
+
+async def _resolve_osf_permissions__async(
+    request: django_http.HttpRequest,
+    resource_uri: str,
+    lookup: OSFPermissionLookup | None,
+) -> frozenset[str]:
+    if lookup is not None and lookup.is_hit:
+        return lookup.permissions
+    _permissions = await _fetch_osf_permissions__async(request, resource_uri)
+    if _permissions is None:
+        return frozenset()  # (not a well-known answer; not cached)
+    if lookup is not None:
+        await lookup.store__async(_permissions)
+    return _permissions
+
+
+async def _fetch_osf_permissions__async(
+    request: django_http.HttpRequest, resource_uri: str
+) -> frozenset[str] | None:
+    # the requesting user's permissions on the resource, according to the osf api
+    # (or None, if osf gave no clear answer)
+    _client = await get_singleton_client_session()
     async with _client.get(
         _osfapi_guid_url(resource_uri),
         params=_make_guid_query_params(request),
@@ -103,38 +267,61 @@ async def has_osf_permission_on_resource(
         ],
     ) as _response:
         if not HTTPStatus(_response.status).is_success:
-            return False  # nonexistent osfid (TODO: consider raising error?)
+            # nonexistent osfid (TODO: consider raising error?)
+            return (
+                frozenset()
+                if HTTPStatus(_response.status) in _NO_PERMISSION_STATUSES
+                else None
+            )
         _response_content = await _response.json()
         _embedded_referent = _response_content["data"]["embeds"]["referent"]
         try:
             _referent_data = _embedded_referent["data"]
         except KeyError:  # no `data` for referent implies no permission
-            return False
+            return frozenset()
+        if not _referent_data:
+            return frozenset()
         # 'current_user_permissions' includes only explicitly assigned 'read' permission,
         # but here we wish to consider public resources READ-able by anyone
-        if required_permission == OSFPermission.READ:
-            return bool(_referent_data)
-        return (
-            required_permission
-            in _referent_data["attributes"]["current_user_permissions"]
+        return frozenset(
+            (
+                OSFPermission.READ,
+                *_referent_data.get("attributes", {}).get(
+                    "current_user_permissions", ()
+                ),
+            )
         )
 
 
-def _make_guid_query_params(request):
-    params = {
-        "resolve": "f",  # do not redirect to the referent
-        "embed": "referent",  # instead, include the referent in the response
-        "fields[nodes]": "current_user_permissions",
-    }
-    if view_only := request.GET.get("view_only"):
-        params["view_only"] = view_only
-    return params
+async def _is_using_hmac__async(request: django_http.HttpRequest) -> bool:
+    try:
+        await hmac_utils.get_signed_headers__async(
+            request, settings.OSF_HMAC_KEY, settings.OSF_HMAC_EXPIRATION_SECONDS
+        )
+    except hmac_utils.NotUsingHmac:
+        return False
+    except hmac_utils.RejectedHmac:
+        pass  # (permission checks on this request fail regardless)
+    return True
 
 
-###
-# module-private helpers
+def _get_cache_user_uri(request: django_http.HttpRequest) -> str | None:
+    # whose permissions to cache: the authenticated user's, or (without any
+    # credentials) the anonymous "" -- None for credentials not (yet) known good
+    _user_uri = get_user_uri(request)
+    if _user_uri:
+        return _user_uri
+    return None if _get_osf_auth_headers(request) else ""
 
-_HeaderList = list[tuple[str, str]]
+
+def _get_cache_credential(request: django_http.HttpRequest) -> str:
+    # which credential osf answers to: a personal access token (which may be scoped
+    # narrower than the user's session) by keyed hash, or "" for the session cookie
+    _token_headers = _osf_token_auth_headers(request)
+    if not _token_headers:
+        return ""
+    [(_, _auth_header)] = _token_headers
+    return f"token:{osf_token_cache.token_digest(_auth_header)}"
 
 
 @functools.cache  # compute only once
@@ -202,8 +389,10 @@ def _iri_from_osfapi_resource(osfapi_resource: dict) -> str:
     return osfapi_resource["links"]["iri"]
 
 
-def _get_hmac_verified_user_iri(request: django_http.HttpRequest) -> str | None:
-    _signed_headers = hmac_utils.get_signed_headers(
+async def _get_hmac_verified_user_iri__async(
+    request: django_http.HttpRequest,
+) -> str | None:
+    _signed_headers = await hmac_utils.get_signed_headers__async(
         request,
         settings.OSF_HMAC_KEY,
         settings.OSF_HMAC_EXPIRATION_SECONDS,
@@ -211,12 +400,12 @@ def _get_hmac_verified_user_iri(request: django_http.HttpRequest) -> str | None:
     return _signed_headers.get(_OSF_HMAC_USER_HEADER)
 
 
-def _has_hmac_verified_osf_permission(
+async def _has_hmac_verified_osf_permission__async(
     request: django_http.HttpRequest,
     resource_uri: str,
     required_permission: OSFPermission,
 ) -> bool:
-    _signed_headers = hmac_utils.get_signed_headers(
+    _signed_headers = await hmac_utils.get_signed_headers__async(
         request,
         settings.OSF_HMAC_KEY,
         settings.OSF_HMAC_EXPIRATION_SECONDS,
@@ -0,0 +1,229 @@
+"""a shared (redis) cache of the permissions osf gives each user on each resource
+
+permission checks not already verified by osf (see `osf.has_osf_permission_on_resource`)
+ask the osf api -- the permissions it answers with are kept, by user uri, credential
+(a personal access token may be scoped narrower than the user's session), resource uri
+and `view_only` link, for `OSF_PERMISSION_CACHE_SECONDS` (or, when the answer is "no
+permissions at all", for `OSF_PERMISSION_NEGATIVE_CACHE_SECONDS`)
+
+all cached permissions for a resource (or for a user) are dropped together (see
+`invalidate_osf_permissions`) when osf says they changed (see `tasks.osf_backchannel`)
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import itertools
+import json
+import time
+import typing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from addon_service.common.redis_client import get_redis_client
+
+
+__all__ = (
+    "OSFPermissionLookup",
+    "invalidate_osf_permissions",
+    "invalidate_osf_permissions__async",
+    "lookup_many_osf_permissions",
+    "lookup_many_osf_permissions__async",
+    "lookup_osf_permissions",
+    "lookup_osf_permissions__async",
+)
+
+_KEY_PREFIX = "gv:osf-permissions"
+
+
+@dataclasses.dataclass(frozen=True)
+class OSFPermissionLookup:
+    """what the cache holds (or could hold) for a user's permissions on a resource"""
+
+    cache_key: str
+    generations: tuple[str | None, str | None]  # (user's, resource's) when looked up
+    permissions: frozenset[str] | None = None  # (empty for a cached "no permissions")
+
+    @property
+    def is_hit(self) -> bool:
+        return self.permissions is not None
+
+    def store(self, permissions: typing.Iterable[str]) -> None:
+        """cache the permissions osf gave (if caching those)"""
+        _permissions = sorted(permissions)
+        _ttl = _ttl_for(_permissions)
+        if _ttl:
+            get_redis_client().set(
+                self.cache_key,
+                json.dumps(
+                    {"permissions": _permissions, "generations": self.generations}
+                ),
+                ex=_ttl,
+            )
+
+    async def store__async(self, permissions: typing.Iterable[str]) -> None:
+        """(same as `store`, for use in async context)"""
+        _permissions = sorted(permissions)
+        if not _ttl_for(_permissions):
+            return  # (skip the thread)
+        await sync_to_async(self.store, thread_sensitive=False)(_permissions)
+
+
+def lookup_osf_permissions(
+    user_uri: str,
+    resource_uri: str,
+    view_only: str | None = None,
+    *,
+    credential: str = "",
+) -> OSFPermissionLookup | None:
+    """get what the cache holds for the user on the resource (or None, if not caching)
+
+    `user_uri` may be empty, for anonymous requests; `credential` tells apart what osf
+    says to the same user with different credentials (empty for the user's session)
+    """
+    _lookups = lookup_many_osf_permissions(
+        user_uri, [resource_uri], view_only, credential=credential
+    )
+    return None if _lookups is None else _lookups[resource_uri]
+
+
+async def lookup_osf_permissions__async(
+    user_uri: str,
+    resource_uri: str,
+    view_only: str | None = None,
+    *,
+    credential: str = "",
+) -> OSFPermissionLookup | None:
+    """(same as `lookup_osf_permissions`, for use in async context)"""
+    if not settings.OSF_PERMISSION_CACHE_SECONDS:
+        return None  # (skip the thread)
+    return await sync_to_async(lookup_osf_permissions, thread_sensitive=False)(
+        user_uri, resource_uri, view_only, credential=credential
+    )
+
+
+def lookup_many_osf_permissions(
+    user_uri: str,
+    resource_uris: typing.Iterable[str],
+    view_only: str | None = None,
+    *,
+    credential: str = "",
+) -> dict[str, OSFPermissionLookup] | None:
+    """like `lookup_osf_permissions`, for many resources at once (by resource uri)"""
+    if not settings.OSF_PERMISSION_CACHE_SECONDS:
+        return None
+    _resource_uris = list(resource_uris)
+    _cache_keys = [
+        _permissions_key(user_uri, credential, _resource_uri, view_only)
+        for _resource_uri in _resource_uris
+    ]
+    _user_generation, *_values = get_redis_client().mget(
+        _generation_key("user", user_uri),
+        *itertools.chain.from_iterable(
+            (_cache_key, _generation_key("resource", _resource_uri))
+            for _resource_uri, _cache_key in zip(_resource_uris, _cache_keys)
+        ),
+    )
+    return {
+        _resource_uri: _build_lookup(
+            _cache_key, _entry_json, (_user_generation, _resource_generation)
+        )
+        for _resource_uri, _cache_key, _entry_json, _resource_generation in zip(
+            _resource_uris, _cache_keys, _values[0::2], _values[1::2]
+        )
+    }
+
+
+async def lookup_many_osf_permissions__async(
+    user_uri: str,
+    resource_uris: typing.Iterable[str],
+    view_only: str | None = None,
+    *,
+    credential: str = "",
+) -> dict[str, OSFPermissionLookup] | None:
+    """(same as `lookup_many_osf_permissions`, for use in async context)"""
+    if not settings.OSF_PERMISSION_CACHE_SECONDS:
+        return None  # (skip the thread)
+    return await sync_to_async(lookup_many_osf_permissions, thread_sensitive=False)(
+        user_uri, resource_uris, view_only, credential=credential
+    )
+
+
+def invalidate_osf_permissions(
+    *, resource_uri: str | None = None, user_uri: str | None = None
+) -> None:
+    """drop all cached permissions on the given resource and/or for the given user"""
+    # (a generation need outlive only the entries cached before it)
+    _ttl = max(
+        settings.OSF_PERMISSION_CACHE_SECONDS,
+        settings.OSF_PERMISSION_NEGATIVE_CACHE_SECONDS,
+    )
+    if not _ttl:
+        return
+    _generation = time.time_ns()
+    with get_redis_client().pipeline() as _pipeline:
+        if resource_uri is not None:
+            _pipeline.set(
+                _generation_key("resource", resource_uri), _generation, ex=_ttl
+            )
+        if user_uri is not None:
+            _pipeline.set(_generation_key("user", user_uri), _generation, ex=_ttl)
+        _pipeline.execute()
+
+
+async def invalidate_osf_permissions__async(
+    *, resource_uri: str | None = None, user_uri: str | None = None
+) -> None:
+    """(same as `invalidate_osf_permissions`, for use in async context)"""
+    await sync_to_async(invalidate_osf_permissions, thread_sensitive=False)(
+        resource_uri=resource_uri, user_uri=user_uri
+    )
+
+
+###
+# module-private helpers
+
+
+def _build_lookup(
+    cache_key: str,
+    entry_json: bytes | None,
+    generations: tuple[bytes | None, bytes | None],
+) -> OSFPermissionLookup:
+    _lookup = OSFPermissionLookup(
+        cache_key=cache_key,
+        generations=tuple(
+            None if _generation is None else _generation.decode()
+            for _generation in generations
+        ),
+    )
+    if entry_json is None:
+        return _lookup  # miss
+    _entry = json.loads(entry_json)
+    if tuple(_entry["generations"]) != _lookup.generations:
+        return _lookup  # invalidated since cached
+    return dataclasses.replace(_lookup, permissions=frozenset(_entry["permissions"]))
+
+
+def _ttl_for(permissions: list[str]) -> int:
+    return (
+        settings.OSF_PERMISSION_CACHE_SECONDS
+        if permissions
+        else settings.OSF_PERMISSION_NEGATIVE_CACHE_SECONDS
+    )
+
+
+def _permissions_key(
+    user_uri: str, credential: str, resource_uri: str, view_only: str | None
+) -> str:
+    # (hashed, so `view_only` keys are not kept in the clear)
+    _digest = hashlib.sha256(
+        json.dumps([user_uri, credential, resource_uri, view_only or ""]).encode()
+    ).hexdigest()
+    return f"{_KEY_PREFIX}:{_digest}"
+
+
+def _generation_key(scope: str, uri: str) -> str:
+    _digest = hashlib.sha256(uri.encode()).hexdigest()
+    return f"{_KEY_PREFIX}:generation:{scope}:{_digest}"
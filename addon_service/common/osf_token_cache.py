@@ -0,0 +1,117 @@
+"""a shared (redis) cache of which osf user each personal access token belongs to
+
+a request with a personal access token (but no session) is from whichever user the osf
+api says (see `osf.get_osf_user_uri`) -- that user's uri is kept for
+`OSF_TOKEN_USER_CACHE_SECONDS`, keyed by a keyed hash (never the token itself), for at
+most `OSF_TOKEN_USER_CACHE_MAX_SIZE` tokens at once (the oldest are dropped first)
+
+tokens osf would not accept are not cached; when osf says a user's tokens were revoked
+(see `tasks.osf_backchannel`), `forget_user_tokens` drops all cached tokens for that user
+"""
+
+import hashlib
+import hmac
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from addon_service.common.redis_client import get_redis_client
+
+
+__all__ = (
+    "forget_user_tokens",
+    "get_token_user_uri",
+    "get_token_user_uri__async",
+    "store_token_user_uri",
+    "store_token_user_uri__async",
+    "token_digest",
+)
+
+_KEY_PREFIX = "gv:osf-token-user"
+_INDEX_KEY = f"{_KEY_PREFIX}:index"  # sorted set of token digests, by when cached
+
+
+def get_token_user_uri(auth_header: str) -> str | None:
+    """get the user uri cached for the token in the given `Authorization` header, if any"""
+    if not settings.OSF_TOKEN_USER_CACHE_SECONDS:
+        return None
+    _user_uri = get_redis_client().get(_token_key(token_digest(auth_header)))
+    return None if _user_uri is None else _user_uri.decode()
+
+
+async def get_token_user_uri__async(auth_header: str) -> str | None:
+    """(same as `get_token_user_uri`, for use in async context)"""
+    if not settings.OSF_TOKEN_USER_CACHE_SECONDS:
+        return None  # (skip the thread)
+    return await sync_to_async(get_token_user_uri, thread_sensitive=False)(auth_header)
+
+
+def store_token_user_uri(auth_header: str, user_uri: str) -> None:
+    """cache the user uri osf gave for the token in the given `Authorization` header"""
+    _ttl = settings.OSF_TOKEN_USER_CACHE_SECONDS
+    if not _ttl:
+        return
+    _digest = token_digest(auth_header)
+    _user_tokens_key = _user_key(user_uri)
+    _now = time.time()
+    _client = get_redis_client()
+    with _client.pipeline() as _pipeline:
+        _pipeline.set(_token_key(_digest), user_uri, ex=_ttl)
+        _pipeline.zadd(_INDEX_KEY, {_digest: _now})
+        _pipeline.zremrangebyscore(_INDEX_KEY, "-inf", _now - _ttl)  # (expired)
+        _pipeline.sadd(_user_tokens_key, _digest)
+        _pipeline.expire(_user_tokens_key, _ttl)
+        _pipeline.zcard(_INDEX_KEY)
+        *_, _cached_count = _pipeline.execute()
+    _excess = _cached_count - settings.OSF_TOKEN_USER_CACHE_MAX_SIZE
+    if _excess > 0:
+        _dropped_digests = [
+            _digest.decode() for _digest, _ in _client.zpopmin(_INDEX_KEY, _excess)
+        ]
+        _client.delete(*(_token_key(_digest) for _digest in _dropped_digests))
+
+
+async def store_token_user_uri__async(auth_header: str, user_uri: str) -> None:
+    """(same as `store_token_user_uri`, for use in async context)"""
+    if not settings.OSF_TOKEN_USER_CACHE_SECONDS:
+        return  # (skip the thread)
+    await sync_to_async(store_token_user_uri, thread_sensitive=False)(
+        auth_header, user_uri
+    )
+
+
+def forget_user_tokens(user_uri: str) -> None:
+    """drop all cached tokens for the given user (e.g. when osf revoked any)"""
+    _client = get_redis_client()
+    _user_tokens_key = _user_key(user_uri)
+    _digests = [_digest.decode() for _digest in _client.smembers(_user_tokens_key)]
+    with _client.pipeline() as _pipeline:
+        if _digests:
+            _pipeline.delete(*(_token_key(_digest) for _digest in _digests))
+            _pipeline.zrem(_INDEX_KEY, *_digests)
+        _pipeline.delete(_user_tokens_key)
+        _pipeline.execute()
+
+
+def token_digest(auth_header: str) -> str:
+    """a keyed hash of the given `Authorization` header, to key caches by token
+
+    (keyed, so a cache is no help guessing tokens without the secret key)
+    """
+    return hmac.new(
+        settings.SECRET_KEY.encode(), auth_header.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+###
+# module-private helpers
+
+
+def _token_key(digest: str) -> str:
+    return f"{_KEY_PREFIX}:token:{digest}"
+
+
+def _user_key(user_uri: str) -> str:
+    _digest = hashlib.sha256(user_uri.encode()).hexdigest()
+    return f"{_KEY_PREFIX}:by-user:{_digest}"
@@ -86,6 +86,25 @@ class SessionUserMayAccessInvocation(permissions.BasePermission):
             )
         )
 
+    async def has_object_permission__async(self, request, view, obj):
+        """same as `has_object_permission`, for use in async views
+
+        expects `obj` loaded with its user, account and addon resource already selected
+        """
+        _user_uri = get_user_uri(request)
+        return bool(
+            (_user_uri == obj.by_user.user_uri)
+            or (_user_uri == obj.thru_account.owner_uri)
+            or (
+                obj.thru_addon is not None
+                and await osf.has_osf_permission_on_resource__async(
+                    request,
+                    obj.thru_addon.authorized_resource.resource_uri,
+                    osf.OSFPermission.READ,
+                )
+            )
+        )
+
 
 class SessionUserMayPerformInvocation(permissions.BasePermission):
     """for object permissions on `addon_service.models.AddonOperationInvocation`"""
@@ -109,6 +128,25 @@ class SessionUserMayPerformInvocation(permissions.BasePermission):
             )
         )
 
+    async def has_object_permission__async(self, request, view, obj):
+        """same as `has_object_permission`, for use in async views
+
+        expects `obj` loaded with its account owner (and addon resource) already selected
+        """
+        _user_uri = get_user_uri(request)
+        _thru_addon = obj.thru_addon
+        _thru_account = obj.thru_account
+        if _thru_addon is None:
+            return _user_uri == _thru_account.owner_uri
+        return bool(
+            (_user_uri == _thru_addon.owner_uri)
+            or await osf.has_osf_permission_on_resource__async(
+                request,
+                _thru_addon.authorized_resource.resource_uri,
+                osf.OSFPermission.for_capabilities(obj.operation.capability),
+            )
+        )
+
 
 class IsValidHMACSignedRequest(permissions.BasePermission):
     """allow only requests signed with the known osf hmac key"""
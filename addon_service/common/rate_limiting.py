@@ -0,0 +1,201 @@
+"""inbound rate limits: a token bucket (in redis) per client, for each limited scope
+
+each scope in `RATE_LIMITS` allows each client "<count>/<period>" -- up to <count> at
+once, refilled steadily over the period; beyond that, requests are rejected with
+`429 Too Many Requests` (and `Retry-After`) before anything costly is done for them
+
+a client is the authenticated user (with requests hmac-signed by osf on the user's
+behalf counted apart from the user's own), each personal access token (counted apart
+from its user's session), or the ip address if not authenticated
+
+views without a `throttle_scope` are limited by `API_SCOPE` and "api:<resource type>"
+(`RateLimitThrottle` is rest_framework's default throttle)
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import time
+import typing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import exceptions as drf_exceptions
+from rest_framework import throttling
+
+from addon_service.common import hmac as hmac_utils
+from addon_service.common import osf_token_cache
+from addon_service.common.get_user_uri import get_user_uri
+from addon_service.common.redis_client import get_redis_client
+from addon_toolkit import AddonOperationType
+
+
+if typing.TYPE_CHECKING:
+    from addon_service.addon_operation_invocation.models import AddonOperationInvocation
+
+
+__all__ = (
+    "API_SCOPE",
+    "INVOCATION_SCOPE",
+    "RateLimitThrottle",
+    "check_rate_limits",
+    "check_rate_limits__async",
+    "invocation_rate_limit_scopes",
+)
+
+API_SCOPE = "api"  # each request to a view without its own `throttle_scope`
+INVOCATION_SCOPE = "invocation"  # each request creating invocations
+
+_KEY_PREFIX = "gv:rate-limit"
+_PERIOD_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# take a token from each bucket (KEYS) -- or from none, if any has less than one --
+# and return how many seconds until all have one (as a string; lua numbers returned
+# to redis are truncated to integers)
+# ARGV: now, then capacity and refill-per-second for each bucket
+_TAKE_TOKENS_LUA = """
+local now = tonumber(ARGV[1])
+local available = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local per_second = tonumber(ARGV[2 * i + 1])
+    local bucket = redis.call("HMGET", key, "tokens", "at")
+    local tokens = capacity
+    if bucket[1] then
+        local elapsed = math.max(0, now - tonumber(bucket[2]))
+        tokens = math.min(capacity, tonumber(bucket[1]) + elapsed * per_second)
+    end
+    available[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / per_second)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local per_second = tonumber(ARGV[2 * i + 1])
+    redis.call("HSET", key, "tokens", available[i] - 1, "at", now)
+    -- (a bucket left alone until full is as good as none)
+    redis.call("EXPIRE", key, math.ceil(capacity / per_second) + 1)
+end
+return "0"
+"""
+
+
+class RateLimitThrottle(throttling.BaseThrottle):
+    """rest_framework throttle limiting each client to the view's `throttle_scope`
+
+    (or, for a view without one, to `API_SCOPE` and "api:<resource type>")
+    """
+
+    def allow_request(self, request, view) -> bool:
+        self._wait = _take_tokens(request, _view_scopes(view))
+        return not self._wait
+
+    def wait(self) -> float | None:
+        return self._wait or None
+
+
+def check_rate_limits(request, scopes: typing.Iterable[str]) -> None:
+    """take a token from the requesting client's bucket for each of the given scopes
+
+    raises `Throttled` (having taken none) if any is empty
+    """
+    _wait = _take_tokens(request, scopes)
+    if _wait:
+        raise drf_exceptions.Throttled(wait=_wait)
+
+
+async def check_rate_limits__async(request, scopes: typing.Iterable[str]) -> None:
+    """(same as `check_rate_limits`, for use in async context)"""
+    _scopes = list(scopes)
+    if not _limits_for(_scopes):
+        return  # (skip the thread)
+    await sync_to_async(check_rate_limits, thread_sensitive=False)(request, _scopes)
+
+
+def invocation_rate_limit_scopes(invocation: AddonOperationInvocation) -> list[str]:
+    """scopes limiting each invocation (apart from the request's `INVOCATION_SCOPE`)"""
+    _scopes = [f"{INVOCATION_SCOPE}:{invocation.operation_name}"]
+    if invocation.operation.operation_type is AddonOperationType.IMMEDIATE:
+        # (so scripted immediate invocations cannot crowd out interactive ones)
+        _scopes.append(f"{INVOCATION_SCOPE}:immediate")
+    return _scopes
+
+
+###
+# module-private helpers
+
+
+def _view_scopes(view) -> list[str]:
+    _scope = getattr(view, "throttle_scope", None)
+    if _scope:
+        return [_scope]
+    _basename = getattr(view, "basename", None)  # (the resource type, if routed)
+    return [API_SCOPE, f"{API_SCOPE}:{_basename}"] if _basename else [API_SCOPE]
+
+
+def _take_tokens(request, scopes: typing.Iterable[str]) -> float:
+    # seconds to wait before trying again (or 0, with a token taken from each)
+    _limits = _limits_for(scopes)
+    if not _limits:
+        return 0.0
+    _client_digest = hashlib.sha256(_client_ident(request).encode()).hexdigest()
+    _args: list[float] = [time.time()]
+    for _capacity, _per_second in _limits.values():
+        _args.extend((_capacity, _per_second))
+    _wait = _take_tokens_script()(
+        keys=[f"{_KEY_PREFIX}:{_scope}:{_client_digest}" for _scope in _limits],
+        args=_args,
+    )
+    return float(_wait)
+
+
+@functools.cache
+def _take_tokens_script():
+    return get_redis_client().register_script(_TAKE_TOKENS_LUA)
+
+
+def _limits_for(scopes: typing.Iterable[str]) -> dict[str, tuple[int, float]]:
+    # (capacity, refill per second) for each scope with a limit
+    _limits = {}
+    for _scope in scopes:
+        _rate = settings.RATE_LIMITS.get(_scope)
+        if _rate:
+            _limits[_scope] = _parse_rate(_rate)
+    return _limits
+
+
+@functools.cache
+def _parse_rate(rate: str) -> tuple[int, float]:
+    # like "600/minute" (or "600/m")
+    _count, _, _period = rate.partition("/")
+    _capacity = int(_count)
+    return _capacity, _capacity / _PERIOD_SECONDS[_period.strip()[0]]
+
+
+def _client_ident(request) -> str:
+    # (expects the request already authenticated, if at all)
+    _user_uri = get_user_uri(request)
+    if not _user_uri:
+        return f"ip:{RateLimitThrottle().get_ident(request)}"
+    try:
+        hmac_utils.get_signed_headers(
+            request, settings.OSF_HMAC_KEY, settings.OSF_HMAC_EXPIRATION_SECONDS
+        )
+    except (hmac_utils.NotUsingHmac, hmac_utils.RejectedHmac):
+        pass
+    else:
+        return f"hmac:{_user_uri}"
+    # (a personal access token counts only if not in the user's session -- see
+    # `osf.get_osf_user_uri__async`)
+    _auth_header = request.headers.get("Authorization", "")
+    if not request.session.get("user_reference_uri") and _auth_header.startswith(
+        "Bearer "
+    ):
+        return f"token:{osf_token_cache.token_digest(_auth_header)}"
+    return f"user:{_user_uri}"
@@ -0,0 +1,15 @@
+"""direct access to redis (at `settings.REDIS_HOST`), for more than caching"""
+
+import functools
+
+import redis
+from django.conf import settings
+
+
+__all__ = ("get_redis_client",)
+
+
+@functools.cache
+def get_redis_client() -> redis.Redis:
+    """get a (shared, thread-safe) redis client"""
+    return redis.Redis.from_url(settings.REDIS_HOST)
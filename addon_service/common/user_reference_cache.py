@@ -0,0 +1,111 @@
+"""user uri => `UserReference` pk, so authenticating a known user needs no database query
+
+kept in-process (for up to `_LOCAL_TTL` seconds, at most `_LOCAL_MAX_SIZE` uris) and in
+redis (for `USER_REFERENCE_CACHE_SECONDS`) -- a uri's pk changes only if its reference
+is deleted, but both are dropped here (see `forget_user_pks`) when users are merged
+(other processes' in-process entries simply expire)
+
+(see `UserReference.objects.for_user_uri`, which creates references not yet cached)
+"""
+
+import collections
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from addon_service.common.redis_client import get_redis_client
+
+
+__all__ = (
+    "forget_user_pks",
+    "get_cached_user_pk",
+    "get_cached_user_pk__async",
+    "remember_user_pk",
+)
+
+_KEY_PREFIX = "gv:user-reference-pk"
+_LOCAL_TTL = 60  # seconds
+_LOCAL_MAX_SIZE = 10000
+
+_local_lock = threading.Lock()
+_local_pks: collections.OrderedDict[str, tuple[str, float]] = (
+    collections.OrderedDict()
+)  # user uri: (pk, expires at), least recent first
+
+
+def get_cached_user_pk(user_uri: str) -> str | None:
+    """get the pk of the user reference with the given uri, if cached"""
+    if not settings.USER_REFERENCE_CACHE_SECONDS:
+        return None
+    _pk = _get_local(user_uri)
+    if _pk is None:
+        _pk = get_redis_client().get(_user_key(user_uri))
+        if _pk is not None:
+            _pk = _pk.decode()
+            _put_local(user_uri, _pk)
+    return _pk
+
+
+async def get_cached_user_pk__async(user_uri: str) -> str | None:
+    """(same as `get_cached_user_pk`, for use in async context)"""
+    if not settings.USER_REFERENCE_CACHE_SECONDS:
+        return None  # (skip the thread)
+    _pk = _get_local(user_uri)
+    if _pk is not None:
+        return _pk  # (skip the thread)
+    return await sync_to_async(get_cached_user_pk, thread_sensitive=False)(user_uri)
+
+
+def remember_user_pk(user_uri: str, pk: str) -> None:
+    """cache the pk of the (saved, committed) user reference with the given uri"""
+    if not settings.USER_REFERENCE_CACHE_SECONDS:
+        return
+    get_redis_client().set(
+        _user_key(user_uri), pk, ex=settings.USER_REFERENCE_CACHE_SECONDS
+    )
+    _put_local(user_uri, pk)
+
+
+def forget_user_pks(*user_uris: str) -> None:
+    """drop the cached pks for the given user uris"""
+    with _local_lock:
+        for _user_uri in user_uris:
+            _local_pks.pop(_user_uri, None)
+    if user_uris:
+        get_redis_client().delete(*map(_user_key, user_uris))
+
+
+###
+# module-private helpers
+
+
+def _get_local(user_uri: str) -> str | None:
+    with _local_lock:
+        _entry = _local_pks.get(user_uri)
+        if _entry is None:
+            return None
+        _pk, _expires_at = _entry
+        if _expires_at < time.monotonic():
+            del _local_pks[user_uri]
+            return None
+        _local_pks.move_to_end(user_uri)
+        return _pk
+
+
+def _put_local(user_uri: str, pk: str) -> None:
+    _expires_at = time.monotonic() + min(
+        _LOCAL_TTL, settings.USER_REFERENCE_CACHE_SECONDS
+    )
+    with _local_lock:
+        _local_pks[user_uri] = (pk, _expires_at)
+        _local_pks.move_to_end(user_uri)
+        while len(_local_pks) > _LOCAL_MAX_SIZE:
+            _local_pks.popitem(last=False)
+
+
+def _user_key(user_uri: str) -> str:
+    _digest = hashlib.sha256(user_uri.encode()).hexdigest()
+    return f"{_KEY_PREFIX}:{_digest}"
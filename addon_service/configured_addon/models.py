@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError
 from django.db import models
 
 from addon_service.addon_operation.models import AddonOperationModel
+from addon_service.common import invocation_result_cache
 from addon_service.common.base_model import AddonsServiceBaseModel
 from addon_service.common.known_imps import AddonImpNumbers
 from addon_service.common.validators import validate_addon_capability
@@ -91,7 +92,13 @@ class ConfiguredAddon(AddonsServiceBaseModel):
 
     def save(self, *args, full_clean=True, **kwargs):
         id_ = self.pk
+        _is_update = not self._state.adding
         super().save(*args, full_clean=full_clean, **kwargs)
+        if _is_update:
+            # connected capabilities or root may have changed
+            invocation_result_cache.invalidate_account_results_on_commit(
+                self.base_account_id
+            )
         if not id_:  # If instance is created, not updated
             app.send_task(
                 "osf.tasks.log_gv_addon",
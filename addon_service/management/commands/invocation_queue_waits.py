@@ -0,0 +1,12 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from addon_service.tasks.invocation_scheduling import queue_wait_percentiles
+
+
+class Command(BaseCommand):
+    """show recent queue-wait percentiles (in seconds) for scheduled invocations"""
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(json.dumps(queue_wait_percentiles(), indent=2))
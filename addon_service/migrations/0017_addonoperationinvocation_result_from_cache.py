@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-19 08:39
+
+from django.db import (
+    migrations,
+    models,
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("addon_service", "0016_externallinkservice_int_supported_features_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="addonoperationinvocation",
+            name="result_from_cache",
+            field=models.BooleanField(default=False),
+        ),
+    ]
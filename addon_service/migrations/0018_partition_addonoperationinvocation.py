@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db import (
+    migrations,
+    models,
+)
+
+
+# (frozen here, as of this migration -- see `addon_operation_invocation.partitions`)
+_TABLE = "addon_service_addonoperationinvocation"
+_DEFAULT_PARTITION = f"{_TABLE}_pdefault"
+_STATUS_NAMES = {1: "STARTING", 2: "GOING", 3: "SUCCESS", 128: "ERROR"}
+_FINISHED_STATUS_NAMES = ("SUCCESS", "ERROR")
+
+
+def partition_invocation_table(apps, schema_editor):
+    _backfill_retention_days(schema_editor)
+    _rebuild_invocation_table(schema_editor, partitioned=True)
+
+
+def unpartition_invocation_table(apps, schema_editor):
+    _rebuild_invocation_table(schema_editor, partitioned=False)
+
+
+def _backfill_retention_days(schema_editor):
+    # each existing invocation's retention, by the policy in settings (each
+    # unfinished invocation gets the longest it may have once finished)
+    _connection = schema_editor.connection
+    _table = _connection.ops.quote_name(_TABLE)
+    with _connection.cursor() as _cursor:
+        _cursor.execute(
+            "SELECT DISTINCT operation_identifier, int_invocation_status FROM " + _table
+        )
+        for _operation_identifier, _int_status in _cursor.fetchall():
+            _operation_name = _operation_identifier.rpartition(":")[2]
+            _status_name = _STATUS_NAMES.get(_int_status)
+            _retention_days = max(
+                _retention_days_for(_operation_name, _finished_status_name)
+                for _finished_status_name in (
+                    (_status_name,)
+                    if _status_name in _FINISHED_STATUS_NAMES
+                    else _FINISHED_STATUS_NAMES
+                )
+            )
+            _cursor.execute(
+                f"UPDATE {_table} SET retention_days = %s"
+                " WHERE operation_identifier = %s AND int_invocation_status = %s",
+                [_retention_days, _operation_identifier, _int_status],
+            )
+
+
+def _retention_days_for(operation_name: str, status_name: str) -> int:
+    _policy = getattr(settings, "INVOCATION_RETENTION_POLICY", {})
+    for _policy_key in (f"{operation_name}:{status_name}", operation_name, status_name):
+        if _policy_key in _policy:
+            return _policy[_policy_key]
+    return getattr(settings, "INVOCATION_RETENTION_DAYS", 30)
+
+
+def _rebuild_invocation_table(schema_editor, *, partitioned: bool):
+    # replace the invocation table with a copy (partitioned or not),
+    # keeping the same rows, index names and foreign-key constraints
+    _connection = schema_editor.connection
+    if _connection.vendor != "postgresql":
+        return
+    _table = _connection.ops.quote_name(_TABLE)
+    _old_table = _connection.ops.quote_name(f"{_TABLE}_old")
+    with _connection.cursor() as _cursor:
+        _cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes"
+            " WHERE tablename = %s AND indexname NOT LIKE %s",
+            [_TABLE, "%_pkey"],
+        )
+        _index_defs = _cursor.fetchall()
+        _cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+            " WHERE conrelid = %s::regclass AND contype = 'f'",
+            [_TABLE],
+        )
+        _foreign_key_defs = _cursor.fetchall()
+        # set the old table aside, freeing its index names
+        _cursor.execute(f"ALTER TABLE {_table} RENAME TO {_old_table}")
+        for _index_name, _ in _index_defs:
+            _cursor.execute(f"DROP INDEX {_connection.ops.quote_name(_index_name)}")
+        _cursor.execute(
+            f"ALTER TABLE {_old_table} DROP CONSTRAINT"
+            f" {_connection.ops.quote_name(f'{_TABLE}_pkey')}"
+        )
+        _cursor.execute(
+            f"CREATE TABLE {_table}"
+            f" (LIKE {_old_table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            + (" PARTITION BY RANGE (created)" if partitioned else "")
+        )
+        if partitioned:
+            # primary key must include every partition key
+            _cursor.execute(
+                f"ALTER TABLE {_table} ADD PRIMARY KEY (id, created, retention_days)"
+            )
+            # (rows are moved into partitions by period once those are made; see
+            # `ensure_invocation_partitions`, run by `maintain_invocation_partitions`)
+            _cursor.execute(
+                f"CREATE TABLE {_connection.ops.quote_name(_DEFAULT_PARTITION)}"
+                f" PARTITION OF {_table} DEFAULT"
+            )
+        else:
+            _cursor.execute(f"ALTER TABLE {_table} ADD PRIMARY KEY (id)")
+        _cursor.execute(f"INSERT INTO {_table} SELECT * FROM {_old_table}")
+        _cursor.execute(f"DROP TABLE {_old_table}")
+        for _, _index_def in _index_defs:
+            _cursor.execute(_index_def)
+        for _constraint_name, _constraint_def in _foreign_key_defs:
+            _cursor.execute(
+                f"ALTER TABLE {_table} ADD CONSTRAINT"
+                f" {_connection.ops.quote_name(_constraint_name)} {_constraint_def}"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("addon_service", "0017_addonoperationinvocation_result_from_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="addonoperationinvocation",
+            name="retention_days",
+            field=models.PositiveIntegerField(default=30, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            partition_invocation_table,
+            unpartition_invocation_table,
+        ),
+    ]
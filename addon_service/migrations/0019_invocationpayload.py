@@ -0,0 +1,120 @@
+import hashlib
+import zlib
+
+import django.db.models.deletion
+from django.db import (
+    migrations,
+    models,
+)
+from django.utils import timezone
+
+
+def move_exception_contexts_to_payloads(apps, schema_editor):
+    AddonOperationInvocation = apps.get_model(
+        "addon_service", "AddonOperationInvocation"
+    )
+    InvocationPayload = apps.get_model("addon_service", "InvocationPayload")
+    _distinct_contexts = (
+        AddonOperationInvocation.objects.exclude(exception_context="")
+        .values_list("exception_context", flat=True)
+        .distinct()
+    )
+    for _context in _distinct_contexts.iterator():
+        _content_bytes = _context.encode()
+        _payload, _ = InvocationPayload.objects.get_or_create(
+            digest=hashlib.sha256(_content_bytes).hexdigest(),
+            defaults={
+                "compressed_content": zlib.compress(_content_bytes),
+                "content_length": len(_content_bytes),
+                "last_stored": timezone.now(),
+            },
+        )
+        AddonOperationInvocation.objects.filter(exception_context=_context).update(
+            exception_context_payload=_payload
+        )
+
+
+def move_exception_contexts_from_payloads(apps, schema_editor):
+    AddonOperationInvocation = apps.get_model(
+        "addon_service", "AddonOperationInvocation"
+    )
+    InvocationPayload = apps.get_model("addon_service", "InvocationPayload")
+    for _payload in InvocationPayload.objects.iterator():
+        AddonOperationInvocation.objects.filter(
+            exception_context_payload=_payload
+        ).update(
+            exception_context=zlib.decompress(_payload.compressed_content).decode()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("addon_service", "0018_partition_addonoperationinvocation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvocationPayload",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("compressed_content", models.BinaryField()),
+                ("content_length", models.PositiveIntegerField()),
+                ("last_stored", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="addonoperationinvocation",
+            name="exception_context_payload",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="addon_service.invocationpayload",
+            ),
+        ),
+        migrations.AddField(
+            model_name="addonoperationinvocation",
+            name="exception_fingerprint",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="addonoperationinvocation",
+            name="operation_result_payload",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="addon_service.invocationpayload",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            # same column, new field name
+            state_operations=[
+                migrations.RenameField(
+                    model_name="addonoperationinvocation",
+                    old_name="operation_result",
+                    new_name="operation_result_inline",
+                ),
+                migrations.AlterField(
+                    model_name="addonoperationinvocation",
+                    name="operation_result_inline",
+                    field=models.JSONField(
+                        blank=True,
+                        db_column="operation_result",
+                        default=None,
+                        null=True,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(
+            move_exception_contexts_to_payloads,
+            move_exception_contexts_from_payloads,
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import (
+    migrations,
+    models,
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("addon_service", "0019_invocationpayload"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="addonoperationinvocation",
+            name="exception_context",
+        ),
+        migrations.AddIndex(
+            model_name="addonoperationinvocation",
+            index=models.Index(
+                fields=["exception_fingerprint"], name="addon_servi_excepti_0f6bad_idx"
+            ),
+        ),
+    ]
@@ -2,7 +2,10 @@
 
 from addon_service.addon_imp.models import AddonImpModel
 from addon_service.addon_operation.models import AddonOperationModel
-from addon_service.addon_operation_invocation.models import AddonOperationInvocation
+from addon_service.addon_operation_invocation.models import (
+    AddonOperationInvocation,
+    InvocationPayload,
+)
 from addon_service.authorized_account.citation.models import AuthorizedCitationAccount
 from addon_service.authorized_account.computing.models import AuthorizedComputingAccount
 from addon_service.authorized_account.link.models import AuthorizedLinkAccount
@@ -47,4 +50,5 @@ __all__ = (
     "ExternalLinkService",
     "AuthorizedLinkAccount",
     "ConfiguredLinkAddon",
+    "InvocationPayload",
 )
@@ -134,6 +134,11 @@ class OAuth2TokenMetadata(AddonsServiceBaseModel):
     def update_with_fresh_token(
         self, fresh_token_result: FreshTokenResult
     ) -> tuple[AuthorizedAccount]:
+        # a new grant (not a refresh of the last), or other scopes, may mean other access
+        _access_changed = self.state_nonce is not None or (
+            fresh_token_result.scopes is not None
+            and set(fresh_token_result.scopes) != set(self.authorized_scopes or ())
+        )
         # update this record's fields
         self.state_nonce = None  # one-time-use, now used
         if fresh_token_result.refresh_token:
@@ -154,7 +159,10 @@ class OAuth2TokenMetadata(AddonsServiceBaseModel):
         )
         _accounts = tuple(self.authorized_accounts.all())
         for _account in _accounts:
-            _account.credentials = _credentials
+            if _access_changed:
+                _account.credentials = _credentials
+            else:  # (same access, so cached operation results still hold)
+                _account.set_refreshed_credentials(_credentials)
             _account.save()
         return _accounts
 
@@ -1,6 +1,9 @@
 from . import (
     clear_expired_sessions,
     invocation,
+    invocation_retention,
+    invocation_scheduling,
+    invocation_write_behind,
     key_rotation,
     osf_backchannel,
 )
@@ -8,6 +11,9 @@ from . import (
 
 __all__ = (
     "invocation",
+    "invocation_retention",
+    "invocation_scheduling",
+    "invocation_write_behind",
     "key_rotation",
     "osf_backchannel",
     "clear_expired_sessions",
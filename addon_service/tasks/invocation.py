@@ -1,26 +1,63 @@
+import dataclasses
+import datetime
+import json
+import time
+from collections import abc
+
 import celery
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 
-from addon_service.addon_imp.instantiation import get_addon_instance__blocking
+from addon_service.addon_imp.instantiation import (
+    get_addon_instance,
+    get_addon_instance__blocking,
+)
+from addon_service.authorized_account.models import AuthorizedAccount
+from addon_service.common import (
+    invocation_latency,
+    invocation_result_cache,
+)
 from addon_service.common.dibs import dibs
 from addon_service.common.invocation_status import InvocationStatus
+from addon_service.configured_addon.models import ConfiguredAddon
 from addon_service.models import (
     AddonOperationInvocation,
+    AddonOperationModel,
     AuthorizedStorageAccount,
 )
-from addon_toolkit.json_arguments import json_for_typed_value
+from addon_service.tasks.invocation_write_behind import record_invocation
+from addon_toolkit import AddonOperationType
+from addon_toolkit.json_arguments import (
+    json_for_dataclass,
+    json_for_typed_value,
+)
 
 
 __all__ = (
+    "aggregate_invocation__async",
+    "fail_stale_invocations",
+    "fail_stale_invocations__celery",
+    "perform_invocation__async",
     "perform_invocation__blocking",
     "perform_invocation__celery",
+    "revalidate_cached_result__celery",
+    "stream_invocation__async",
 )
 
 
 def perform_invocation__blocking(invocation: AddonOperationInvocation) -> None:
     """perform the given invocation: run an operation thru an addon and handle any errors"""
     # implemented as a sync function for django transactions
+    _cache_lookup = None
     try:
+        _cache_lookup = invocation_result_cache.lookup_cached_result(invocation)
+        if _cache_lookup is not None and _cache_lookup.is_hit:
+            _use_cached_result(invocation, _cache_lookup)
+            if _cache_lookup.is_stale and _cache_lookup.claim_revalidation():
+                _revalidate_later(invocation)
+            return
         _imp = get_addon_instance__blocking(
             invocation.imp_cls,  # type: ignore[arg-type]  #(TODO: generic impstantiation)
             invocation.thru_account,
@@ -29,7 +66,7 @@ def perform_invocation__blocking(invocation: AddonOperationInvocation) -> None:
         _operation = invocation.operation
         # inner transaction to contain database errors,
         # so status can be saved in the outer transaction (from `dibs`)
-        with transaction.atomic():
+        with transaction.atomic(), invocation_latency.timing(invocation):
             _result = _imp.invoke_operation__blocking(
                 _operation.declaration,
                 invocation.operation_kwargs,
@@ -39,18 +76,263 @@ def perform_invocation__blocking(invocation: AddonOperationInvocation) -> None:
             _result,
         )
         invocation.invocation_status = InvocationStatus.SUCCESS
+        if _cache_lookup is not None:
+            _cache_lookup.store(invocation.operation_result)
     except BaseException as _e:
         invocation.set_exception(_e)
+        if _cache_lookup is not None and not invocation.result_from_cache:
+            _cache_lookup.store_problem(_e)
         raise  # TODO: or swallow?
     finally:
-        invocation.save()
+        if _is_ephemeral_and_unsaved(invocation):
+            record_invocation(invocation)
+        else:
+            invocation.save()
+
+
+async def perform_invocation__async(invocation: AddonOperationInvocation) -> None:
+    """perform the given invocation on the running event loop (without a thread per call)
+
+    expects the invocation's account (and addon) already loaded with related objects
+    needed by permissions and imp instantiation (see `select_related` in the async view)
+    """
+    _cache_lookup = None
+    try:
+        _cache_lookup = await invocation_result_cache.lookup_cached_result__async(
+            invocation
+        )
+        if _cache_lookup is not None and _cache_lookup.is_hit:
+            _use_cached_result(invocation, _cache_lookup)
+            if (
+                _cache_lookup.is_stale
+                and await _cache_lookup.claim_revalidation__async()
+            ):
+                await sync_to_async(_revalidate_later)(invocation)
+            return
+        _imp = await get_addon_instance(
+            invocation.imp_cls,  # type: ignore[arg-type]  #(TODO: generic impstantiation)
+            invocation.thru_account,
+            await invocation.get_config__async(),
+        )
+        _operation = invocation.operation
+        async with invocation_latency.timing__async(invocation):
+            _result = await _imp.invoke_operation(
+                _operation.declaration,
+                invocation.operation_kwargs,
+            )
+        invocation.operation_result = json_for_typed_value(
+            _operation.declaration.result_dataclass,
+            _result,
+        )
+        invocation.invocation_status = InvocationStatus.SUCCESS
+        if _cache_lookup is not None:
+            await _cache_lookup.store__async(invocation.operation_result)
+    except BaseException as _e:
+        invocation.set_exception(_e)
+        if _cache_lookup is not None and not invocation.result_from_cache:
+            await _cache_lookup.store_problem__async(_e)
+        raise
+    finally:
+        if _is_ephemeral_and_unsaved(invocation):
+            await sync_to_async(record_invocation)(invocation)
+        else:
+            await invocation.asave()
+
+
+async def stream_invocation__async(
+    invocation: AddonOperationInvocation,
+) -> abc.AsyncIterator:
+    """perform a listing invocation, yielding json for each result item as it comes
+
+    (results are sent on, not kept -- the invocation is saved without `operation_result`,
+    and the result cache is neither read nor written)
+    """
+    try:
+        _imp = await get_addon_instance(
+            invocation.imp_cls,  # type: ignore[arg-type]  #(TODO: generic impstantiation)
+            invocation.thru_account,
+            await invocation.get_config__async(),
+        )
+        async for _item in _imp.iter_operation_items(
+            invocation.operation.declaration,
+            invocation.operation_kwargs,
+        ):
+            yield (
+                json_for_dataclass(_item) if dataclasses.is_dataclass(_item) else _item
+            )
+        invocation.invocation_status = InvocationStatus.SUCCESS
+    except BaseException as _e:
+        invocation.set_exception(_e)
+        raise
+    finally:
+        if _is_ephemeral_and_unsaved(invocation):
+            await sync_to_async(record_invocation)(invocation)
+        else:
+            await invocation.asave()
+
+
+async def aggregate_invocation__async(invocation: AddonOperationInvocation) -> None:
+    """perform a listing invocation, following cursors for as many pages as allowed
+
+    the invocation's result is the pages merged into one: all their items, with the
+    first page's `this_sample_cursor` and the last page's `next_sample_cursor` (so a
+    client may continue from there, if limits were reached before the last page)
+
+    pages are added while within `INVOCATION_AGGREGATE_MAX_ITEMS` and
+    `INVOCATION_AGGREGATE_MAX_BYTES` (of items, as json) -- but always at least one --
+    and no more are fetched after `INVOCATION_AGGREGATE_MAX_SECONDS`
+
+    (the result cache is neither read nor written)
+    """
+    _give_up_at = time.monotonic() + settings.INVOCATION_AGGREGATE_MAX_SECONDS
+    try:
+        _imp = await get_addon_instance(
+            invocation.imp_cls,  # type: ignore[arg-type]  #(TODO: generic impstantiation)
+            invocation.thru_account,
+            await invocation.get_config__async(),
+        )
+        _declaration = invocation.operation.declaration
+        _merged_result: dict | None = None
+        _item_bytes = 0
+        async for _page in _imp.iter_operation_pages(
+            _declaration, invocation.operation_kwargs
+        ):
+            _page_json = json_for_typed_value(_declaration.result_dataclass, _page)
+            _page_bytes = len(json.dumps(_page_json["items"]))
+            if _merged_result is None:
+                _merged_result = _page_json
+            elif (
+                len(_merged_result["items"]) + len(_page_json["items"])
+                > settings.INVOCATION_AGGREGATE_MAX_ITEMS
+            ) or (_item_bytes + _page_bytes > settings.INVOCATION_AGGREGATE_MAX_BYTES):
+                break  # (next_sample_cursor still points at this page)
+            else:
+                _merged_result["items"].extend(_page_json["items"])
+                # the last page's cursor (if any; omitted when none)
+                _merged_result.pop("next_sample_cursor", None)
+                if "next_sample_cursor" in _page_json:
+                    _merged_result["next_sample_cursor"] = _page_json[
+                        "next_sample_cursor"
+                    ]
+            _item_bytes += _page_bytes
+            if time.monotonic() >= _give_up_at:
+                break
+        invocation.operation_result = _merged_result
+        invocation.invocation_status = InvocationStatus.SUCCESS
+    except BaseException as _e:
+        invocation.set_exception(_e)
+        raise
+    finally:
+        if _is_ephemeral_and_unsaved(invocation):
+            await sync_to_async(record_invocation)(invocation)
+        else:
+            await invocation.asave()
 
 
 @celery.shared_task(acks_late=True)
 def perform_invocation__celery(invocation_pk: str) -> None:
     invocation = AddonOperationInvocation.objects.get(pk=invocation_pk)
-    with dibs(invocation):  # TODO: handle dibs errors
-        perform_invocation__blocking(invocation)
+    try:
+        with dibs(invocation):  # TODO: handle dibs errors
+            invocation.invocation_status = InvocationStatus.GOING
+            invocation.publish_status()  # (saved along with the outcome)
+            perform_invocation__blocking(invocation)
+    finally:
+        if invocation.operation.operation_type is not AddonOperationType.EVENTUAL:
+            # promoted from immediate (see `invocation_latency`); not published on save
+            invocation.publish_status()
+
+
+@celery.shared_task(acks_late=True)
+def revalidate_cached_result__celery(
+    operation_identifier: str,
+    operation_kwargs: dict,
+    thru_account_pk: str,
+    thru_addon_pk: str | None,
+) -> None:
+    """perform an operation only to refresh its (stale) cached result"""
+    # unsaved invocation, just to hold the operation and its context
+    _invocation = AddonOperationInvocation(
+        operation_identifier=operation_identifier,
+        operation_kwargs=operation_kwargs,
+        thru_account=AuthorizedAccount.objects.get(pk=thru_account_pk),
+        thru_addon=(
+            ConfiguredAddon.objects.get(pk=thru_addon_pk)
+            if thru_addon_pk is not None
+            else None
+        ),
+    )
+    _cache_lookup = invocation_result_cache.lookup_cached_result(_invocation)
+    if _cache_lookup is None:
+        return
+    _imp = get_addon_instance__blocking(
+        _invocation.imp_cls,  # type: ignore[arg-type]  #(TODO: generic impstantiation)
+        _invocation.thru_account,
+        _invocation.config,
+    )
+    _declaration = _invocation.operation.declaration
+    _result = _imp.invoke_operation__blocking(_declaration, operation_kwargs)
+    _cache_lookup.store(json_for_typed_value(_declaration.result_dataclass, _result))
+
+
+def fail_stale_invocations() -> int:
+    """mark as failed each immediate (or redirect) invocation still going after
+    `INVOCATION_STALE_GOING_TIMEOUT_SECONDS` -- presumably lost with the process
+    performing it (e.g. finishing in the background; see `_perform_immediate__async`)
+
+    (eventual invocations, and immediate ones promoted to wait in line or performed by
+    a worker, are left to the scheduler) returns how many were failed
+    """
+    # (imported here; the scheduler performs invocations with this module)
+    from addon_service.tasks.invocation_scheduling import scheduled_invocation_pks
+
+    _stale_before = timezone.now() - datetime.timedelta(
+        seconds=settings.INVOCATION_STALE_GOING_TIMEOUT_SECONDS
+    )
+    _stale_pks = list(
+        AddonOperationInvocation.objects.filter(
+            int_invocation_status=InvocationStatus.GOING.value,
+            modified__lt=_stale_before,
+            operation_identifier__in=[
+                _operation.static_key
+                for _operation in AddonOperationModel.iter_all()
+                if _operation.operation_type is not AddonOperationType.EVENTUAL
+            ],
+        ).values_list("pk", flat=True)
+    )
+    if _stale_pks:
+        _scheduled_pks = scheduled_invocation_pks()
+        _stale_pks = [_pk for _pk in _stale_pks if _pk not in _scheduled_pks]
+    _failed_count = 0
+    for _pk in _stale_pks:
+        with transaction.atomic():
+            _invocation = (
+                AddonOperationInvocation.objects.select_for_update()
+                .filter(
+                    pk=_pk,
+                    int_invocation_status=InvocationStatus.GOING.value,
+                    modified__lt=_stale_before,
+                )
+                .first()
+            )
+            if _invocation is None:
+                continue  # (finished meanwhile)
+            _invocation.set_exception(
+                TimeoutError(
+                    "still going after"
+                    f" {settings.INVOCATION_STALE_GOING_TIMEOUT_SECONDS} seconds"
+                )
+            )
+            _invocation.save()
+            # (immediate invocations do not publish status on save)
+            transaction.on_commit(_invocation.publish_status, robust=True)
+        _failed_count += 1
+    return _failed_count
+
+
+@celery.shared_task(acks_late=True)
+def fail_stale_invocations__celery() -> None:
+    fail_stale_invocations()
 
 
 @celery.shared_task(acks_late=True)
@@ -58,3 +340,33 @@ def refresh_oauth_access_token__celery(authorized_account_pk: str):
     AuthorizedStorageAccount.objects.get(
         pk=authorized_account_pk
     ).refresh_oauth_access_token__blocking(force=True)
+
+
+###
+# module-private helpers
+
+
+def _use_cached_result(
+    invocation: AddonOperationInvocation,
+    cache_lookup: invocation_result_cache.ResultCacheLookup,
+) -> None:
+    invocation.result_from_cache = True
+    _cached_problem = cache_lookup.get_cached_problem()
+    if _cached_problem is not None:
+        raise _cached_problem
+    invocation.operation_result = cache_lookup.cached_result
+    invocation.invocation_status = InvocationStatus.SUCCESS
+
+
+def _is_ephemeral_and_unsaved(invocation: AddonOperationInvocation) -> bool:
+    # ephemeral invocations are saved (if at all) by write-behind, unless already saved
+    return invocation.is_ephemeral and invocation._state.adding
+
+
+def _revalidate_later(invocation: AddonOperationInvocation) -> None:
+    revalidate_cached_result__celery.delay(
+        invocation.operation_identifier,
+        invocation.operation_kwargs,
+        invocation.thru_account_id,
+        invocation.thru_addon_id,
+    )
@@ -0,0 +1,30 @@
+import logging
+
+import celery
+
+from addon_service.addon_operation_invocation import partitions
+from addon_service.models import InvocationPayload
+
+
+__all__ = ("maintain_invocation_partitions__celery",)
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery.shared_task(acks_late=True)
+def maintain_invocation_partitions__celery() -> None:
+    """create partitions for invocations to come, drop partitions past retention
+
+    (and delete side-stored payloads no longer referred to by any invocation)
+    """
+    _created = partitions.ensure_invocation_partitions()
+    _dropped = partitions.prune_invocation_partitions()
+    _pruned_payload_count = InvocationPayload.prune_unused()
+    logger.info(
+        "invocation partitions: created %d, dropped %d (%s); pruned %d payloads",
+        len(_created),
+        len(_dropped),
+        ", ".join(_dropped),
+        _pruned_payload_count,
+    )
@@ -0,0 +1,300 @@
+"""fair-share scheduling for eventual invocations
+
+eventual invocations wait in redis sub-queues (one per urgency class, user and external
+service) and are dispatched round-robin across sub-queues, so one user (or one slow
+service) with much to do cannot keep everyone else waiting:
+
+- at most `INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER` invocations per user (and
+  `INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE` per external service) run at once;
+  others wait their turn
+- a user's invocations go to the REACTIVE celery queue, unless that user already has
+  `INVOCATION_SCHEDULER_BULK_THRESHOLD` or more waiting or running -- then to CHILL
+- the urgency classes are visited in weighted round-robin (by
+  `INVOCATION_SCHEDULER_CLASS_WEIGHTS`), so bulk work still moves, only slower
+
+dispatching happens whenever an invocation is scheduled or finishes (and periodically,
+in case a worker died mid-invocation -- its slot is freed after
+`INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS`)
+
+recent queue-wait times are kept for each urgency class (see `queue_wait_percentiles`)
+"""
+
+import json
+import logging
+import math
+import time
+
+import celery
+from django.conf import settings
+from redis.exceptions import LockNotOwnedError
+
+from addon_service.common.redis_client import get_redis_client
+from addon_service.models import AddonOperationInvocation
+from addon_service.tasks.invocation import perform_invocation__celery
+from app.celery import TaskUrgency
+
+
+__all__ = (
+    "SCHEDULED_URGENCIES",
+    "dispatch_scheduled_invocations",
+    "dispatch_scheduled_invocations__celery",
+    "perform_scheduled_invocation__celery",
+    "queue_wait_percentiles",
+    "schedule_invocation",
+    "scheduled_invocation_pks",
+)
+
+_logger = logging.getLogger(__name__)
+
+SCHEDULED_URGENCIES = (TaskUrgency.REACTIVE, TaskUrgency.CHILL)
+
+_KEY_PREFIX = "gv:invocation-scheduling"
+_ACTIVE_SUBQUEUES_KEY = f"{_KEY_PREFIX}:active"
+_WAKE_KEY = f"{_KEY_PREFIX}:wake"
+_DISPATCH_LOCK_KEY = f"{_KEY_PREFIX}:dispatching"
+_DISPATCH_LOCK_TIMEOUT = 60  # seconds
+_QUEUE_WAIT_SAMPLES = 1000  # per urgency class
+
+
+def schedule_invocation(invocation: AddonOperationInvocation) -> None:
+    """put a (saved) eventual invocation in line to be performed, and dispatch what may be"""
+    _client = get_redis_client()
+    _user_pk = invocation.by_user_id
+    _service_pk = invocation.thru_account.external_service_id
+    _user_load = int(_client.get(_queued_key(_user_pk)) or 0) + _in_flight_count(
+        _client, _user_in_flight_key(_user_pk)
+    )
+    _urgency = (
+        TaskUrgency.CHILL
+        if _user_load >= settings.INVOCATION_SCHEDULER_BULK_THRESHOLD
+        else TaskUrgency.REACTIVE
+    )
+    _subqueue = _subqueue_name(_urgency, _user_pk, _service_pk)
+    with _client.pipeline() as _pipeline:
+        _pipeline.rpush(
+            _subqueue_key(_subqueue),
+            json.dumps(
+                {
+                    "invocation_pk": invocation.pk,
+                    "user_pk": _user_pk,
+                    "service_pk": _service_pk,
+                    "scheduled_at": time.time(),
+                }
+            ),
+        )
+        _pipeline.incr(_queued_key(_user_pk))
+        _pipeline.execute()
+    _activate_subqueue(_client, _subqueue)
+    dispatch_scheduled_invocations()
+
+
+def dispatch_scheduled_invocations() -> int:
+    """send waiting invocations to celery, as far as in-flight limits allow
+
+    only one process dispatches at a time (others just leave a note to look again);
+    returns how many invocations this call dispatched
+    """
+    _client = get_redis_client()
+    _client.set(_WAKE_KEY, 1)
+    _dispatched = 0
+    while _client.exists(_WAKE_KEY):
+        _lock = _client.lock(_DISPATCH_LOCK_KEY, timeout=_DISPATCH_LOCK_TIMEOUT)
+        if not _lock.acquire(blocking=False):
+            break  # whoever holds the lock will see the note
+        try:
+            while _client.delete(_WAKE_KEY):
+                _dispatched += _dispatch_pass(_client)
+        finally:
+            try:
+                _lock.release()
+            except LockNotOwnedError:
+                # (held past its timeout, so maybe taken by another meanwhile)
+                _logger.warning(
+                    "invocation dispatch lock expired after %ds", _DISPATCH_LOCK_TIMEOUT
+                )
+    return _dispatched
+
+
+def scheduled_invocation_pks() -> set[str]:
+    """pks of invocations waiting in line or in flight (not yet known to be finished)"""
+    _client = get_redis_client()
+    _pks = set()
+    for _key in _client.scan_iter(f"{_KEY_PREFIX}:subqueue:*"):
+        _pks.update(
+            json.loads(_entry_json)["invocation_pk"]
+            for _entry_json in _client.lrange(_key, 0, -1)
+        )
+    for _key in _client.scan_iter(f"{_KEY_PREFIX}:in-flight:user:*"):
+        _pks.update(_pk.decode() for _pk in _client.zrange(_key, 0, -1))
+    return _pks
+
+
+def queue_wait_percentiles(
+    percentiles: tuple[int, ...] = (50, 90, 99),
+) -> dict[str, dict[str, float]]:
+    """recent queue-wait times (in seconds) by urgency class, e.g. {"REACTIVE": {"p50": 0.2}}"""
+    _client = get_redis_client()
+    _waits = {}
+    for _urgency in SCHEDULED_URGENCIES:
+        _samples = sorted(
+            float(_sample) for _sample in _client.lrange(_waits_key(_urgency), 0, -1)
+        )
+        _waits[_urgency.name] = {
+            f"p{_percentile}": _nearest_rank(_samples, _percentile)
+            for _percentile in percentiles
+            if _samples
+        }
+    return _waits
+
+
+@celery.shared_task(acks_late=True)
+def perform_scheduled_invocation__celery(
+    invocation_pk: str, user_pk: str, service_pk: str
+) -> None:
+    try:
+        perform_invocation__celery(invocation_pk)
+    finally:
+        _client = get_redis_client()
+        with _client.pipeline() as _pipeline:
+            _pipeline.zrem(_user_in_flight_key(user_pk), invocation_pk)
+            _pipeline.zrem(_service_in_flight_key(service_pk), invocation_pk)
+            _pipeline.execute()
+        dispatch_scheduled_invocations()
+
+
+@celery.shared_task(acks_late=True)
+def dispatch_scheduled_invocations__celery() -> None:
+    _dispatched = dispatch_scheduled_invocations()
+    if _dispatched:
+        _logger.info("dispatched %d waiting invocations", _dispatched)
+
+
+###
+# module-private helpers
+
+
+def _dispatch_pass(client) -> int:
+    # visit sub-queues round-robin (urgency classes by weight) until none may dispatch
+    _dispatched = 0
+    _passed_over: dict[TaskUrgency, list[str]] = {
+        _urgency: [] for _urgency in SCHEDULED_URGENCIES
+    }
+    _visited_any = True
+    while _visited_any:
+        _visited_any = False
+        for _urgency in _weighted_urgencies():
+            _subqueue = client.lpop(_ring_key(_urgency))
+            if _subqueue is None:
+                continue
+            _visited_any = True
+            _subqueue = _subqueue.decode()
+            if not client.llen(_subqueue_key(_subqueue)):
+                _reactivate_subqueue(client, _subqueue)  # (or not, if empty)
+            elif _dispatch_from(client, _subqueue):
+                _dispatched += 1
+                _reactivate_subqueue(client, _subqueue)
+            else:
+                _passed_over[_urgency].append(_subqueue)
+    for _urgency, _subqueues in _passed_over.items():
+        if _subqueues:
+            client.rpush(_ring_key(_urgency), *_subqueues)
+    return _dispatched
+
+
+def _dispatch_from(client, subqueue: str) -> bool:
+    _urgency_name, _user_pk, _service_pk = subqueue.split(":", maxsplit=2)
+    _user_key = _user_in_flight_key(_user_pk)
+    _service_key = _service_in_flight_key(_service_pk)
+    if (
+        _in_flight_count(client, _user_key)
+        >= settings.INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER
+    ) or (
+        _in_flight_count(client, _service_key)
+        >= settings.INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE
+    ):
+        return False
+    _entry_json = client.lpop(_subqueue_key(subqueue))
+    if _entry_json is None:
+        return False
+    _entry = json.loads(_entry_json)
+    _urgency = TaskUrgency[_urgency_name]
+    _now = time.time()
+    with client.pipeline() as _pipeline:
+        _pipeline.zadd(_user_key, {_entry["invocation_pk"]: _now})
+        _pipeline.zadd(_service_key, {_entry["invocation_pk"]: _now})
+        _pipeline.decr(_queued_key(_user_pk))
+        _pipeline.lpush(_waits_key(_urgency), _now - _entry["scheduled_at"])
+        _pipeline.ltrim(_waits_key(_urgency), 0, _QUEUE_WAIT_SAMPLES - 1)
+        _pipeline.execute()
+    perform_scheduled_invocation__celery.apply_async(
+        (_entry["invocation_pk"], _entry["user_pk"], _entry["service_pk"]),
+        queue=_urgency.queue_name(),
+    )
+    return True
+
+
+def _activate_subqueue(client, subqueue: str) -> None:
+    # put the sub-queue in its ring (unless already there, or being dispatched from)
+    if client.sadd(_ACTIVE_SUBQUEUES_KEY, subqueue):
+        _urgency_name, _ = subqueue.split(":", maxsplit=1)
+        client.rpush(_ring_key(TaskUrgency[_urgency_name]), subqueue)
+
+
+def _reactivate_subqueue(client, subqueue: str) -> None:
+    # back of the line, if anything is left (careful of concurrent `schedule_invocation`)
+    client.srem(_ACTIVE_SUBQUEUES_KEY, subqueue)
+    if client.llen(_subqueue_key(subqueue)):
+        _activate_subqueue(client, subqueue)
+
+
+def _in_flight_count(client, in_flight_key: str) -> int:
+    # (forget invocations that have been "in flight" implausibly long)
+    client.zremrangebyscore(
+        in_flight_key,
+        "-inf",
+        time.time() - settings.INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS,
+    )
+    return client.zcard(in_flight_key)
+
+
+def _weighted_urgencies() -> list[TaskUrgency]:
+    return [
+        _urgency
+        for _urgency in SCHEDULED_URGENCIES
+        for _ in range(
+            settings.INVOCATION_SCHEDULER_CLASS_WEIGHTS.get(_urgency.name, 1)
+        )
+    ]
+
+
+def _nearest_rank(sorted_samples: list[float], percentile: int) -> float:
+    _rank = math.ceil(len(sorted_samples) * percentile / 100)
+    return sorted_samples[max(_rank, 1) - 1]
+
+
+def _subqueue_name(urgency: TaskUrgency, user_pk, service_pk) -> str:
+    return f"{urgency.name}:{user_pk}:{service_pk}"
+
+
+def _subqueue_key(subqueue: str) -> str:
+    return f"{_KEY_PREFIX}:subqueue:{subqueue}"
+
+
+def _ring_key(urgency: TaskUrgency) -> str:
+    return f"{_KEY_PREFIX}:ring:{urgency.name}"
+
+
+def _queued_key(user_pk) -> str:
+    return f"{_KEY_PREFIX}:queued:user:{user_pk}"
+
+
+def _user_in_flight_key(user_pk) -> str:
+    return f"{_KEY_PREFIX}:in-flight:user:{user_pk}"
+
+
+def _service_in_flight_key(service_pk) -> str:
+    return f"{_KEY_PREFIX}:in-flight:service:{service_pk}"
+
+
+def _waits_key(urgency: TaskUrgency) -> str:
+    return f"{_KEY_PREFIX}:waits:{urgency.name}"
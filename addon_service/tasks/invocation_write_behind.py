@@ -0,0 +1,131 @@
+"""write-behind for "ephemeral" invocations (see `AddonOperationDeclaration.ephemeral_invocation`)
+
+ephemeral invocations are not saved before responding -- instead, a (possibly sampled,
+but never for failures) record of each is buffered in-process and saved in batches by a celery task, once the
+buffer holds `EPHEMERAL_INVOCATION_BATCH_SIZE` records or its oldest record has waited
+`EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS` (on a timer started with that record), and at exit
+
+(a process that dies abruptly may lose its buffered records -- acceptable for
+read-only operations, which is all that may be ephemeral)
+"""
+
+import atexit
+import datetime
+import random
+import threading
+
+import celery
+from django.conf import settings
+from django.utils import timezone
+
+from addon_service.common.invocation_status import InvocationStatus
+from addon_service.models import AddonOperationInvocation
+
+
+__all__ = (
+    "flush_invocation_records",
+    "record_invocation",
+    "save_invocation_records__celery",
+)
+
+
+_buffer_lock = threading.Lock()
+_buffered_records: list[dict] = []
+_flush_timer: threading.Timer | None = None  # started with the oldest buffered record
+
+
+def record_invocation(invocation: AddonOperationInvocation) -> None:
+    """buffer a record of the (performed, unsaved) invocation, to be saved later"""
+    if (
+        invocation.invocation_status is not InvocationStatus.ERROR  # (always kept)
+        and random.random() >= settings.EPHEMERAL_INVOCATION_SAMPLE_RATE
+    ):
+        return  # not sampled
+    _record = _record_from_invocation(invocation)
+    _batch = None
+    with _buffer_lock:
+        if not _buffered_records:
+            _start_flush_timer()
+        _buffered_records.append(_record)
+        if len(_buffered_records) >= settings.EPHEMERAL_INVOCATION_BATCH_SIZE:
+            _batch = _take_buffered_records()
+    if _batch:
+        save_invocation_records__celery.delay(_batch)
+
+
+def flush_invocation_records() -> None:
+    """send any buffered records to be saved now"""
+    with _buffer_lock:
+        _batch = _take_buffered_records()
+    if _batch:
+        save_invocation_records__celery.delay(_batch)
+
+
+atexit.register(flush_invocation_records)
+
+
+@celery.shared_task(acks_late=True)
+def save_invocation_records__celery(invocation_records: list[dict]) -> None:
+    _invocations = [
+        AddonOperationInvocation(**_record) for _record in invocation_records
+    ]
+    # (the primary key includes the partition keys, so conflicts alone would not
+    # catch an invocation saved before with another retention -- see `partitions`)
+    _saved_ids = set(
+        AddonOperationInvocation.objects.filter(
+            pk__in=[_invocation.pk for _invocation in _invocations]
+        ).values_list("pk", flat=True)
+    )
+    _invocations = [
+        _invocation for _invocation in _invocations if _invocation.pk not in _saved_ids
+    ]
+    for _invocation in _invocations:
+        _invocation.store_payloads()
+    AddonOperationInvocation.objects.bulk_create(_invocations, ignore_conflicts=True)
+
+
+###
+# module-private helpers
+
+
+def _start_flush_timer() -> None:
+    # expects _buffer_lock held
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = threading.Timer(
+            settings.EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS, _flush_on_timer
+        )
+        _flush_timer.daemon = True  # (flushed at exit regardless)
+        _flush_timer.start()
+
+
+def _flush_on_timer() -> None:
+    flush_invocation_records()
+
+
+def _take_buffered_records() -> list[dict]:
+    # expects _buffer_lock held
+    global _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.cancel()  # (nothing left to wait for)
+        _flush_timer = None
+    _batch = list(_buffered_records)
+    _buffered_records.clear()
+    return _batch
+
+
+def _record_from_invocation(invocation: AddonOperationInvocation) -> dict:
+    # field values by attname (e.g. `thru_account_id`), in json-friendly form for celery
+    _now = timezone.now()
+    invocation.created = invocation.created or _now
+    invocation.modified = _now
+    invocation.set_retention_days()
+    _record = {}
+    for _field in AddonOperationInvocation._meta.concrete_fields:
+        _value = _field.value_from_object(invocation)
+        if isinstance(_value, datetime.datetime):
+            _value = _value.isoformat()
+        _record[_field.attname] = _value
+    # (traceback to be stored with the record; see `AddonOperationInvocation.store_payloads`)
+    _record["exception_context"] = invocation.exception_context
+    return _record
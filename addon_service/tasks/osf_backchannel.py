@@ -2,6 +2,8 @@ import logging
 
 import celery
 
+from addon_service.common.osf_permission_cache import invalidate_osf_permissions
+from addon_service.common.osf_token_cache import forget_user_tokens
 from addon_service.models import UserReference
 
 
@@ -22,6 +24,13 @@ def get_handler_signature(message_body_json: dict):
                 into_user_uri=message_body_json["into_user_uri"],
                 from_user_uri=message_body_json["from_user_uri"],
             )
+        case "permissions_changed":
+            _signature = osf_permissions_changed.s(
+                resource_uri=message_body_json.get("resource_uri"),
+                user_uri=message_body_json.get("user_uri"),
+            )
+        case "tokens_revoked":
+            _signature = osf_tokens_revoked.s(user_uri=message_body_json["user_uri"])
         case _:
             raise NotImplementedError(f"Action {_action} is not Implemented")
     logger.info(
@@ -32,6 +41,8 @@ def get_handler_signature(message_body_json: dict):
 
 @celery.shared_task(acks_late=True)
 def user_deactivated(user_uri: str):
+    invalidate_osf_permissions(user_uri=user_uri)
+    forget_user_tokens(user_uri)
     try:
         UserReference.objects.get(user_uri=user_uri).deactivate()
     except UserReference.DoesNotExist:
@@ -40,6 +51,7 @@ def user_deactivated(user_uri: str):
 
 @celery.shared_task(acks_late=True)
 def user_reactivated(user_uri: str):
+    invalidate_osf_permissions(user_uri=user_uri)
     try:
         UserReference.objects.get(user_uri=user_uri).reactivate()
     except UserReference.DoesNotExist:
@@ -48,6 +60,9 @@ def user_reactivated(user_uri: str):
 
 @celery.shared_task(acks_late=True)
 def users_merged(into_user_uri: str, from_user_uri: str):
+    invalidate_osf_permissions(user_uri=into_user_uri)
+    invalidate_osf_permissions(user_uri=from_user_uri)
+    forget_user_tokens(from_user_uri)
     try:
         _from_user = UserReference.objects.get(user_uri=from_user_uri)
     except UserReference.DoesNotExist:
@@ -55,3 +70,15 @@ def users_merged(into_user_uri: str, from_user_uri: str):
     else:
         _into_user = UserReference.objects.get_or_create(user_uri=into_user_uri)
         _into_user.merge(_from_user)
+
+
+@celery.shared_task(acks_late=True)
+def osf_permissions_changed(resource_uri: str | None, user_uri: str | None):
+    # drop cached permissions on the resource (or for the user, or both)
+    invalidate_osf_permissions(resource_uri=resource_uri, user_uri=user_uri)
+
+
+@celery.shared_task(acks_late=True)
+def osf_tokens_revoked(user_uri: str):
+    # drop cached personal access tokens for the user (osf says which user, not which token)
+    forget_user_tokens(user_uri)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import contextlib
 import dataclasses
+import json
 import secrets
 from collections import defaultdict
 from http import HTTPStatus
@@ -25,10 +26,15 @@ from django.urls import reverse
 from rest_framework.test import APIRequestFactory
 from rest_framework_json_api.utils import get_resource_type_from_model
 
-from addon_service.common.aiohttp_session import get_singleton_client_session
+from addon_service.common.aiohttp_session import (
+    close_singleton_client_session__blocking,
+    get_singleton_client_session,
+)
+from addon_service.models import UserReference
 
 
 if TYPE_CHECKING:
+    from addon_service.configured_addon.storage.models import ConfiguredStorageAddon
     from addon_service.external_service.storage import ExternalStorageService
 
 
@@ -62,10 +68,22 @@ class MockOSF:
                 "addon_service.authentication.GVCombinedAuthentication.authenticate",
                 side_effect=self._mock_user_check,
             ),
+            patch(
+                "addon_service.authentication.GVCombinedAuthentication.authenticate__async",
+                side_effect=self._mock_user_check__async,
+            ),
             patch(
                 "addon_service.common.osf.has_osf_permission_on_resource",
                 side_effect=self._mock_resource_check,
             ),
+            patch(
+                "addon_service.common.osf.has_osf_permission_on_resource__async",
+                side_effect=self._mock_resource_check__async,
+            ),
+            patch(
+                "addon_service.common.osf.prefetch_osf_permissions__async",
+                side_effect=self._mock_prefetch__async,
+            ),
             patch_encryption_key_derivation(),
         ):
             yield self
@@ -105,17 +123,34 @@ class MockOSF:
         # replaces `authenticate` on a custom rest_framework authenticator:
         # https://www.django-rest-framework.org/api-guide/authentication/#custom-authentication
         caller_uri = self._get_assumed_caller(request)
+        if caller_uri:
+            request.user_uri = caller_uri  # (like `GVCombinedAuthentication`)
         return (
             (None, None)  # success! return a tuple (values here yet unused)
             if caller_uri
             else None  # failure! return None
         )
 
+    async def _mock_user_check__async(self, request):
+        # replaces `GVCombinedAuthentication.authenticate__async` (for async views)
+        caller_uri = self._get_assumed_caller(request)
+        if not caller_uri:
+            return None
+        _user, _ = await UserReference.objects.aget_or_create(user_uri=caller_uri)
+        request.user_uri = caller_uri
+        return _user
+
     def _mock_resource_check(self, request, uri, required_permission, *args, **kwargs):
         caller = self._get_assumed_caller(request)
         permissions = self._get_user_permissions(user_uri=caller, resource_uri=uri)
         return bool(required_permission.lower() in permissions)
 
+    async def _mock_resource_check__async(self, *args, **kwargs):
+        return self._mock_resource_check(*args, **kwargs)
+
+    async def _mock_prefetch__async(self, request, resource_uris):
+        pass  # (each check is answered by `_mock_resource_check` anyway)
+
 
 class MockOAuth2ExternalService:
     def __init__(self, external_service):
@@ -285,3 +320,96 @@ def patch_encryption_key_derivation():
         return_value=_some_random_key,
     ):
         yield
+
+
+class InvocationViewTestMixin:
+    """for tests of the addon operation invocation views (mixed into `APITestCase`)
+
+    expects a `_configured_addon`, whose owner is the caller (see `MockOSF`) and
+    thru which invocations are posted, unless given another addon or account
+    """
+
+    _configured_addon: ConfiguredStorageAddon
+    _invocation_view_name = "addon-operation-invocations-list"
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(close_singleton_client_session__blocking)
+        self._mock_osf = MockOSF()
+        self._mock_osf.configure_assumed_caller(self._configured_addon.owner_uri)
+        self.enterContext(self._mock_osf.mocking())
+
+    def _invocation_resource(
+        self,
+        operation_name: str = "list_root_items",
+        operation_kwargs: dict | None = None,
+        *,
+        thru_addon=None,
+        thru_account=None,
+    ) -> dict:
+        """a json:api resource object for creating an invocation"""
+        if thru_addon is None and thru_account is None:
+            thru_addon = self._configured_addon
+        _relationships = {}
+        if thru_addon is not None:
+            _relationships["thru_addon"] = {"data": jsonapi_ref(thru_addon)}
+        if thru_account is not None:
+            _relationships["thru_account"] = {"data": jsonapi_ref(thru_account)}
+        return {
+            "type": "addon-operation-invocations",
+            "attributes": {
+                "operation_name": operation_name,
+                "operation_kwargs": operation_kwargs or {},
+            },
+            "relationships": _relationships,
+        }
+
+    def _post_invocation(
+        self,
+        operation_name: str = "list_root_items",
+        operation_kwargs: dict | None = None,
+        *,
+        view_name: str | None = None,
+        headers: dict | None = None,
+        **relationships,
+    ):
+        """post a json:api document creating an invocation (to `_invocation_view_name`)"""
+        return self._post_invocation_data(
+            view_name or self._invocation_view_name,
+            self._invocation_resource(
+                operation_name, operation_kwargs, **relationships
+            ),
+            headers=headers,
+        )
+
+    async def _post_invocation__async(
+        self,
+        operation_name: str = "list_root_items",
+        operation_kwargs: dict | None = None,
+        *,
+        view_name: str | None = None,
+        **relationships,
+    ):
+        """(same as `_post_invocation`, with the async test client)"""
+        return await self.async_client.post(
+            reverse(view_name or self._invocation_view_name),
+            data=json.dumps(
+                {
+                    "data": self._invocation_resource(
+                        operation_name, operation_kwargs, **relationships
+                    )
+                }
+            ),
+            content_type="application/vnd.api+json",
+        )
+
+    def _post_invocation_data(
+        self, view_name: str, data: dict | list, *, headers: dict | None = None
+    ):
+        """post the given json:api primary data (one resource object, or a list)"""
+        return self.client.post(
+            reverse(view_name),
+            data=json.dumps({"data": data}),
+            content_type="application/vnd.api+json",
+            headers=headers or {},
+        )
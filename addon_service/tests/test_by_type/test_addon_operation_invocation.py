@@ -1,20 +1,82 @@
+import asyncio
 import dataclasses
+import datetime
 import json
+import threading
+import time
 import typing
 from http import HTTPStatus
+from unittest.mock import patch
 
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import (
+    RequestFactory,
+    TestCase,
+    override_settings,
+)
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework import exceptions as drf_exceptions
 from rest_framework.test import APITestCase
 
+from addon_imps.storage.my_blarg import MyBlargStorage
+from addon_imps.storage.s3 import S3StorageImp
+from addon_service.addon_imp import instantiation
+from addon_service.addon_operation_invocation import partitions
+from addon_service.authorized_account.models import AuthorizedAccount
+from addon_service.common import (
+    invocation_collapsing,
+    invocation_events,
+    invocation_latency,
+    invocation_result_cache,
+    rate_limiting,
+    user_reference_cache,
+)
 from addon_service.common.aiohttp_session import (
+    close_singleton_client_session,
     close_singleton_client_session__blocking,
 )
+from addon_service.common.credentials_formats import CredentialsFormats
+from addon_service.common.exceptions import (
+    ItemAccessDenied,
+    ItemNotFound,
+)
 from addon_service.common.invocation_status import InvocationStatus
+from addon_service.common.network import _PrivateNetworkInfo
+from addon_service.common.redis_client import get_redis_client
+from addon_service.models import (
+    AddonOperationInvocation,
+    InvocationPayload,
+)
+from addon_service.oauth2.utils import FreshTokenResult
+from addon_service.tasks import (
+    invocation_scheduling,
+    invocation_write_behind,
+)
+from addon_service.tasks.invocation import (
+    fail_stale_invocations,
+    perform_invocation__blocking,
+)
 from addon_service.tests import _factories
 from addon_service.tests._helpers import (
+    InvocationViewTestMixin,
     MockOSF,
     jsonapi_ref,
+    patch_encryption_key_derivation,
 )
+from addon_toolkit import (
+    AddonCapabilities,
+    AddonOperationType,
+)
+from addon_toolkit.credentials import AccessTokenCredentials
+from addon_toolkit.interfaces.storage import (
+    ItemResult,
+    ItemSampleResult,
+    ItemType,
+    StorageConfig,
+)
+from app.celery import TaskUrgency
 
 
 @dataclasses.dataclass
@@ -179,6 +241,1523 @@ class TestAddonOperationInvocationCreate(APITestCase):
                 )
 
 
+class TestAddonOperationInvocationCreateAsync(TestAddonOperationInvocationCreate):
+    """same cases as `TestAddonOperationInvocationCreate`, thru the async view"""
+
+    @property
+    def _invocation_list_path(self):
+        return reverse("addon-operation-invocations-async")
+
+    def _assert_invocation_response(self, inv_case: _InvocationCase, response):
+        # async view responses are rendered already (no `response.data` on test client)
+        response.data = json.loads(response.content).get("data", {}).get("attributes")
+        super()._assert_invocation_response(inv_case, response)
+
+    def test_async_invocation_saved(self):
+        _inv_case = self._INVOKE_SUCCESS_CASES[0]
+        _resp = self._post_invocation(_inv_case, thru_addon=self._configured_addon)
+        self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+        _id = json.loads(_resp.content)["data"]["id"]
+        _save_write_behind_records({_id})  # (list_root_items is ephemeral)
+        _detail_resp = self.client.get(
+            reverse("addon-operation-invocations-detail", kwargs={"pk": _id})
+        )
+        self.assertEqual(_detail_resp.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            _detail_resp.data["operation_result"], _inv_case.expected_result
+        )
+
+    def test_async_method_not_allowed(self):
+        for _method in ("get", "patch", "put", "delete"):
+            with self.subTest(method=_method):
+                _resp = getattr(self.client, _method)(self._invocation_list_path)
+                self.assertEqual(_resp.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+
+@override_settings(INVOCATION_COLLAPSE_WINDOW_SECONDS=0)  # (repeats on purpose)
+class TestAddonOperationInvocationResultCache(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+        cls._account = cls._configured_addon.base_account
+
+    def setUp(self):
+        super().setUp()
+        invocation_result_cache.invalidate_account_results(self._account.pk)
+
+    def _invoke(self, **operation_kwargs):
+        _resp = self._post_invocation(
+            "list_root_items", operation_kwargs, thru_account=self._account
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+        return _resp.data
+
+    def test_repeat_served_from_cache(self):
+        _first = self._invoke()
+        self.assertFalse(_first["result_from_cache"])
+        _second = self._invoke()
+        self.assertTrue(_second["result_from_cache"])
+        self.assertEqual(_first["operation_result"], _second["operation_result"])
+        with self.subTest("different kwargs, different result"):
+            _other = self._invoke(page_cursor="blargl")
+            self.assertFalse(_other["result_from_cache"])
+
+    def test_invalidate_on_capability_change(self):
+        self._invoke()
+        with self.subTest("not if unchanged"):
+            self._account.authorized_capabilities = (
+                self._account.authorized_capabilities
+            )
+            self.assertTrue(self._invoke()["result_from_cache"])
+        with self.captureOnCommitCallbacks(execute=False) as _callbacks:
+            self._account.authorized_capabilities = AddonCapabilities.ACCESS
+            self._account.save()
+        with self.subTest("not before commit"):
+            self.assertTrue(self._invoke()["result_from_cache"])
+        for _callback in _callbacks:
+            _callback()
+        self.assertFalse(self._invoke()["result_from_cache"])
+        self.assertTrue(self._invoke()["result_from_cache"])
+
+    def test_invalidate_on_new_grant_only(self):
+        _token_metadata = self._account.oauth2_token_metadata
+        _update_with_fresh_token = async_to_sync(
+            _token_metadata.update_with_fresh_token
+        )
+        self._invoke()
+        with self.captureOnCommitCallbacks(execute=True):
+            # (with the state nonce from `initiate_oauth2_flow`, as in the callback)
+            _update_with_fresh_token(
+                FreshTokenResult("granted", "refresh", expires_in=60, scopes=None)
+            )
+        self.assertFalse(self._invoke()["result_from_cache"])
+        with self.captureOnCommitCallbacks(execute=True):
+            _update_with_fresh_token(
+                FreshTokenResult("refreshed", None, expires_in=60, scopes=None)
+            )
+        self.assertTrue(self._invoke()["result_from_cache"])
+
+    def test_stale_while_revalidate(self):
+        _first = self._invoke()
+        with (
+            patch.object(
+                invocation_result_cache.time,
+                "time",
+                return_value=time.time() + 60,  # past ttl, within stale period
+            ),
+            patch(
+                "addon_service.tasks.invocation.revalidate_cached_result__celery.delay"
+            ) as _mock_revalidate,
+        ):
+            _stale = self._invoke()
+            _stale_again = self._invoke()
+        self.assertTrue(_stale["result_from_cache"])
+        self.assertTrue(_stale_again["result_from_cache"])
+        self.assertEqual(_stale["operation_result"], _first["operation_result"])
+        # revalidated once, not per request
+        _mock_revalidate.assert_called_once()
+
+    def test_negative_result_cached(self):
+        _invocation_kwargs = {
+            "thru_account": self._account,
+            "thru_addon": self._configured_addon,
+        }
+        with patch(
+            "addon_imps.storage.my_blarg.MyBlargStorage.get_item_info",
+            side_effect=ItemNotFound("no such item"),
+        ) as _mock_get_item_info:
+            for _expect_from_cache in (False, True, True):
+                _invocation = _factories.AddonOperationInvocationFactory(
+                    **_invocation_kwargs
+                )
+                with self.assertRaises(ItemNotFound):
+                    perform_invocation__blocking(_invocation)
+                self.assertEqual(_invocation.result_from_cache, _expect_from_cache)
+                self.assertEqual(_invocation.invocation_status, InvocationStatus.ERROR)
+            self.assertEqual(_mock_get_item_info.call_count, 1)
+            with self.subTest("cleared on re-auth"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self._account.credentials = AccessTokenCredentials(
+                        access_token="fresh"
+                    )
+                with self.assertRaises(ItemNotFound):
+                    perform_invocation__blocking(
+                        _factories.AddonOperationInvocationFactory(**_invocation_kwargs)
+                    )
+                self.assertEqual(_mock_get_item_info.call_count, 2)
+
+    def test_access_denied_result_cached(self):
+        # (as imps raise for a provider's 403 response)
+        with patch(
+            "addon_imps.storage.my_blarg.MyBlargStorage.get_item_info",
+            side_effect=ItemAccessDenied("forbidden"),
+        ) as _mock_get_item_info:
+            for _expect_from_cache in (False, True):
+                _invocation = _factories.AddonOperationInvocationFactory(
+                    thru_account=self._account,
+                    thru_addon=self._configured_addon,
+                )
+                with self.assertRaises(ItemAccessDenied):
+                    perform_invocation__blocking(_invocation)
+                self.assertEqual(_invocation.result_from_cache, _expect_from_cache)
+            self.assertEqual(_mock_get_item_info.call_count, 1)
+
+
+@override_settings(INVOCATION_COLLAPSE_WINDOW_SECONDS=0)  # (repeats on purpose)
+class TestAddonOperationInvocationWriteBehind(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def _invoke(self, operation_name: str):
+        _resp = self._post_invocation(operation_name)
+        self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+        return _resp.data["id"]
+
+    def test_ephemeral_saved_later(self):
+        _id = self._invoke("list_root_items")
+        self.assertFalse(AddonOperationInvocation.objects.filter(pk=_id).exists())
+        _save_write_behind_records({_id})
+        _saved = AddonOperationInvocation.objects.get(pk=_id)
+        self.assertEqual(_saved.invocation_status, InvocationStatus.SUCCESS)
+        self.assertEqual(_saved.by_user.user_uri, self._configured_addon.owner_uri)
+        self.assertEqual(_saved.thru_addon_id, self._configured_addon.pk)
+
+    def test_saved_once(self):
+        _id = self._invoke("list_root_items")
+        with patch.object(
+            invocation_write_behind.save_invocation_records__celery, "delay"
+        ) as _mock_delay:
+            invocation_write_behind.flush_invocation_records()
+        (_records,) = _mock_delay.call_args.args
+        (_record,) = [_record for _record in _records if _record["id"] == _id]
+        invocation_write_behind.save_invocation_records__celery([_record])
+        # (again, as if retried -- with another retention, so another primary key)
+        invocation_write_behind.save_invocation_records__celery(
+            [{**_record, "retention_days": _record["retention_days"] + 1}]
+        )
+        self.assertEqual(AddonOperationInvocation.objects.filter(pk=_id).count(), 1)
+
+    @override_settings(EPHEMERAL_INVOCATION_BATCH_SIZE=2)
+    def test_batched(self):
+        with patch.object(
+            invocation_write_behind.save_invocation_records__celery, "delay"
+        ) as _mock_delay:
+            invocation_write_behind.flush_invocation_records()
+            _mock_delay.reset_mock()
+            _first_id = self._invoke("list_root_items")
+            _mock_delay.assert_not_called()
+            _second_id = self._invoke("list_root_items")
+        _mock_delay.assert_called_once()
+        (_records,) = _mock_delay.call_args.args
+        self.assertEqual(
+            [_record["id"] for _record in _records], [_first_id, _second_id]
+        )
+
+    @override_settings(EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS=0.05)
+    def test_flushed_after_max_delay(self):
+        _flushed = threading.Event()
+        invocation_write_behind.flush_invocation_records()
+        with patch.object(
+            invocation_write_behind.save_invocation_records__celery,
+            "delay",
+            side_effect=lambda _records: _flushed.set(),
+        ) as _mock_delay:
+            _id = self._invoke("list_root_items")
+            self.assertTrue(_flushed.wait(timeout=5))  # (with nothing else recorded)
+        (_records,) = _mock_delay.call_args.args
+        self.assertEqual([_record["id"] for _record in _records], [_id])
+
+    def test_ephemeral_response_has_no_self_link(self):
+        _resp = self._post_invocation("list_root_items")
+        self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+        self.assertNotIn("links", json.loads(_resp.content)["data"])
+
+    @override_settings(EPHEMERAL_INVOCATION_SAMPLE_RATE=0)
+    def test_unsampled(self):
+        _id = self._invoke("list_root_items")
+        _save_write_behind_records({_id})
+        self.assertFalse(AddonOperationInvocation.objects.filter(pk=_id).exists())
+
+    @override_settings(EPHEMERAL_INVOCATION_SAMPLE_RATE=0)
+    def test_failures_always_recorded(self):
+        _account = self._configured_addon.base_account
+        invocation_result_cache.invalidate_account_results(_account.pk)
+        self.addCleanup(invocation_result_cache.invalidate_account_results, _account.pk)
+        _invocation = _factories.AddonOperationInvocationFactory.build(
+            operation_identifier="STORAGE:list_root_items",
+            operation_kwargs={},
+            thru_account=_account,
+            thru_addon=self._configured_addon,
+            by_user=_account.account_owner,
+        )
+        with patch(
+            "addon_imps.storage.my_blarg.MyBlargStorage.list_root_items",
+            side_effect=ItemNotFound("no such item"),
+        ):
+            with self.assertRaises(ItemNotFound):
+                perform_invocation__blocking(_invocation)
+        _save_write_behind_records({_invocation.pk})
+        _saved = AddonOperationInvocation.objects.get(pk=_invocation.pk)
+        self.assertEqual(_saved.invocation_status, InvocationStatus.ERROR)
+
+
+class TestAddonOperationInvocationBatch(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+        cls._other_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+        self._collaborator_uri = "https://user.example/collaborator"
+        self._mock_osf.configure_user_role(
+            self._collaborator_uri, self._configured_addon.resource_uri, "write"
+        )
+        self._mock_osf.configure_assumed_caller(self._collaborator_uri)
+
+    def _post_batch(self, resources):
+        return self._post_invocation_data(
+            "addon-operation-invocations-batch", resources
+        )
+
+    def test_batch(self):
+        _resp = self._post_batch(
+            [
+                self._invocation_resource("list_root_items"),
+                self._invocation_resource("get_item_info", {"item_id": "foo"}),
+                self._invocation_resource("blargblarg"),
+                self._invocation_resource(
+                    "list_root_items", thru_addon=self._other_addon
+                ),
+                self._invocation_resource("get_item_info", {"item_id": "bar"}),
+            ]
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        _content = json.loads(_resp.content)
+        _data = _content["data"]
+        self.assertEqual(
+            [_datum["attributes"]["operation_name"] for _datum in _data],
+            ["list_root_items", "get_item_info", "get_item_info"],
+        )
+        self.assertEqual(
+            [_datum["attributes"]["invocation_status"] for _datum in _data],
+            ["SUCCESS", "SUCCESS", "SUCCESS"],
+        )
+        self.assertEqual(
+            _data[2]["attributes"]["operation_result"]["item_name"], "itembar!"
+        )
+        self.assertEqual(
+            [
+                (_error["status"], _error["source"]["pointer"])
+                for _error in _content["meta"]["errors"]
+            ],
+            [("400", "/data/2"), ("403", "/data/3")],
+        )
+
+    def test_permission_checked_once_per_resource(self):
+        with patch(
+            "addon_service.common.osf.has_osf_permission_on_resource__async",
+            return_value=True,
+        ) as _mock_permission_check:
+            _resp = self._post_batch(
+                [self._invocation_resource("list_root_items")]
+                + [
+                    self._invocation_resource("get_item_info", {"item_id": str(_i)})
+                    for _i in range(5)
+                ]
+            )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        self.assertEqual(len(json.loads(_resp.content)["data"]), 6)
+        _mock_permission_check.assert_called_once()
+
+    def test_permissions_prefetched(self):
+        with patch(
+            "addon_service.common.osf.prefetch_osf_permissions__async"
+        ) as _mock_prefetch:
+            _resp = self._post_batch(
+                [
+                    self._invocation_resource("list_root_items"),
+                    self._invocation_resource(
+                        "list_root_items", thru_addon=self._other_addon
+                    ),
+                    self._invocation_resource("get_item_info", {"item_id": "foo"}),
+                ]
+            )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        _mock_prefetch.assert_awaited_once()
+        _, _resource_uris = _mock_prefetch.await_args.args
+        self.assertEqual(
+            _resource_uris,
+            {self._configured_addon.resource_uri, self._other_addon.resource_uri},
+        )
+
+    def test_anonymous(self):
+        self._mock_osf.configure_assumed_caller(None)
+        _resp = self._post_batch([self._invocation_resource("list_root_items")])
+        self.assertEqual(_resp.status_code, HTTPStatus.UNAUTHORIZED)
+
+    @override_settings(INVOCATION_BATCH_MAX_SIZE=2)
+    def test_too_many(self):
+        _resp = self._post_batch([self._invocation_resource("list_root_items")] * 3)
+        self.assertEqual(_resp.status_code, HTTPStatus.BAD_REQUEST)
+
+
+@override_settings(INVOCATION_COLLAPSE_WINDOW_SECONDS=0)  # (repeats on purpose)
+class TestAddonOperationInvocationRateLimits(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+        self._reset_rate_limits()
+
+    def _reset_rate_limits(self):
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:rate-limit:*") or ["-"])
+
+    @override_settings(RATE_LIMITS={"invocation": "2/minute"})
+    def test_invocation_requests_limited(self):
+        for _url_name in (
+            "addon-operation-invocations-list",
+            "addon-operation-invocations-async",
+        ):
+            with self.subTest(_url_name):
+                self._reset_rate_limits()
+                for _ in range(2):
+                    _resp = self._post_invocation_data(
+                        _url_name, self._invocation_resource()
+                    )
+                    self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+                _resp = self._post_invocation_data(
+                    _url_name, self._invocation_resource()
+                )
+                self.assertEqual(_resp.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+                self.assertEqual(_resp.headers["Retry-After"], "30")
+        with self.subTest("per user"):
+            self._mock_osf.configure_assumed_caller("https://user.example/other")
+            for _url_name in (
+                "addon-operation-invocations-list",
+                "addon-operation-invocations-async",
+            ):
+                _resp = self._post_invocation_data(
+                    _url_name, self._invocation_resource()
+                )
+                self.assertNotEqual(_resp.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(RATE_LIMITS={"invocation": "1/minute"})
+    def test_tokens_limited_apart(self):
+        def _request(auth_header=None, *, session_user_uri=None):
+            # (as authenticated by personal access token, or by session)
+            _headers = {"Authorization": auth_header} if auth_header else {}
+            _request = RequestFactory().post("/", headers=_headers)
+            _request.session = (
+                {"user_reference_uri": session_user_uri} if session_user_uri else {}
+            )
+            _request.user_uri = self._configured_addon.owner_uri
+            return _request
+
+        _scopes = [rate_limiting.INVOCATION_SCOPE]
+        rate_limiting.check_rate_limits(_request("Bearer token-a"), _scopes)
+        with self.assertRaises(drf_exceptions.Throttled):
+            rate_limiting.check_rate_limits(_request("Bearer token-a"), _scopes)
+        # (neither the user's other tokens nor the user's session share the limit)
+        rate_limiting.check_rate_limits(_request("Bearer token-b"), _scopes)
+        rate_limiting.check_rate_limits(
+            _request(session_user_uri=self._configured_addon.owner_uri), _scopes
+        )
+
+    @override_settings(RATE_LIMITS={"api:external-storage-services": "1/minute"})
+    def test_other_endpoints_limited(self):
+        _list_url = reverse("external-storage-services-list")
+        self.assertEqual(self.client.get(_list_url).status_code, HTTPStatus.OK)
+        _resp = self.client.get(_list_url)
+        self.assertEqual(_resp.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(_resp.headers["Retry-After"], "60")
+        # (only that resource type's endpoints, not invocations)
+        _resp = self._post_invocation()
+        self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+
+    @override_settings(RATE_LIMITS={"invocation:immediate": "1/minute"})
+    def test_immediate_invocations_limited(self):
+        _resp = self._post_invocation_data(
+            "addon-operation-invocations-async", self._invocation_resource()
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+        _resp = self._post_invocation_data(
+            "addon-operation-invocations-list",
+            self._invocation_resource("get_item_info", {"item_id": "foo"}),
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(_resp.headers["Retry-After"], "60")
+
+    @override_settings(RATE_LIMITS={"invocation:get_item_info": "1/minute"})
+    def test_operation_limited_in_batch(self):
+        _resp = self._post_invocation_data(
+            "addon-operation-invocations-batch",
+            [
+                self._invocation_resource("get_item_info", {"item_id": "foo"}),
+                self._invocation_resource(),
+                self._invocation_resource("get_item_info", {"item_id": "bar"}),
+            ],
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        _content = json.loads(_resp.content)
+        self.assertEqual(len(_content["data"]), 2)
+        # (one or the other get_item_info, as the batch is performed concurrently)
+        (_error,) = _content["meta"]["errors"]
+        self.assertEqual(_error["status"], "429")
+        self.assertIn(_error["source"]["pointer"], ("/data/0", "/data/2"))
+
+    @override_settings(RATE_LIMITS={"invocation": "1/minute"})
+    def test_polling_not_limited(self):
+        _invocation = _factories.AddonOperationInvocationFactory(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+            by_user=self._configured_addon.base_account.account_owner,
+        )
+        self._post_invocation_data(
+            "addon-operation-invocations-list", self._invocation_resource()
+        )
+        _resp = self._post_invocation_data(
+            "addon-operation-invocations-list", self._invocation_resource()
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        for _ in range(3):
+            _resp = self.client.get(
+                reverse(
+                    "addon-operation-invocations-detail",
+                    kwargs={"pk": _invocation.pk},
+                )
+            )
+            self.assertEqual(_resp.status_code, HTTPStatus.OK)
+
+
+def _save_write_behind_records(invocation_ids: set[str]) -> None:
+    # flush buffered invocation records, saving only those with the given ids
+    # (the buffer is process-wide; ignore records left from other tests)
+    with patch.object(
+        invocation_write_behind.save_invocation_records__celery, "delay"
+    ) as _mock_delay:
+        invocation_write_behind.flush_invocation_records()
+    for _call in _mock_delay.call_args_list:
+        (_records,) = _call.args
+        invocation_write_behind.save_invocation_records__celery(
+            [_record for _record in _records if _record["id"] in invocation_ids]
+        )
+
+
+class TestAddonOperationInvocationStream(InvocationViewTestMixin, APITestCase):
+    _invocation_view_name = "addon-operation-invocations-stream"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def _lines(self, response) -> list:
+        return [json.loads(_line) for _line in b"".join(response).splitlines()]
+
+    def test_stream(self):
+        _resp = self._post_invocation("list_root_items")
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        self.assertEqual(_resp["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            self._lines(_resp),
+            [
+                {
+                    "item_id": "hello",
+                    "item_name": "Hello!?",
+                    "item_type": "FOLDER",
+                    "can_be_root": True,
+                    "may_contain_root_candidates": True,
+                }
+            ],
+        )
+
+    def test_stream_error(self):
+        with patch(
+            "addon_imps.storage.my_blarg.MyBlargStorage.list_root_items",
+            side_effect=ItemNotFound("nope"),
+        ):
+            _resp = self._post_invocation("list_root_items")
+            _lines = self._lines(_resp)
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        self.assertEqual(len(_lines), 1)
+        self.assertIn("errors", _lines[0])
+
+    def test_not_listing(self):
+        _resp = self._post_invocation("get_item_info", {"item_id": "foo"})
+        self.assertEqual(_resp.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class TestAddonOperationInvocationAggregate(InvocationViewTestMixin, APITestCase):
+    _invocation_view_name = "addon-operation-invocations-aggregate"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+
+        async def _list_root_items(imp, page_cursor: str = "") -> ItemSampleResult:
+            _page = int(page_cursor or 0)
+            return ItemSampleResult(
+                items=[
+                    ItemResult(
+                        item_id=f"{_page}{_letter}",
+                        item_name=f"item {_page}{_letter}",
+                        item_type=ItemType.FILE,
+                    )
+                    for _letter in "ab"
+                ],
+                total_count=6,
+                this_sample_cursor=page_cursor,
+                next_sample_cursor=(str(_page + 1) if _page < 2 else None),
+            )
+
+        self.enterContext(
+            patch(
+                "addon_imps.storage.my_blarg.MyBlargStorage.list_root_items",
+                _list_root_items,
+            )
+        )
+
+    def _result_of(self, response) -> dict:
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        return response.json()["data"]["attributes"]["operation_result"]
+
+    def test_all_pages(self):
+        _result = self._result_of(self._post_invocation("list_root_items"))
+        self.assertEqual(
+            [_item["item_id"] for _item in _result["items"]],
+            ["0a", "0b", "1a", "1b", "2a", "2b"],
+        )
+        self.assertEqual(_result["total_count"], 6)
+        self.assertIsNone(_result.get("next_sample_cursor"))
+
+    @override_settings(INVOCATION_AGGREGATE_MAX_ITEMS=5)
+    def test_item_limit(self):
+        _result = self._result_of(
+            self._post_invocation("list_root_items", {"page_cursor": "0"})
+        )
+        self.assertEqual(
+            [_item["item_id"] for _item in _result["items"]],
+            ["0a", "0b", "1a", "1b"],
+        )
+        self.assertEqual(_result["next_sample_cursor"], "2")  # continue from there
+
+    @override_settings(INVOCATION_AGGREGATE_MAX_BYTES=1)
+    def test_at_least_one_page(self):
+        _result = self._result_of(self._post_invocation("list_root_items"))
+        self.assertEqual(len(_result["items"]), 2)
+        self.assertEqual(_result["next_sample_cursor"], "1")
+
+    def test_not_listing(self):
+        _resp = self._post_invocation("get_item_info", {"item_id": "foo"})
+        self.assertEqual(_resp.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class TestAddonOperationInvocationEvents(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+        self._invocation = _factories.AddonOperationInvocationFactory(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+            by_user=self._configured_addon.base_account.account_owner,
+        )
+
+    def _get_events(self) -> list[tuple[str, dict]]:
+        _resp = self.client.get(
+            reverse(
+                "addon-operation-invocations-events",
+                kwargs={"pk": self._invocation.pk},
+            )
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        self.assertEqual(_resp["Content-Type"], "text/event-stream")
+        _events = []
+        for _chunk in b"".join(_resp).decode().split("\n\n"):
+            _fields = dict(
+                _line.split(": ", maxsplit=1)
+                for _line in _chunk.splitlines()
+                if not _line.startswith(":")
+            )
+            if _fields:
+                _events.append((_fields["event"], json.loads(_fields["data"])))
+        return _events
+
+    def test_finished_invocation(self):
+        self._invocation.invocation_status = InvocationStatus.SUCCESS
+        self._invocation.save()
+        _events = self._get_events()
+        self.assertEqual(len(_events), 1)
+        _event_type, _data = _events[0]
+        self.assertEqual(_event_type, "status")
+        self.assertEqual(_data["id"], self._invocation.pk)
+        self.assertEqual(_data["invocation_status"], "SUCCESS")
+
+    @override_settings(INVOCATION_EVENTS_KEEPALIVE_SECONDS=1)
+    def test_relay_until_finished(self):
+        def _publish_later():
+            time.sleep(0.5)  # (after the view subscribes)
+            self._invocation.invocation_status = InvocationStatus.GOING
+            self._invocation.publish_status()
+            self._invocation.publish_progress({"done": 1, "of": 2})
+            self._invocation.invocation_status = InvocationStatus.SUCCESS
+            self._invocation.publish_status()
+
+        _publisher = threading.Thread(target=_publish_later)
+        _publisher.start()
+        self.addCleanup(_publisher.join)
+        self.assertEqual(
+            [
+                (_event_type, _data.get("invocation_status") or _data["progress"])
+                for _event_type, _data in self._get_events()
+            ],
+            [
+                ("status", "STARTING"),
+                ("status", "GOING"),
+                ("progress", {"done": 1, "of": 2}),
+                ("status", "SUCCESS"),
+            ],
+        )
+
+    @override_settings(INVOCATION_EVENTS_MAX_SECONDS=1)
+    def test_gives_up(self):
+        self.assertEqual(len(self._get_events()), 1)
+
+    def test_published_on_commit(self):
+        with patch.object(invocation_events, "publish_invocation_event") as _publish:
+            with patch.dict(  # (operations are frozen and permacached)
+                self._invocation.operation.__dict__,
+                {"operation_type": AddonOperationType.EVENTUAL},
+            ):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self._invocation.invocation_status = InvocationStatus.ERROR
+                    self._invocation.save()
+                    _publish.assert_not_called()
+                _expected_data = self._invocation.status_event_data()
+            self._invocation.save()  # not eventual
+        _publish.assert_called_once_with(self._invocation.pk, "status", _expected_data)
+
+    def test_not_permitted(self):
+        self._mock_osf.configure_assumed_caller("https://osf.example/someone")
+        _resp = self.client.get(
+            reverse(
+                "addon-operation-invocations-events",
+                kwargs={"pk": self._invocation.pk},
+            )
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_not_found(self):
+        _resp = self.client.get(
+            reverse("addon-operation-invocations-events", kwargs={"pk": "nope"})
+        )
+        self.assertEqual(_resp.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(
+    INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER=2,
+    INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE=3,
+    INVOCATION_SCHEDULER_BULK_THRESHOLD=3,
+)
+class TestAddonOperationInvocationScheduling(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:invocation-scheduling:*") or ["-"])
+        self._mock_apply_async = self.enterContext(
+            patch.object(
+                invocation_scheduling.perform_scheduled_invocation__celery,
+                "apply_async",
+            )
+        )
+
+    def _schedule(self, *, by_user=None, thru_addon=None) -> AddonOperationInvocation:
+        _thru_addon = thru_addon or self._configured_addon
+        _invocation = _factories.AddonOperationInvocationFactory(
+            thru_addon=_thru_addon,
+            thru_account=_thru_addon.base_account,
+            by_user=by_user or _thru_addon.base_account.account_owner,
+        )
+        invocation_scheduling.schedule_invocation(_invocation)
+        return _invocation
+
+    def _dispatched(self) -> list[tuple[str, str]]:
+        """(invocation pk, queue name) for each dispatched invocation, in order"""
+        return [
+            (_call.args[0][0], _call.kwargs["queue"])
+            for _call in self._mock_apply_async.call_args_list
+        ]
+
+    def _finish(self, invocation_pk: str) -> None:
+        (_args,) = [
+            _call.args[0]
+            for _call in self._mock_apply_async.call_args_list
+            if _call.args[0][0] == invocation_pk
+        ]
+        with patch.object(invocation_scheduling, "perform_invocation__celery"):
+            invocation_scheduling.perform_scheduled_invocation__celery(*_args)
+
+    def test_per_user_limit(self):
+        _busy_user = [self._schedule() for _ in range(4)]
+        self.assertEqual(
+            [_pk for _pk, _ in self._dispatched()],
+            [_invocation.pk for _invocation in _busy_user[:2]],
+        )
+        # another user need not wait behind the busy one
+        _other_user = self._schedule(by_user=_factories.UserReferenceFactory())
+        self.assertEqual(self._dispatched()[-1][0], _other_user.pk)
+        # finishing one makes room for the next
+        self._finish(_busy_user[0].pk)
+        self.assertEqual(self._dispatched()[-1][0], _busy_user[2].pk)
+        self.assertEqual(len(self._dispatched()), 4)
+
+    def test_expired_dispatch_lock(self):
+        def _dispatch_too_long(_client):
+            _client.delete(invocation_scheduling._DISPATCH_LOCK_KEY)  # (as if expired)
+            return 0
+
+        with patch.object(
+            invocation_scheduling, "_dispatch_pass", side_effect=_dispatch_too_long
+        ):
+            with self.assertLogs(invocation_scheduling._logger, "WARNING"):
+                self.assertEqual(
+                    invocation_scheduling.dispatch_scheduled_invocations(), 0
+                )
+
+    def test_per_service_limit(self):
+        _invocations = [
+            self._schedule(by_user=_factories.UserReferenceFactory()) for _ in range(4)
+        ]
+        self.assertEqual(len(self._dispatched()), 3)
+        # a different external service is not held up
+        _other_service = self._schedule(
+            thru_addon=_factories.ConfiguredStorageAddonFactory()
+        )
+        self.assertEqual(self._dispatched()[-1][0], _other_service.pk)
+        self._finish(_invocations[1].pk)
+        self.assertEqual(self._dispatched()[-1][0], _invocations[3].pk)
+
+    @override_settings(
+        INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER=10,
+        INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE=10,
+    )
+    def test_bulk_work_is_chill(self):
+        for _ in range(5):
+            self._schedule()
+        self.assertEqual(
+            [_queue for _, _queue in self._dispatched()],
+            [
+                *[TaskUrgency.REACTIVE.queue_name()] * 3,
+                *[TaskUrgency.CHILL.queue_name()] * 2,
+            ],
+        )
+        _waits = invocation_scheduling.queue_wait_percentiles()
+        self.assertEqual(set(_waits["REACTIVE"]), {"p50", "p90", "p99"})
+        self.assertEqual(set(_waits["CHILL"]), {"p50", "p90", "p99"})
+
+    def test_waiting_dispatched_periodically(self):
+        _invocations = [self._schedule() for _ in range(3)]
+        # a worker died, so its invocation's slot is never freed -- until it times out
+        with override_settings(INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS=0):
+            invocation_scheduling.dispatch_scheduled_invocations__celery()
+        self.assertEqual(self._dispatched()[-1][0], _invocations[2].pk)
+
+
+@override_settings(
+    INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS=0.2,
+    INVOCATION_PROMOTION_MIN_SAMPLES=2,
+    INVOCATION_COLLAPSE_WINDOW_SECONDS=0,
+)
+class TestAddonOperationInvocationPromotion(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:invocation-latency:*") or ["-"])
+        invocation_result_cache.invalidate_account_results(
+            self._configured_addon.base_account.pk
+        )
+        self._mock_apply_async = self.enterContext(
+            patch.object(
+                invocation_scheduling.perform_scheduled_invocation__celery,
+                "apply_async",
+            )
+        )
+
+    def _record_latencies(self, *seconds: float) -> None:
+        _invocation = _factories.AddonOperationInvocationFactory.build(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+        )
+        for _seconds in seconds:
+            invocation_latency.record_latency(_invocation, _seconds)
+
+    def test_latency_recorded(self):
+        _invocation = _factories.AddonOperationInvocationFactory(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+        )
+        perform_invocation__blocking(_invocation)
+        with override_settings(INVOCATION_PROMOTION_MIN_SAMPLES=1):
+            self.assertFalse(invocation_latency.expects_slow(_invocation))
+            with override_settings(INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS=1e-9):
+                self.assertTrue(invocation_latency.expects_slow(_invocation))
+
+    def test_expected_slow_scheduled(self):
+        self._record_latencies(0.5)
+        with self.subTest("too few samples"):
+            _resp = self._post_invocation("get_item_info", {"item_id": "blarg"})
+            self.assertEqual(_resp.status_code, HTTPStatus.CREATED)
+        # (that one was fast, so the median is still slow with one more)
+        self._record_latencies(0.5, 0.5)
+        for _view_name in (
+            "addon-operation-invocations-list",
+            "addon-operation-invocations-async",
+        ):
+            with self.subTest(view=_view_name):
+                self._mock_apply_async.reset_mock()
+                # (not to keep the pk of a user reference rolled back after the test)
+                self.addCleanup(
+                    user_reference_cache.forget_user_pks,
+                    self._configured_addon.owner_uri,
+                )
+                with self.captureOnCommitCallbacks(execute=True):
+                    _resp = self._post_invocation(
+                        "get_item_info", {"item_id": "blarg"}, view_name=_view_name
+                    )
+                    if _view_name == "addon-operation-invocations-list":
+                        # (scheduled only once the request's transaction commits)
+                        self._mock_apply_async.assert_not_called()
+                self.assertEqual(_resp.status_code, HTTPStatus.ACCEPTED)
+                _id = json.loads(_resp.content)["data"]["id"]
+                _invocation = AddonOperationInvocation.objects.get(pk=_id)
+                self.assertEqual(
+                    _invocation.invocation_status, InvocationStatus.STARTING
+                )
+                self._mock_apply_async.assert_called_once()
+                self.assertEqual(self._mock_apply_async.call_args.args[0][0], _id)
+
+    async def test_slow_finished_in_background(self):
+        _may_finish = asyncio.Event()
+
+        async def _slow_get_item_info(imp, item_id: str) -> ItemResult:
+            await _may_finish.wait()
+            return ItemResult(
+                item_id=item_id, item_name="slow", item_type=ItemType.FILE
+            )
+
+        with patch(
+            "addon_imps.storage.my_blarg.MyBlargStorage.get_item_info",
+            _slow_get_item_info,
+        ):
+            _resp = await self._post_invocation__async(
+                "get_item_info",
+                {"item_id": "blarg"},
+                view_name="addon-operation-invocations-async",
+            )
+            self.assertEqual(_resp.status_code, HTTPStatus.ACCEPTED)
+            _data = json.loads(_resp.content)["data"]
+            self.assertEqual(_data["attributes"]["invocation_status"], "GOING")
+            _may_finish.set()
+            for _ in range(100):
+                _invocation = await AddonOperationInvocation.objects.aget(
+                    pk=_data["id"]
+                )
+                if _invocation.invocation_status != InvocationStatus.GOING:
+                    break
+                await asyncio.sleep(0.05)
+        self.assertEqual(_invocation.invocation_status, InvocationStatus.SUCCESS)
+        self.assertEqual(_invocation.operation_result["item_name"], "slow")
+        self._mock_apply_async.assert_not_called()
+
+    @override_settings(INVOCATION_STALE_GOING_TIMEOUT_SECONDS=60)
+    def test_stale_going_failed(self):
+        _stale, _fresh = (
+            _factories.AddonOperationInvocationFactory(
+                thru_addon=self._configured_addon,
+                thru_account=self._configured_addon.base_account,
+                by_user=self._configured_addon.base_account.account_owner,
+                invocation_status=InvocationStatus.GOING,
+            )
+            for _ in range(2)
+        )
+        AddonOperationInvocation.objects.filter(pk=_stale.pk).update(
+            modified=timezone.now() - datetime.timedelta(minutes=5)
+        )
+        with patch.object(AddonOperationInvocation, "publish_status") as _publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(fail_stale_invocations(), 1)
+        _publish.assert_called_once()
+        _stale.refresh_from_db()
+        _fresh.refresh_from_db()
+        self.assertEqual(_stale.invocation_status, InvocationStatus.ERROR)
+        self.assertEqual(_stale.exception_type, "TimeoutError")
+        self.assertEqual(_fresh.invocation_status, InvocationStatus.GOING)
+        with self.subTest("not eventual ones"):
+            with patch.dict(  # (operations are frozen and permacached)
+                _fresh.operation.__dict__,
+                {"operation_type": AddonOperationType.EVENTUAL},
+            ):
+                AddonOperationInvocation.objects.filter(pk=_fresh.pk).update(
+                    modified=timezone.now() - datetime.timedelta(minutes=5)
+                )
+                self.assertEqual(fail_stale_invocations(), 0)
+
+    @override_settings(INVOCATION_STALE_GOING_TIMEOUT_SECONDS=60)
+    def test_scheduled_not_failed(self):
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:invocation-scheduling:*") or ["-"])
+        _invocation = _factories.AddonOperationInvocationFactory(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+            by_user=self._configured_addon.base_account.account_owner,
+            invocation_status=InvocationStatus.GOING,
+        )
+        AddonOperationInvocation.objects.filter(pk=_invocation.pk).update(
+            modified=timezone.now() - datetime.timedelta(minutes=5)
+        )
+        # (in line behind others, or performed by a worker, as the scheduler knows)
+        with patch.object(
+            invocation_scheduling.perform_scheduled_invocation__celery, "apply_async"
+        ):
+            invocation_scheduling.schedule_invocation(_invocation)
+        self.assertIn(_invocation.pk, invocation_scheduling.scheduled_invocation_pks())
+        self.assertEqual(fail_stale_invocations(), 0)
+        _invocation.refresh_from_db()
+        self.assertEqual(_invocation.invocation_status, InvocationStatus.GOING)
+
+
+@override_settings(INVOCATION_RESULT_CACHE_ENABLED=False)
+class TestAddonOperationInvocationCollapsing(InvocationViewTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._configured_addon = _factories.ConfiguredStorageAddonFactory()
+
+    def setUp(self):
+        super().setUp()
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:invocation-collapse:*") or ["-"])
+        self._mock_get_item_info = self.enterContext(
+            patch(
+                "addon_imps.storage.my_blarg.MyBlargStorage.get_item_info",
+                return_value=ItemResult(
+                    item_id="blarg", item_name="blarg!", item_type=ItemType.FILE
+                ),
+            )
+        )
+
+    def _post_item_info(
+        self,
+        view_name="addon-operation-invocations-list",
+        *,
+        item_id="blarg",
+        idempotency_key=None,
+    ):
+        return self._post_invocation(
+            "get_item_info",
+            {"item_id": item_id},
+            view_name=view_name,
+            headers=(
+                None
+                if idempotency_key is None
+                else {"Idempotency-Key": idempotency_key}
+            ),
+        )
+
+    def _invocation_id(self, response) -> str:
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        return json.loads(response.content)["data"]["id"]
+
+    def test_same_invocation_collapsed(self):
+        for _view_name in (
+            "addon-operation-invocations-list",
+            "addon-operation-invocations-async",
+        ):
+            with self.subTest(view=_view_name):
+                self._mock_get_item_info.reset_mock()
+                _first_id = self._invocation_id(
+                    self._post_item_info(_view_name, item_id=_view_name)
+                )
+                _second_resp = self._post_item_info(_view_name, item_id=_view_name)
+                self.assertEqual(self._invocation_id(_second_resp), _first_id)
+                self.assertEqual(
+                    json.loads(_second_resp.content)["data"]["attributes"][
+                        "operation_result"
+                    ]["item_name"],
+                    "blarg!",
+                )
+                self._mock_get_item_info.assert_called_once()
+                with self.subTest("different kwargs"):
+                    self.assertNotEqual(
+                        self._invocation_id(
+                            self._post_item_info(_view_name, item_id=f"{_view_name}!")
+                        ),
+                        _first_id,
+                    )
+                    self.assertEqual(self._mock_get_item_info.call_count, 2)
+
+    @override_settings(INVOCATION_COLLAPSE_WINDOW_SECONDS=0)
+    def test_not_collapsed(self):
+        _first_id = self._invocation_id(self._post_item_info())
+        self.assertNotEqual(self._invocation_id(self._post_item_info()), _first_id)
+        self.assertEqual(self._mock_get_item_info.call_count, 2)
+
+    @override_settings(INVOCATION_COLLAPSE_WINDOW_SECONDS=0)
+    def test_idempotency_key(self):
+        _first_id = self._invocation_id(self._post_item_info(idempotency_key="foo"))
+        self.assertEqual(
+            self._invocation_id(
+                self._post_item_info(
+                    "addon-operation-invocations-async", idempotency_key="foo"
+                )
+            ),
+            _first_id,
+        )
+        self.assertNotEqual(
+            self._invocation_id(self._post_item_info(idempotency_key="bar")),
+            _first_id,
+        )
+        self.assertEqual(self._mock_get_item_info.call_count, 2)
+        with self.subTest("reused for a different invocation"):
+            _resp = self._post_item_info(item_id="other", idempotency_key="foo")
+            self.assertEqual(_resp.status_code, HTTPStatus.BAD_REQUEST)
+            self.assertEqual(self._mock_get_item_info.call_count, 2)
+
+    def test_failure_not_collapsed(self):
+        self._mock_get_item_info.side_effect = ValueError("oh no")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self._post_item_info("addon-operation-invocations-async")
+        self.assertEqual(self._mock_get_item_info.call_count, 2)
+
+    def test_sync_view_does_not_wait_for_earlier(self):
+        _earlier = _factories.AddonOperationInvocationFactory.build(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+            by_user=self._configured_addon.base_account.account_owner,
+            operation_kwargs={"item_id": "blarg"},
+        )
+        # (claimed, as if still performing)
+        self.assertFalse(invocation_collapsing.claim_invocation(_earlier).is_duplicate)
+        _started = time.monotonic()
+        _resp = self._post_item_info()
+        self.assertLess(time.monotonic() - _started, 1)
+        # (performed again, rather than collapsed into an invocation to poll)
+        self.assertNotEqual(self._invocation_id(_resp), _earlier.pk)
+        self.assertEqual(
+            json.loads(_resp.content)["data"]["attributes"]["invocation_status"],
+            "SUCCESS",
+        )
+        self._mock_get_item_info.assert_called_once()
+
+    def test_collapsed_self_link_only_if_saved(self):
+        for _view_name in (
+            "addon-operation-invocations-list",
+            "addon-operation-invocations-async",
+        ):
+            with self.subTest(view=_view_name):
+                _first_data = json.loads(
+                    self._post_item_info(_view_name, item_id=_view_name).content
+                )["data"]
+                _second_resp = self._post_item_info(_view_name, item_id=_view_name)
+                _second_data = json.loads(_second_resp.content)["data"]
+                self.assertEqual(_second_data["id"], _first_data["id"])
+                self.assertEqual("links" in _second_data, "links" in _first_data)
+
+    def test_large_result_not_kept(self):
+        with self.settings(INVOCATION_RESULT_INLINE_MAX_LENGTH=16):
+            _first_resp = self._post_item_info("addon-operation-invocations-async")
+            _first_id = self._invocation_id(_first_resp)
+            _second_resp = self._post_item_info("addon-operation-invocations-async")
+        # (not kept in redis, and not saved to load instead -- so performed again)
+        self.assertNotEqual(self._invocation_id(_second_resp), _first_id)
+        self.assertEqual(self._mock_get_item_info.call_count, 2)
+        for _entry_key in get_redis_client().keys("gv:invocation-collapse:*"):
+            self.assertNotIn(b"blarg!", get_redis_client().get(_entry_key) or b"")
+
+    def test_saved_claim_settled_on_commit(self):
+        _invocation = _factories.AddonOperationInvocationFactory(
+            thru_addon=self._configured_addon,
+            thru_account=self._configured_addon.base_account,
+            by_user=self._configured_addon.base_account.account_owner,
+            operation_kwargs={"item_id": "saved"},
+        )
+        _claim = invocation_collapsing.claim_invocation(_invocation)
+        with self.captureOnCommitCallbacks(execute=True):
+            _claim.settle(_invocation)  # (still STARTING)
+            self.assertEqual(
+                invocation_collapsing._get_entry(_claim.collapse_key)["state"],
+                "performing",
+            )
+        self.assertEqual(
+            invocation_collapsing._get_entry(_claim.collapse_key)["state"], "saved"
+        )
+
+    async def test_waits_for_earlier(self):
+        _may_finish = asyncio.Event()
+        _calls = []
+
+        async def _slow_get_item_info(imp, item_id: str) -> ItemResult:
+            _calls.append(item_id)
+            await _may_finish.wait()
+            return ItemResult(
+                item_id=item_id, item_name="slow", item_type=ItemType.FILE
+            )
+
+        async def _post():
+            return await self._post_invocation__async(
+                "get_item_info",
+                {"item_id": "blarg"},
+                view_name="addon-operation-invocations-async",
+            )
+
+        with patch(
+            "addon_imps.storage.my_blarg.MyBlargStorage.get_item_info",
+            _slow_get_item_info,
+        ):
+            _first = asyncio.ensure_future(_post())
+            while not _calls:
+                await asyncio.sleep(0.01)
+            _second = asyncio.ensure_future(_post())
+            await asyncio.sleep(0.1)
+            self.assertFalse(_second.done())
+            _may_finish.set()
+            _first_resp, _second_resp = await asyncio.gather(_first, _second)
+        self.assertEqual(
+            self._invocation_id(_first_resp), self._invocation_id(_second_resp)
+        )
+        self.assertEqual(len(_calls), 1)
+
+
+class TestAddonImpClientPool(TestCase):
+    _CONFIG = StorageConfig(max_upload_mb=1, external_api_url="https://blarg.example/")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._account = _factories.AuthorizedStorageAccountFactory(
+            credentials_format=CredentialsFormats.PERSONAL_ACCESS_TOKEN,
+            credentials=AccessTokenCredentials(access_token="hello"),
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(instantiation.clear_addon_client_pools)
+        self._mock_create_client = self.enterContext(
+            patch.object(S3StorageImp, "create_client", side_effect=lambda _: object())
+        )
+
+    def _get_instance(self, imp_cls=S3StorageImp, config=_CONFIG, account=None):
+        return instantiation.get_addon_instance__blocking(
+            imp_cls, account or self._loaded_account(), config
+        )
+
+    def _loaded_account(self):
+        return AuthorizedAccount.objects.select_related("_credentials").get(
+            pk=self._account.pk
+        )
+
+    def test_client_reused(self):
+        _imp = self._get_instance()
+        _other_imp = self._get_instance(
+            config=dataclasses.replace(self._CONFIG, max_upload_mb=2)
+        )
+        self.assertIsNot(_other_imp, _imp)  # (each gets its own instance)
+        self.assertIs(_other_imp.client, _imp.client)
+        self._mock_create_client.assert_called_once()
+        with override_settings(ADDON_IMP_POOL_MAX_SIZE=0):
+            self.assertIsNot(self._get_instance().client, _imp.client)
+
+    def test_client_not_reused_after_changes(self):
+        _imp = self._get_instance()
+        with patch_encryption_key_derivation():
+            self._account.credentials = AccessTokenCredentials(access_token="fresh")
+        _fresh_imp = self._get_instance()
+        self.assertIsNot(_fresh_imp.client, _imp.client)
+        self.assertIs(self._get_instance().client, _fresh_imp.client)
+
+    def test_client_not_shared_between_threads(self):
+        _imp = self._get_instance()
+        _account = self._loaded_account()  # (loaded here, not in the other thread)
+        _in_thread = []
+        _thread = threading.Thread(
+            target=lambda: _in_thread.append(self._get_instance(account=_account))
+        )
+        _thread.start()
+        _thread.join()
+        self.assertIsNot(_in_thread[0].client, _imp.client)
+
+    @override_settings(ADDON_IMP_POOL_TTL_SECONDS=0)
+    def test_expired(self):
+        self.assertIsNot(self._get_instance().client, self._get_instance().client)
+
+    @override_settings(ADDON_IMP_POOL_MAX_SIZE=1)
+    def test_bounded(self):
+        _imp = self._get_instance()
+        self._get_instance(imp_cls=_OtherS3StorageImp)
+        self.assertIsNot(self._get_instance().client, _imp.client)
+
+    async def test_network_instance_bound_to_account(self):
+        _account = await AuthorizedAccount.objects.select_related(
+            "_credentials", "external_service"
+        ).aget(pk=self._account.pk)
+        _imp = await instantiation.get_addon_instance(
+            MyBlargStorage, _account, self._CONFIG
+        )
+        _other_account = await AuthorizedAccount.objects.select_related(
+            "_credentials", "external_service"
+        ).aget(pk=self._account.pk)
+        _other_imp = await instantiation.get_addon_instance(
+            MyBlargStorage, _other_account, self._CONFIG
+        )
+        self.assertIsNot(_other_imp, _imp)
+        self.assertIs(
+            _PrivateNetworkInfo.get(_other_imp.network).account, _other_account
+        )
+        await close_singleton_client_session()
+
+
+class _OtherS3StorageImp(S3StorageImp):
+    pass
+
+
+@override_settings(
+    INVOCATION_RETENTION_DAYS=30,
+    INVOCATION_RETENTION_POLICY={
+        "ERROR": 90,
+        "get_item_info": 7,
+        "get_item_info:ERROR": 14,
+    },
+)
+class TestAddonOperationInvocationPartitions(TestCase):
+    _FUTURE_DAY = datetime.date(
+        2100, 1, 7
+    )  # a thursday, in the period from monday 2100-01-04
+
+    def test_retention_days_for(self):
+        for _operation_name, _status, _expected_days in (
+            ("list_root_items", InvocationStatus.SUCCESS, 30),
+            ("list_root_items", InvocationStatus.ERROR, 90),
+            ("get_item_info", InvocationStatus.SUCCESS, 7),
+            ("get_item_info", InvocationStatus.ERROR, 14),
+            ("get_item_info", InvocationStatus.GOING, 14),
+            ("list_root_items", InvocationStatus.STARTING, 90),
+        ):
+            with self.subTest(operation_name=_operation_name, status=_status):
+                self.assertEqual(
+                    partitions.retention_days_for(_operation_name, _status),
+                    _expected_days,
+                )
+
+    def test_retention_fixed_when_saved(self):
+        partitions.ensure_invocation_partitions()  # for this test's retention policy
+        self.assertEqual(
+            _factories.AddonOperationInvocationFactory(
+                invocation_status=InvocationStatus.SUCCESS
+            ).retention_days,
+            7,
+        )
+        # (not yet finished -- the longest it may get once finished)
+        _invocation = _factories.AddonOperationInvocationFactory(
+            invocation_status=InvocationStatus.GOING
+        )
+        self.assertEqual(_invocation.retention_days, 14)
+        _invocation.invocation_status = InvocationStatus.SUCCESS
+        _invocation.save()
+        _invocation.refresh_from_db()
+        self.assertEqual(_invocation.retention_days, 14)  # (not moved)
+        _created_day = _invocation.created.date()
+        _period_start = _created_day - datetime.timedelta(days=_created_day.weekday())
+        self.assertEqual(
+            _partition_holding(_invocation),
+            f"{partitions.PARTITIONED_TABLE}_p{_period_start:%Y%m%d}_r14",
+        )
+
+    def test_ensure_and_prune(self):
+        _period = f"{partitions.PARTITIONED_TABLE}_p21000104"
+        _created = partitions.ensure_invocation_partitions(
+            since=self._FUTURE_DAY, today=self._FUTURE_DAY
+        )
+        self.assertEqual(
+            sorted(_name for _name in _created if _name.startswith(_period)),
+            sorted(
+                [
+                    _period,
+                    f"{_period}_rdefault",
+                    f"{_period}_r7",
+                    f"{_period}_r14",
+                    f"{_period}_r30",
+                    f"{_period}_r90",
+                ]
+            ),
+        )
+        self.assertEqual(len(_created), 3 * 6)  # this period and two ahead
+        self.assertEqual(
+            partitions.ensure_invocation_partitions(
+                since=self._FUTURE_DAY, today=self._FUTURE_DAY
+            ),
+            [],
+        )
+        # the period ends 2100-01-11; after 14 days, drop its 7- and 14-day partitions
+        _dropped = partitions.prune_invocation_partitions(
+            today=datetime.date(2100, 1, 25)
+        )
+        self.assertIn(f"{_period}_r7", _dropped)
+        self.assertIn(f"{_period}_r14", _dropped)
+        self.assertNotIn(f"{_period}_r30", _dropped)
+        _next_period = f"{partitions.PARTITIONED_TABLE}_p21000111"
+        self.assertIn(f"{_next_period}_r7", _dropped)
+        self.assertNotIn(f"{_next_period}_r14", _dropped)
+        # after 90 days, drop the whole period
+        _dropped = partitions.prune_invocation_partitions(
+            today=datetime.date(2100, 4, 11)
+        )
+        self.assertIn(_period, _dropped)
+        self.assertNotIn(f"{_period}_r30", _dropped)  # (dropped with the period)
+
+    def test_strays_moved_from_default_partition(self):
+        # an invocation from a period not yet partitioned lands in the default partition
+        _invocation = _factories.AddonOperationInvocationFactory(
+            invocation_status=InvocationStatus.SUCCESS
+        )
+        AddonOperationInvocation.objects.filter(pk=_invocation.pk).update(
+            created=datetime.datetime(2200, 1, 8, tzinfo=datetime.UTC)
+        )
+        self.assertEqual(_partition_holding(_invocation), partitions.DEFAULT_PARTITION)
+        _created = partitions.ensure_invocation_partitions(
+            since=self._FUTURE_DAY, today=self._FUTURE_DAY
+        )
+        _stray_period = f"{partitions.PARTITIONED_TABLE}_p22000106"
+        self.assertIn(_stray_period, _created)
+        self.assertEqual(_partition_holding(_invocation), f"{_stray_period}_r7")
+        # and not the periods between
+        self.assertNotIn(f"{partitions.PARTITIONED_TABLE}_p21500101", _created)
+
+    def test_prune_keeps_longer_default_retention(self):
+        _period = f"{partitions.PARTITIONED_TABLE}_p21000104"
+        partitions.ensure_invocation_partitions(
+            since=self._FUTURE_DAY, today=self._FUTURE_DAY
+        )
+        # kept for longer by an earlier policy
+        _invocation = _factories.AddonOperationInvocationFactory()
+        AddonOperationInvocation.objects.filter(pk=_invocation.pk).update(
+            created=datetime.datetime(2100, 1, 5, tzinfo=datetime.UTC),
+            retention_days=365,
+        )
+        self.assertEqual(_partition_holding(_invocation), f"{_period}_rdefault")
+        with connection.cursor() as _cursor:
+            # (so this test's own partitions may be dropped, too)
+            _cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        _dropped = partitions.prune_invocation_partitions(
+            today=datetime.date(2100, 4, 11)
+        )
+        self.assertNotIn(_period, _dropped)
+        self.assertIn(f"{_period}_r90", _dropped)
+        self.assertEqual(_partition_holding(_invocation), f"{_period}_rdefault")
+        _dropped = partitions.prune_invocation_partitions(
+            today=datetime.date(2101, 1, 12)
+        )
+        self.assertIn(_period, _dropped)
+
+
+class TestAddonOperationInvocationPayloads(TestCase):
+    def _fail(self, invocation: AddonOperationInvocation, message: str) -> None:
+        try:
+            raise ItemNotFound(message)
+        except ItemNotFound as _e:
+            invocation.set_exception(_e)
+        invocation.save()
+
+    def test_same_failures_share_traceback(self):
+        _invocations = [_factories.AddonOperationInvocationFactory() for _ in range(3)]
+        for _invocation in _invocations:
+            self._fail(_invocation, "nope")
+        _different = _factories.AddonOperationInvocationFactory()
+        self._fail(_different, "also nope")
+        for _invocation in (*_invocations, _different):
+            _invocation.refresh_from_db()
+        self.assertEqual(
+            {_invocation.exception_fingerprint for _invocation in _invocations},
+            {_different.exception_fingerprint},  # same failure, different message
+        )
+        self.assertEqual(
+            len(
+                {
+                    _invocation.exception_context_payload_id
+                    for _invocation in _invocations
+                }
+            ),
+            1,
+        )
+        self.assertEqual(InvocationPayload.objects.count(), 2)
+        self.assertIn("ItemNotFound: nope", _invocations[0].exception_context)
+        self.assertIn("ItemNotFound: also nope", _different.exception_context)
+        _different.clear_exception()
+        _different.save()
+        _different.refresh_from_db()
+        self.assertIsNone(_different.exception_context_payload_id)
+        self.assertEqual(_different.exception_context, "")
+
+    @override_settings(INVOCATION_RESULT_INLINE_MAX_LENGTH=20)
+    def test_large_result_stored_aside(self):
+        _small, _large = (
+            _factories.AddonOperationInvocationFactory(),
+            _factories.AddonOperationInvocationFactory(),
+        )
+        _small.operation_result = {"ok": True}
+        _large.operation_result = {"items": ["a" * 20, "b" * 20]}
+        _small.save()
+        _large.save()
+        _small.refresh_from_db()
+        _large.refresh_from_db()
+        self.assertEqual(_small.operation_result_inline, {"ok": True})
+        self.assertIsNone(_small.operation_result_payload_id)
+        self.assertIsNone(_large.operation_result_inline)
+        self.assertIsNotNone(_large.operation_result_payload_id)
+        self.assertEqual(_large.operation_result, {"items": ["a" * 20, "b" * 20]})
+
+    def test_prune_unused(self):
+        _invocation = _factories.AddonOperationInvocationFactory()
+        self._fail(_invocation, "nope")
+        _unused = InvocationPayload.store("unused")
+        InvocationPayload.objects.update(
+            last_stored=datetime.datetime(2020, 1, 1, tzinfo=datetime.UTC)
+        )
+        self.assertEqual(InvocationPayload.prune_unused(), 1)
+        self.assertFalse(InvocationPayload.objects.filter(pk=_unused.pk).exists())
+        self.assertTrue(
+            InvocationPayload.objects.filter(
+                pk=_invocation.exception_context_payload_id
+            ).exists()
+        )
+
+
+def _partition_holding(invocation: AddonOperationInvocation) -> str:
+    with connection.cursor() as _cursor:
+        _cursor.execute(
+            f"SELECT tableoid::regclass::text FROM {partitions.PARTITIONED_TABLE}"
+            " WHERE id = %s",
+            [invocation.pk],
+        )
+        (_table_name,) = _cursor.fetchone()
+    return _table_name
+
+
 class TestAddonOperationInvocationErrors(APITestCase):
     @classmethod
     def setUpTestData(cls):
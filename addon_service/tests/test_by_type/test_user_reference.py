@@ -8,6 +8,7 @@ from django.urls import reverse
 from rest_framework.test import APITestCase
 
 from addon_service import models as db
+from addon_service.common import user_reference_cache
 from addon_service.tests import _factories
 from addon_service.tests._helpers import (
     MockOSF,
@@ -169,6 +170,57 @@ class TestUserReferenceModel(TestCase):
         )
 
 
+class TestUserReferenceForUserUri(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls._user = _factories.UserReferenceFactory()
+
+    def setUp(self):
+        super().setUp()
+        self._new_uri = "https://osf.example/newuser"
+        user_reference_cache.forget_user_pks(self._user.user_uri, self._new_uri)
+
+    def test_new_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _user = db.UserReference.objects.for_user_uri(self._new_uri)
+        self.assertEqual(
+            db.UserReference.objects.get(user_uri=self._new_uri).pk, _user.pk
+        )
+        with self.assertNumQueries(0):
+            _again = db.UserReference.objects.for_user_uri(self._new_uri)
+        self.assertEqual(_again.pk, _user.pk)
+        self.assertEqual(_again.user_uri, self._new_uri)
+
+    def test_known_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                _user = db.UserReference.objects.for_user_uri(self._user.user_uri)
+        self.assertEqual(_user.pk, self._user.pk)
+        with self.assertNumQueries(0):
+            db.UserReference.objects.for_user_uri(self._user.user_uri)
+        with self.assertNumQueries(1):  # (deferred fields load when accessed)
+            self.assertEqual(_user.created, self._user.created)
+
+    def test_not_cached_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            db.UserReference.objects.for_user_uri(self._new_uri)
+        self.assertIsNone(user_reference_cache.get_cached_user_pk(self._new_uri))
+
+    def test_forgotten_on_merge(self):
+        _merge_with = _factories.UserReferenceFactory()
+        with self.captureOnCommitCallbacks(execute=True):
+            db.UserReference.objects.for_user_uri(self._user.user_uri)
+            db.UserReference.objects.for_user_uri(_merge_with.user_uri)
+        self._user.merge(_merge_with)
+        self.assertIsNone(user_reference_cache.get_cached_user_pk(self._user.user_uri))
+        self.assertIsNone(user_reference_cache.get_cached_user_pk(_merge_with.user_uri))
+
+    async def test_async(self):
+        _user = await db.UserReference.objects.for_user_uri__async(self._user.user_uri)
+        self.assertEqual(_user.pk, self._user.pk)
+        self.assertEqual(_user.user_uri, self._user.user_uri)
+
+
 # unit-test viewset (call the view with test requests)
 class TestUserReferenceViewSet(TestCase):
     @classmethod
@@ -14,6 +14,8 @@ from django.test import (
     SimpleTestCase,
 )
 from django.urls import reverse
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework.request import Request as DrfRequest
 from rest_framework.test import APITestCase
 
 from addon_service.common import hmac as hmac_utils
@@ -67,6 +69,17 @@ class TestOsfUtilsHmac(SimpleTestCase):
             ),
         )
 
+    def _replay(self, fake_request):
+        # another request with the same (signed) headers
+        return RequestFactory().get(
+            self._fake_api_url,
+            headers={
+                _name: _value
+                for _name, _value in fake_request.headers.items()
+                if _name not in ("Cookie", "Host")
+            },
+        )
+
     def test_get_osf_user_uri(self):
         _actual_user_uri = osf.get_osf_user_uri(self._fake_request())
         self.assertEqual(_actual_user_uri, self._fake_user_uri)
@@ -165,6 +178,58 @@ class TestOsfUtilsHmac(SimpleTestCase):
                 )
             )
 
+    def test_verified_once_per_request(self):
+        _fake_request = self._fake_request([osf.OSFPermission.READ])
+        with mock.patch(
+            "addon_service.common.hmac._sign_message",
+            wraps=hmac_utils._sign_message,
+        ) as _mock_sign:
+            for _check_request in (_fake_request, DrfRequest(_fake_request)):
+                self.assertEqual(
+                    osf.get_osf_user_uri(_check_request), self._fake_user_uri
+                )
+                self.assertTrue(
+                    osf.has_osf_permission_on_resource(
+                        _check_request,
+                        self._fake_resource_uri,
+                        osf.OSFPermission.READ,
+                    )
+                )
+        self.assertEqual(_mock_sign.call_count, 1)
+
+    def test_replayed_signature(self):
+        self.enterContext(self.settings(OSF_HMAC_REJECT_REPLAYS=True))
+        _fake_request = self._fake_request([osf.OSFPermission.READ])
+        _replayed_request = self._replay(_fake_request)
+        self.assertEqual(osf.get_osf_user_uri(_fake_request), self._fake_user_uri)
+        with self.assertRaises(PermissionDenied):
+            osf.get_osf_user_uri(_replayed_request)
+        self.assertFalse(
+            osf.has_osf_permission_on_resource(
+                _replayed_request, self._fake_resource_uri, osf.OSFPermission.READ
+            )
+        )
+
+    def test_replayed_signature__allowed(self):
+        with self.settings(OSF_HMAC_REJECT_REPLAYS=False):
+            _fake_request = self._fake_request()
+            _replayed_request = self._replay(_fake_request)
+            for _request in (_fake_request, _replayed_request):
+                self.assertEqual(osf.get_osf_user_uri(_request), self._fake_user_uri)
+
+    def test_replayed_signature__redis_unavailable(self):
+        self.enterContext(self.settings(OSF_HMAC_REJECT_REPLAYS=True))
+        _fake_request = self._fake_request()
+        with mock.patch.object(
+            hmac_utils,
+            "get_redis_client",
+            return_value=mock.Mock(set=mock.Mock(side_effect=RedisConnectionError)),
+        ):
+            with self.assertLogs("addon_service.common.hmac", "WARNING"):
+                self.assertEqual(
+                    osf.get_osf_user_uri(_fake_request), self._fake_user_uri
+                )
+
 
 class TestHmacApiAuth(APITestCase):
     @classmethod
@@ -0,0 +1,354 @@
+import contextlib
+from http import HTTPStatus
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    override_settings,
+)
+from rest_framework.request import Request as DrfRequest
+
+from addon_service.common import osf
+from addon_service.common.osf_permission_cache import invalidate_osf_permissions
+from addon_service.common.redis_client import get_redis_client
+from addon_service.tasks import osf_backchannel
+
+
+class _FakeOsfApi:
+    """stands in for the aiohttp session used to ask the osf api for permissions"""
+
+    def __init__(self):
+        self.requested_urls = []
+        self.responses = {}  # osfid: (status, permissions or None for no referent data)
+        self.token_user_uri = "https://osf.example/tokenz"
+        self.token_user_status = HTTPStatus.OK
+
+    async def get_client(self):
+        return self
+
+    @contextlib.asynccontextmanager
+    async def get(self, url, params=None, headers=None):
+        self.requested_urls.append(url)
+        if url.endswith("/v2/users/me/"):
+            _response = mock.Mock(status=self.token_user_status)
+            _response.json = mock.AsyncMock(
+                return_value={"data": {"links": {"iri": self.token_user_uri}}}
+            )
+            yield _response
+            return
+        _osfid = url.rstrip("/").rsplit("/", maxsplit=1)[-1]
+        _status, _permissions = self.responses[_osfid]
+        _response = mock.Mock(status=_status)
+        _response.json = mock.AsyncMock(
+            return_value={
+                "data": {
+                    "embeds": {
+                        "referent": {
+                            "data": (
+                                None
+                                if _permissions is None
+                                else {
+                                    "attributes": {
+                                        "current_user_permissions": _permissions
+                                    }
+                                }
+                            ),
+                        },
+                    },
+                },
+            }
+        )
+        yield _response
+
+
+@override_settings(
+    OSF_PERMISSION_CACHE_SECONDS=60,
+    OSF_PERMISSION_NEGATIVE_CACHE_SECONDS=60,
+)
+class TestOsfPermissionCache(SimpleTestCase):
+    _user_uri = "https://osf.example/userz"
+
+    def setUp(self):
+        super().setUp()
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:osf-permissions:*") or ["-"])
+        self._osf_api = _FakeOsfApi()
+        self._osf_api.responses = {
+            "abcde": (HTTPStatus.OK, ["read", "write"]),
+            "fghij": (HTTPStatus.NOT_FOUND, None),
+            "klmno": (HTTPStatus.INTERNAL_SERVER_ERROR, None),
+        }
+        self.enterContext(
+            mock.patch(
+                "addon_service.common.osf.get_singleton_client_session",
+                self._osf_api.get_client,
+            )
+        )
+
+    def _resource_uri(self, osfid):
+        return f"{settings.OSF_BASE_URL}/{osfid}"
+
+    def _request(self, user_uri=_user_uri, **query):
+        _request = RequestFactory().get("/v1/whatever", query)
+        _request.session = {}
+        if user_uri:
+            _request.user_uri = user_uri
+        return _request
+
+    def _has_permission(self, request, osfid, permission):
+        return osf.has_osf_permission_on_resource(
+            request, self._resource_uri(osfid), permission
+        )
+
+    def test_permissions_cached(self):
+        _request = self._request()
+        self.assertTrue(self._has_permission(_request, "abcde", osf.OSFPermission.READ))
+        self.assertTrue(
+            self._has_permission(_request, "abcde", osf.OSFPermission.WRITE)
+        )
+        self.assertFalse(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.ADMIN)
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 1)
+
+    def test_cached_per_user_and_view_only(self):
+        self.assertTrue(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.READ)
+        )
+        self._osf_api.responses["abcde"] = (HTTPStatus.OK, None)
+        self.assertFalse(
+            self._has_permission(
+                self._request(user_uri="https://osf.example/other"),
+                "abcde",
+                osf.OSFPermission.READ,
+            )
+        )
+        self.assertFalse(
+            self._has_permission(
+                self._request(user_uri=None), "abcde", osf.OSFPermission.READ
+            )
+        )
+        self.assertFalse(
+            self._has_permission(
+                self._request(view_only="secret"), "abcde", osf.OSFPermission.READ
+            )
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 4)
+
+    def test_cached_per_credential(self):
+        self.assertTrue(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        self._osf_api.responses["abcde"] = (HTTPStatus.OK, ["read"])
+        for _token in ("scoped-token", "scoped-token", "other-token"):
+            _request = self._request()
+            _request.META["HTTP_AUTHORIZATION"] = f"Bearer {_token}"
+            self.assertFalse(
+                self._has_permission(_request, "abcde", osf.OSFPermission.WRITE)
+            )
+        self.assertTrue(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 3)
+
+    def test_no_permissions_cached(self):
+        for _ in range(2):
+            self.assertFalse(
+                self._has_permission(self._request(), "fghij", osf.OSFPermission.READ)
+            )
+        self._osf_api.responses["abcde"] = (HTTPStatus.OK, None)
+        for _ in range(2):
+            self.assertFalse(
+                self._has_permission(self._request(), "abcde", osf.OSFPermission.READ)
+            )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_other_problems_not_cached(self):
+        for _ in range(2):
+            self.assertFalse(
+                self._has_permission(self._request(), "klmno", osf.OSFPermission.READ)
+            )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_unknown_credentials_not_cached(self):
+        for _ in range(2):
+            _request = RequestFactory().get(
+                "/v1/whatever", headers={"Authorization": "Bearer who-knows"}
+            )
+            _request.session = {}
+            self.assertTrue(
+                self._has_permission(_request, "abcde", osf.OSFPermission.WRITE)
+            )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_invalidate_resource(self):
+        self.assertTrue(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        self._osf_api.responses["abcde"] = (HTTPStatus.OK, [])
+        invalidate_osf_permissions(resource_uri=self._resource_uri("fghij"))
+        self.assertTrue(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        invalidate_osf_permissions(resource_uri=self._resource_uri("abcde"))
+        self.assertFalse(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_invalidate_from_backchannel(self):
+        self.assertTrue(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        self._osf_api.responses["abcde"] = (HTTPStatus.OK, [])
+        osf_backchannel.get_handler_signature(
+            {"action": "permissions_changed", "user_uri": self._user_uri}
+        ).apply()
+        self.assertFalse(
+            self._has_permission(self._request(), "abcde", osf.OSFPermission.WRITE)
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_prefetch(self):
+        _osfids = ("abcde", "fghij", "klmno")
+        _request = self._request()
+        async_to_sync(osf.prefetch_osf_permissions__async)(
+            _request, [self._resource_uri(_osfid) for _osfid in _osfids]
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 3)
+        self.assertTrue(
+            self._has_permission(_request, "abcde", osf.OSFPermission.WRITE)
+        )
+        self.assertFalse(
+            self._has_permission(_request, "fghij", osf.OSFPermission.READ)
+        )
+        self.assertFalse(
+            self._has_permission(_request, "klmno", osf.OSFPermission.READ)
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 3)
+        # another request, answered from the shared cache (but for "klmno")
+        async_to_sync(osf.prefetch_osf_permissions__async)(
+            self._request(), [self._resource_uri(_osfid) for _osfid in _osfids]
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 4)
+
+    @override_settings(OSF_PERMISSION_CACHE_SECONDS=0)
+    def test_disabled(self):
+        for _ in range(2):
+            self.assertTrue(
+                self._has_permission(self._request(), "abcde", osf.OSFPermission.READ)
+            )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+
+@override_settings(OSF_PERMISSION_CACHE_SECONDS=0, OSF_TOKEN_USER_CACHE_SECONDS=0)
+class TestOsfRequestMemo(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self._osf_api = _FakeOsfApi()
+        self._osf_api.responses = {"abcde": (HTTPStatus.OK, ["read", "write"])}
+        self.enterContext(
+            mock.patch(
+                "addon_service.common.osf.get_singleton_client_session",
+                self._osf_api.get_client,
+            )
+        )
+        self._resource_uri = f"{settings.OSF_BASE_URL}/abcde"
+
+    def _request(self):
+        _request = RequestFactory().get(
+            "/v1/whatever", headers={"Authorization": "Bearer tokentoken"}
+        )
+        _request.session = {}
+        return _request
+
+    def test_permissions_once_per_request(self):
+        _request = self._request()
+        for _check_request in (_request, DrfRequest(_request)):
+            for _permission, _expected in (
+                (osf.OSFPermission.READ, True),
+                (osf.OSFPermission.WRITE, True),
+                (osf.OSFPermission.ADMIN, False),
+            ):
+                self.assertEqual(
+                    osf.has_osf_permission_on_resource(
+                        _check_request, self._resource_uri, _permission
+                    ),
+                    _expected,
+                )
+        self.assertEqual(len(self._osf_api.requested_urls), 1)
+        osf.has_osf_permission_on_resource(
+            self._request(), self._resource_uri, osf.OSFPermission.READ
+        )
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_token_user_once_per_request(self):
+        _request = self._request()
+        for _ in range(2):
+            self.assertEqual(
+                osf.get_osf_user_uri(_request), self._osf_api.token_user_uri
+            )
+        self.assertEqual(len(self._osf_api.requested_urls), 1)
+
+
+@override_settings(OSF_TOKEN_USER_CACHE_SECONDS=60)
+class TestOsfTokenUserCache(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        _client = get_redis_client()
+        _client.delete(*_client.keys("gv:osf-token-user:*") or ["-"])
+        self._osf_api = _FakeOsfApi()
+        self.enterContext(
+            mock.patch(
+                "addon_service.common.osf.get_singleton_client_session",
+                self._osf_api.get_client,
+            )
+        )
+
+    def _user_uri_for(self, token):
+        _request = RequestFactory().get(
+            "/v1/whatever", headers={"Authorization": f"Bearer {token}"}
+        )
+        _request.session = {}
+        return osf.get_osf_user_uri(_request)
+
+    def test_token_user_cached(self):
+        for _ in range(2):
+            self.assertEqual(
+                self._user_uri_for("tokentoken"), self._osf_api.token_user_uri
+            )
+        self.assertEqual(len(self._osf_api.requested_urls), 1)
+        _client = get_redis_client()
+        for _key in _client.keys("gv:osf-token-user:*"):
+            self.assertNotIn(b"tokentoken", _key)
+
+    def test_rejected_token_not_cached(self):
+        self._osf_api.token_user_status = HTTPStatus.UNAUTHORIZED
+        for _ in range(2):
+            self.assertIsNone(self._user_uri_for("tokentoken"))
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    def test_tokens_revoked_from_backchannel(self):
+        self._user_uri_for("tokentoken")
+        self._user_uri_for("tokentoken")
+        osf_backchannel.get_handler_signature(
+            {"action": "tokens_revoked", "user_uri": self._osf_api.token_user_uri}
+        ).apply()
+        self._osf_api.token_user_status = HTTPStatus.UNAUTHORIZED
+        self.assertIsNone(self._user_uri_for("tokentoken"))
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
+
+    @override_settings(OSF_TOKEN_USER_CACHE_MAX_SIZE=2)
+    def test_max_size(self):
+        for _token in ("token1", "token2", "token3", "token2", "token3", "token1"):
+            self._user_uri_for(_token)
+        self.assertEqual(len(self._osf_api.requested_urls), 4)  # (token1 dropped)
+
+    @override_settings(OSF_TOKEN_USER_CACHE_SECONDS=0)
+    def test_disabled(self):
+        for _ in range(2):
+            self._user_uri_for("tokentoken")
+        self.assertEqual(len(self._osf_api.requested_urls), 2)
@@ -1,7 +1,10 @@
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 
 from addon_service.common import known_imps
+from addon_service.models import AddonOperationModel
 
 
 class TestAddonImpsView(APITestCase):
@@ -26,3 +29,21 @@ class TestAddonOperationsView(APITestCase):
         }
         _actual_names = {_datum["attributes"]["name"] for _datum in _data}
         self.assertEqual(_expected_names, _actual_names)
+
+
+class TestAddonOperationKwargsValidation(SimpleTestCase):
+    def test_validate_kwargs(self):
+        _operation = AddonOperationModel.get_by_static_key("STORAGE:list_child_items")
+        _operation.validate_kwargs({"item_id": "foo", "page_cursor": "bar"})
+        for _bad_kwargs in ({}, {"item_id": 7}, {"item_id": "foo", "blarg": 2}):
+            with self.subTest(_bad_kwargs), self.assertRaises(ValidationError):
+                _operation.validate_kwargs(_bad_kwargs)
+
+    def test_validator_built_once(self):
+        _operation = AddonOperationModel.get_by_static_key("STORAGE:get_item_info")
+        self.assertIs(
+            _operation.kwargs_validator,
+            AddonOperationModel.get_by_static_key(
+                "STORAGE:get_item_info"
+            ).kwargs_validator,
+        )
@@ -76,6 +76,32 @@ _register_viewset(views.UserReferenceViewSet)
 __all__ = ("urlpatterns",)
 
 urlpatterns = [
+    # before router urls, lest "async" be taken for a pk
+    path(
+        r"addon-operation-invocations/async/",
+        views.async_invocation_view,
+        name="addon-operation-invocations-async",
+    ),
+    path(
+        r"addon-operation-invocations/batch/",
+        views.batch_invocation_view,
+        name="addon-operation-invocations-batch",
+    ),
+    path(
+        r"addon-operation-invocations/stream/",
+        views.stream_invocation_view,
+        name="addon-operation-invocations-stream",
+    ),
+    path(
+        r"addon-operation-invocations/aggregate/",
+        views.aggregate_invocation_view,
+        name="addon-operation-invocations-aggregate",
+    ),
+    path(
+        r"addon-operation-invocations/<str:pk>/events/",
+        views.invocation_events_view,
+        name="addon-operation-invocations-events",
+    ),
     *_router.urls,
     path(r"oauth2/callback/", views.oauth2_callback_view, name="oauth2-callback"),
     path(r"oauth1/callback/", views.oauth1_callback_view, name="oauth1-callback"),
@@ -1,10 +1,17 @@
-from django.db import models
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import (
+    models,
+    transaction,
+)
 from django.utils import timezone
 
 from addon_service.authorized_account.citation.models import AuthorizedCitationAccount
 from addon_service.authorized_account.computing.models import AuthorizedComputingAccount
 from addon_service.authorized_account.link.models import AuthorizedLinkAccount
 from addon_service.authorized_account.storage.models import AuthorizedStorageAccount
+from addon_service.common import user_reference_cache
 from addon_service.common.base_model import AddonsServiceBaseModel
 from addon_service.common.regex import uri_regex
 from addon_service.configured_addon.computing.models import ConfiguredComputingAddon
@@ -12,7 +19,48 @@ from addon_service.configured_addon.storage.models import ConfiguredStorageAddon
 from addon_service.resource_reference.models import ResourceReference
 
 
+class UserReferenceManager(models.Manager):
+    def for_user_uri(self, user_uri: str) -> "UserReference":
+        """get the user reference with the given uri (created, if new)
+
+        a known uri's pk is cached (see `user_reference_cache`), so this usually needs
+        no query -- the reference comes with only `user_uri` loaded (others deferred)
+        """
+        _pk = user_reference_cache.get_cached_user_pk(user_uri)
+        if _pk is None:
+            _pk = self._get_or_insert_pk(user_uri)
+        return self._loaded(_pk, user_uri)
+
+    async def for_user_uri__async(self, user_uri: str) -> "UserReference":
+        """(same as `for_user_uri`, for use in async context)"""
+        _pk = await user_reference_cache.get_cached_user_pk__async(user_uri)
+        if _pk is None:
+            _pk = await sync_to_async(self._get_or_insert_pk)(user_uri)
+        return self._loaded(_pk, user_uri)
+
+    def _get_or_insert_pk(self, user_uri: str) -> str:
+        _pk = self.filter(user_uri=user_uri).values_list("pk", flat=True).first()
+        if _pk is None:
+            _now = timezone.now()
+            _new = self.model(user_uri=user_uri, created=_now, modified=_now)
+            _new.full_clean(validate_unique=False, validate_constraints=False)
+            # (no error, should another request insert the same uri meanwhile)
+            self.bulk_create([_new], ignore_conflicts=True)
+            _pk = self.filter(user_uri=user_uri).values_list("pk", flat=True).get()
+        # (not to cache the pk of a reference that may yet be rolled back)
+        transaction.on_commit(
+            functools.partial(user_reference_cache.remember_user_pk, user_uri, _pk),
+            using=self.db,
+        )
+        return _pk
+
+    def _loaded(self, pk: str, user_uri: str) -> "UserReference":
+        return self.model.from_db(self.db, ["id", "user_uri"], [pk, user_uri])
+
+
 class UserReference(AddonsServiceBaseModel):
+    objects = UserReferenceManager()
+
     user_uri = models.URLField(unique=True, db_index=True, null=False)
     deactivated = models.DateTimeField(null=True, blank=True)
 
@@ -91,6 +139,7 @@ class UserReference(AddonsServiceBaseModel):
         For preventing hard deletes use deactivate instead.
         """
         if force:
+            user_reference_cache.forget_user_pks(self.user_uri)
             return super().delete()
         raise NotImplementedError(
             "This is to prevent hard deletes, use deactivate or force=True."
@@ -109,3 +158,4 @@ class UserReference(AddonsServiceBaseModel):
             account_owner=self
         )
         merge_with.deactivate()
+        user_reference_cache.forget_user_pks(self.user_uri, merge_with.user_uri)
@@ -9,6 +9,11 @@ from addon_service.addon_imp.views import AddonImpViewSet
 from addon_service.addon_operation.views import AddonOperationViewSet
 from addon_service.addon_operation_invocation.views import (
     AddonOperationInvocationViewSet,
+    aggregate_invocation_view,
+    async_invocation_view,
+    batch_invocation_view,
+    invocation_events_view,
+    stream_invocation_view,
 )
 from addon_service.authorized_account.citation.views import (
     AuthorizedCitationAccountViewSet,
@@ -72,6 +77,11 @@ __all__ = (
     "ExternalStorageServiceViewSet",
     "ResourceReferenceViewSet",
     "UserReferenceViewSet",
+    "async_invocation_view",
+    "aggregate_invocation_view",
+    "batch_invocation_view",
+    "invocation_events_view",
+    "stream_invocation_view",
     "oauth2_callback_view",
     "oauth1_callback_view",
     "status",
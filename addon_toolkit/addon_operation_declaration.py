@@ -1,4 +1,5 @@
 import dataclasses
+import datetime
 import enum
 import inspect
 from typing import (
@@ -48,6 +49,22 @@ class AddonOperationDeclaration:
         default=type(None),  # if not provided, inferred by __post_init__
         compare=False,
     )
+    result_cache_ttl: datetime.timedelta | None = dataclasses.field(
+        default=None,  # if not provided, results are not cached
+        compare=False,
+    )
+    """how long a result may be reused for the same operation kwargs on the same account
+
+    (after which it may be served stale while a fresh result is fetched)
+    """
+    ephemeral_invocation: bool = dataclasses.field(
+        default=False,
+        compare=False,
+    )
+    """whether an invocation of this operation may be recorded after its result is returned
+
+    (only for immediate, read-only operations -- all others are recorded before responding)
+    """
 
     @classmethod
     def for_function(self, fn: Callable) -> "AddonOperationDeclaration":
@@ -59,6 +76,20 @@ class AddonOperationDeclaration:
     def __post_init__(self):
         if len(self.capability) != 1:
             raise exceptions.OperationNotValid
+        if (
+            self.result_cache_ttl is not None
+            and self.operation_type is not AddonOperationType.IMMEDIATE
+        ):
+            raise exceptions.OperationNotValid(
+                f"only immediate operations may declare result_cache_ttl (got {self.operation_type} on {self.operation_fn})"
+            )
+        if self.ephemeral_invocation and (
+            self.operation_type is not AddonOperationType.IMMEDIATE
+            or self.capability != AddonCapabilities.ACCESS
+        ):
+            raise exceptions.OperationNotValid(
+                f"only immediate, access-only operations may be ephemeral (got {self.operation_type} with {self.capability} on {self.operation_fn})"
+            )
         _return_type = self.return_annotation
         if self.result_dataclass is type(None):
             # no result_dataclass declared; infer from type annotation
@@ -92,6 +123,19 @@ class AddonOperationDeclaration:
     def return_annotation(self) -> Any:
         return inspect.get_annotations(self.operation_fn)["return"]
 
+    @property
+    def is_listing(self) -> bool:
+        """whether results are a sample of `items` (which may be streamed; see `AddonImp.iter_operation_items`)"""
+        return any(
+            _field.name == "items"
+            for _field in dataclasses.fields(self.result_dataclass)
+        )
+
+    @property
+    def is_paged(self) -> bool:
+        """whether further results may be requested with a `page_cursor` kwarg"""
+        return "page_cursor" in inspect.signature(self.operation_fn).parameters
+
 
 # declarator for all types of operations -- use operation_type-specific decorators below
 addon_operation = Declarator(
@@ -1,6 +1,10 @@
+import asyncio
+import dataclasses
 import functools
 import inspect
+import types
 import typing
+from collections import abc
 
 from asgiref.sync import (
     async_to_sync,
@@ -10,7 +14,7 @@ from asgiref.sync import (
 from . import exceptions
 from .addon_operation_declaration import AddonOperationDeclaration
 from .capabilities import AddonCapabilities
-from .json_arguments import kwargs_from_json
+from .json_arguments import kwargs_decoder_for
 
 
 if typing.TYPE_CHECKING:
@@ -26,6 +30,27 @@ class AddonImp:
     # subclasses must set `ADDON_INTERFACE`
     ADDON_INTERFACE: "typing.ClassVar[type[BaseAddonInterface]]"
 
+    # each subclass gets its own, built when the class is created (by operation name)
+    _operation_invokers: "typing.ClassVar[abc.Mapping[str, _OperationInvoker]]" = (
+        types.MappingProxyType({})
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._operation_invokers = types.MappingProxyType(
+            {
+                _operation.name: _OperationInvoker.for_imp_function(
+                    _operation, getattr(cls, _operation.name)
+                )
+                for _operation in (
+                    cls.ADDON_INTERFACE.iter_declared_operations()
+                    if hasattr(cls, "ADDON_INTERFACE")
+                    else ()
+                )
+                if hasattr(cls, _operation.name)
+            }
+        )
+
     ###
     # class methods
 
@@ -67,6 +92,9 @@ class AddonImp:
         operation_name: str,
         /,  # all args positional-only (for cache's sake)
     ) -> AddonOperationDeclaration:
+        _invoker = cls._operation_invokers.get(operation_name)
+        if _invoker is not None:
+            return _invoker.operation
         _operation = cls.ADDON_INTERFACE.get_operation_by_name(operation_name)
         if not cls.has_implemented_operation(_operation):
             raise exceptions.OperationNotImplemented(cls, _operation)
@@ -82,19 +110,134 @@ class AddonImp:
         self, operation: AddonOperationDeclaration, json_kwargs: dict
     ):
         """try to run an operation on this imp"""
-        _operation_method = getattr(self, operation.name)
-        _kwargs = kwargs_from_json(operation.operation_fn, json_kwargs)
-        if not inspect.iscoroutinefunction(_operation_method):
-            _operation_method = sync_to_async(_operation_method)
-        _result = await _operation_method(**_kwargs)
-        assert isinstance(
-            _result, operation.result_dataclass
-        ), f"expected {operation.result_dataclass.__name__} type to be returned from method {_operation_method.__name__}, got {_result.__class__.__name__}"
-        return _result
+        return await self._operation_invoker(operation).invoke(self, json_kwargs)
 
     invoke_operation__blocking = async_to_sync(invoke_operation)
     """try to run an operation on this imp (and wait until done)"""
 
+    async def iter_operation_items(
+        self, operation: AddonOperationDeclaration, json_kwargs: dict
+    ) -> abc.AsyncIterator:
+        """run a listing operation on this imp, yielding result items as they come
+
+        by default, invokes the operation for each page of results in turn (following
+        `next_sample_cursor`) -- an imp may instead implement an async generator method
+        named `<operation name>__stream` (taking the operation's kwargs, less any
+        `page_cursor`) to yield items its own way
+        """
+        if not operation.is_listing:
+            raise exceptions.OperationNotValid(
+                f"expected a listing operation (got {operation.name})"
+            )
+        _stream_method = getattr(self, f"{operation.name}__stream", None)
+        if _stream_method is not None:
+            _kwargs = self._operation_invoker(operation).decode_kwargs(json_kwargs)
+            _kwargs.pop("page_cursor", None)
+            async for _item in _stream_method(**_kwargs):
+                yield _item
+            return
+        async for _page in self.iter_operation_pages(operation, json_kwargs):
+            for _item in _page.items:
+                yield _item
+
+    async def iter_operation_pages(
+        self, operation: AddonOperationDeclaration, json_kwargs: dict
+    ) -> abc.AsyncIterator:
+        """run a listing operation on this imp, yielding each page of results in turn
+
+        follows `next_sample_cursor` (if the operation takes a `page_cursor`), fetching
+        each next page while the one before is with the caller
+        """
+        if not operation.is_listing:
+            raise exceptions.OperationNotValid(
+                f"expected a listing operation (got {operation.name})"
+            )
+        _json_kwargs = dict(json_kwargs)
+        _next_page: asyncio.Future | None = asyncio.ensure_future(
+            self.invoke_operation(operation, _json_kwargs)
+        )
+        try:
+            while _next_page is not None:
+                _page = await _next_page
+                _next_page = None
+                _next_cursor = getattr(_page, "next_sample_cursor", None)
+                if (
+                    operation.is_paged
+                    and _next_cursor
+                    and _next_cursor != _json_kwargs.get("page_cursor")
+                ):
+                    _json_kwargs = {**_json_kwargs, "page_cursor": _next_cursor}
+                    _next_page = asyncio.ensure_future(
+                        self.invoke_operation(operation, _json_kwargs)
+                    )
+                yield _page
+        finally:
+            if _next_page is not None:  # caller stopped early; page not needed
+                _next_page.cancel()
+                _next_page.add_done_callback(_ignore_outcome)
+
     async def get_external_account_id(self, auth_result_extras: dict[str, str]) -> str:
         """to be implemented by addons which require an external account id"""
         return ""
+
+    def _operation_invoker(
+        self, operation: AddonOperationDeclaration
+    ) -> "_OperationInvoker":
+        _invoker = self._operation_invokers.get(operation.name)
+        if _invoker is None or _invoker.operation is not operation:
+            # not implemented on this imp class (at least, not when created) -- prepare now
+            _invoker = _OperationInvoker.for_imp_function(operation, None)
+        return _invoker
+
+
+###
+# module-private helpers
+
+
+@dataclasses.dataclass(frozen=True)
+class _OperationInvoker:
+    """an operation as implemented on one imp class, with its argument handling
+    (and sync/async adaptation) prepared in advance
+    """
+
+    operation: AddonOperationDeclaration
+    imp_function: abc.Callable | None  # as found on the imp class
+    decode_kwargs: abc.Callable[[dict], dict]
+    call_imp_function: abc.Callable[..., abc.Awaitable] | None
+
+    @classmethod
+    def for_imp_function(
+        cls, operation: AddonOperationDeclaration, imp_function: abc.Callable | None
+    ) -> typing.Self:
+        return cls(
+            operation=operation,
+            imp_function=imp_function,
+            decode_kwargs=kwargs_decoder_for(operation.operation_fn),
+            call_imp_function=(
+                None if imp_function is None else _as_async(imp_function)
+            ),
+        )
+
+    async def invoke(self, imp: AddonImp, json_kwargs: dict):
+        _operation_method = getattr(imp, self.operation.name)
+        _kwargs = self.decode_kwargs(json_kwargs)
+        if (
+            self.call_imp_function is not None
+            and getattr(_operation_method, "__func__", None) is self.imp_function
+        ):
+            _result = await self.call_imp_function(imp, **_kwargs)
+        else:  # not as found when the class was created (e.g. patched in a test)
+            _result = await _as_async(_operation_method)(**_kwargs)
+        assert isinstance(
+            _result, self.operation.result_dataclass
+        ), f"expected {self.operation.result_dataclass.__name__} type to be returned from method {_operation_method.__name__}, got {_result.__class__.__name__}"
+        return _result
+
+
+def _as_async(fn: abc.Callable) -> abc.Callable[..., abc.Awaitable]:
+    return fn if inspect.iscoroutinefunction(fn) else sync_to_async(fn)
+
+
+def _ignore_outcome(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()  # (mark any exception retrieved, to avoid a warning)
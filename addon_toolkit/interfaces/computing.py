@@ -61,9 +61,15 @@ class ComputingAddonClientRequestorImp[T](ComputingAddonImp):
 
     client: T = dataclasses.field(init=False)
     credentials: dataclasses.InitVar[Credentials]
-
-    def __post_init__(self, credentials):
-        self.client = self.create_client(credentials)
+    # a client made before with the same credentials, to use instead of a new one
+    reusable_client: dataclasses.InitVar[T | None] = None
+
+    def __post_init__(self, credentials, reusable_client=None):
+        self.client = (
+            self.create_client(credentials)
+            if reusable_client is None
+            else reusable_client
+        )
 
     @staticmethod
     def create_client(credentials) -> T:
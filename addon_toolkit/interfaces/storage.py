@@ -1,11 +1,17 @@
 """a static (and still in progress) definition of what composes a storage addon"""
 
+import asyncio
 import dataclasses
+import datetime
 import enum
 import typing
+import weakref
 from collections import abc
 
-from addon_toolkit.addon_operation_declaration import immediate_operation
+from addon_toolkit.addon_operation_declaration import (
+    AddonOperationDeclaration,
+    immediate_operation,
+)
 from addon_toolkit.capabilities import AddonCapabilities
 from addon_toolkit.constrained_network.http import HttpRequestor
 from addon_toolkit.credentials import Credentials
@@ -19,10 +25,12 @@ __all__ = (
     "ItemResult",
     "ItemType",
     "ItemSampleResult",
+    "ItemTreeResult",
     "PossibleSingleItemResult",
     "StorageAddonInterface",
     "StorageAddonImp",
     "StorageConfig",
+    "TreeItemResult",
 )
 
 
@@ -86,6 +94,23 @@ class ItemSampleResult:
         )
 
 
+@dataclasses.dataclass
+class TreeItemResult:
+    """an item found walking a folder's subtree"""
+
+    item: ItemResult
+    parent_item_id: str
+    path: str  # item names from (not including) the walked folder, joined by "/"
+    depth: int  # 1 for the walked folder's children, 2 for theirs...
+
+
+@dataclasses.dataclass
+class ItemTreeResult:
+    """a folder's subtree, flattened (each item once)"""
+
+    items: abc.Collection[TreeItemResult]
+
+
 ###
 # declaration of all storage addon operations
 
@@ -97,7 +122,11 @@ class StorageAddonInterface(BaseAddonInterface, typing.Protocol):
     # @redirect_operation(capability=AddonCapabilities.ACCESS)
     # def download(self, item_id: str) -> RedirectResult: ...
 
-    @immediate_operation(capability=AddonCapabilities.ACCESS)
+    @immediate_operation(
+        capability=AddonCapabilities.ACCESS,
+        result_cache_ttl=datetime.timedelta(seconds=30),
+        ephemeral_invocation=True,
+    )
     async def get_item_info(self, item_id: str) -> ItemResult: ...
 
     #
@@ -114,10 +143,18 @@ class StorageAddonInterface(BaseAddonInterface, typing.Protocol):
     ##
     # tree-read operations:
 
-    @immediate_operation(capability=AddonCapabilities.ACCESS)
+    @immediate_operation(
+        capability=AddonCapabilities.ACCESS,
+        result_cache_ttl=datetime.timedelta(seconds=30),
+        ephemeral_invocation=True,
+    )
     async def list_root_items(self, page_cursor: str = "") -> ItemSampleResult: ...
 
-    @immediate_operation(capability=AddonCapabilities.ACCESS)
+    @immediate_operation(
+        capability=AddonCapabilities.ACCESS,
+        result_cache_ttl=datetime.timedelta(seconds=30),
+        ephemeral_invocation=True,
+    )
     async def list_child_items(
         self,
         item_id: str,
@@ -125,6 +162,17 @@ class StorageAddonInterface(BaseAddonInterface, typing.Protocol):
         item_type: ItemType | None = None,
     ) -> ItemSampleResult: ...
 
+    @immediate_operation(
+        capability=AddonCapabilities.ACCESS,
+        result_cache_ttl=datetime.timedelta(seconds=30),
+        ephemeral_invocation=True,
+    )
+    async def walk_item_tree(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> ItemTreeResult: ...
+
 
 #
 #    ##
@@ -160,9 +208,136 @@ class StorageAddonImp(AddonImp):
 
     config: StorageConfig
 
+    # `list_child_items` calls at once, while walking a tree (see `walk_item_tree`)
+    TREE_WALK_CONCURRENCY: typing.ClassVar[int] = 8
+    TREE_WALK_CONCURRENCY_PER_PROVIDER: typing.ClassVar[int] = 32  # (all walks)
+    # limits on any one tree walk, whatever the caller asks
+    TREE_WALK_MAX_DEPTH: typing.ClassVar[int] = 16
+    TREE_WALK_MAX_ITEMS: typing.ClassVar[int] = 10_000
+
     async def build_wb_config(self) -> dict:
         return {}
 
+    async def walk_item_tree(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> ItemTreeResult:
+        return ItemTreeResult(
+            items=[
+                _tree_item
+                async for _tree_item in self.iter_tree_walk(item_id, max_depth)
+            ]
+        )
+
+    async def iter_operation_items(
+        self, operation: AddonOperationDeclaration, json_kwargs: dict
+    ) -> abc.AsyncIterator:
+        _items = super().iter_operation_items(operation, json_kwargs)
+        if operation.name == "walk_item_tree":
+            _items = self._within_tree_walk_limits(_items)
+        async for _item in _items:
+            yield _item
+
+    async def iter_tree_walk(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> abc.AsyncIterator[TreeItemResult]:
+        """yield items from `walk_item_tree__stream`, within this imp's tree walk limits"""
+        async for _tree_item in self._within_tree_walk_limits(
+            self.walk_item_tree__stream(item_id, max_depth)
+        ):
+            yield _tree_item
+
+    def check_tree_walk_depth(self, max_depth: int) -> None:
+        """raise ValueError unless `max_depth` is from 1 to `TREE_WALK_MAX_DEPTH`"""
+        if not 1 <= max_depth <= self.TREE_WALK_MAX_DEPTH:
+            raise ValueError(
+                f"expected max_depth from 1 to {self.TREE_WALK_MAX_DEPTH}"
+                f" (got {max_depth})"
+            )
+
+    async def walk_item_tree__stream(
+        self,
+        item_id: str,
+        max_depth: int = 1,
+    ) -> abc.AsyncIterator[TreeItemResult]:
+        """yield items in the given folder's subtree (to `max_depth`) as they are found
+
+        by default, lists each folder's children (every page) with `list_child_items`,
+        a level at a time, several folders at once -- an imp may override this to use
+        its provider's own recursive listing instead
+
+        items reachable by more than one path (where a provider allows that) are
+        yielded once, for whichever path is found first
+        """
+        self.check_tree_walk_depth(max_depth)
+        _concurrency = asyncio.Semaphore(self.TREE_WALK_CONCURRENCY)
+        _provider_concurrency = _provider_semaphore(
+            type(self), self.TREE_WALK_CONCURRENCY_PER_PROVIDER
+        )
+
+        async def _list_folder(folder_id: str, folder_path: str):
+            async with _concurrency, _provider_concurrency:
+                _children = []
+                _page_cursor = ""
+                while True:
+                    _page = await self.list_child_items(folder_id, _page_cursor)
+                    _children.extend(_page.items)
+                    if not _page.next_sample_cursor or (
+                        _page.next_sample_cursor == _page_cursor
+                    ):
+                        return folder_id, folder_path, _children
+                    _page_cursor = _page.next_sample_cursor
+
+        _seen_item_ids = {item_id}
+        _folders = [(item_id, "")]  # (item_id, path) for each folder at this depth
+        for _depth in range(1, max_depth + 1):
+            _next_folders = []
+            _listings = [
+                asyncio.ensure_future(_list_folder(*_folder)) for _folder in _folders
+            ]
+            try:
+                for _listing in asyncio.as_completed(_listings):
+                    _folder_id, _folder_path, _children = await _listing
+                    for _child in _children:
+                        if _child.item_id in _seen_item_ids:
+                            continue
+                        _seen_item_ids.add(_child.item_id)
+                        _path = (
+                            f"{_folder_path}/{_child.item_name}"
+                            if _folder_path
+                            else _child.item_name
+                        )
+                        yield TreeItemResult(
+                            item=_child,
+                            parent_item_id=_folder_id,
+                            path=_path,
+                            depth=_depth,
+                        )
+                        if _child.item_type is ItemType.FOLDER:
+                            _next_folders.append((_child.item_id, _path))
+            finally:
+                for _listing in _listings:
+                    _listing.cancel()  # (if stopped early)
+            if not _next_folders:
+                return
+            _folders = _next_folders
+
+    async def _within_tree_walk_limits(
+        self, tree_items: abc.AsyncIterator[TreeItemResult]
+    ) -> abc.AsyncIterator[TreeItemResult]:
+        _count = 0
+        async for _tree_item in tree_items:
+            _count += 1
+            if _count > self.TREE_WALK_MAX_ITEMS:
+                raise ValueError(
+                    f"more than {self.TREE_WALK_MAX_ITEMS} items in the tree"
+                    " (walk a smaller subtree, or less deep)"
+                )
+            yield _tree_item
+
 
 @dataclasses.dataclass
 class StorageAddonHttpRequestorImp(StorageAddonImp):
@@ -177,10 +352,33 @@ class StorageAddonClientRequestorImp[T](StorageAddonImp):
 
     client: T = dataclasses.field(init=False)
     credentials: dataclasses.InitVar[Credentials]
-
-    def __post_init__(self, credentials):
-        self.client = self.create_client(credentials)
+    # a client made before with the same credentials, to use instead of a new one
+    reusable_client: dataclasses.InitVar[T | None] = None
+
+    def __post_init__(self, credentials, reusable_client=None):
+        self.client = (
+            self.create_client(credentials)
+            if reusable_client is None
+            else reusable_client
+        )
 
     @staticmethod
     def create_client(credentials) -> T:
         raise NotImplementedError
+
+
+###
+# module-private helpers
+
+# semaphores shared by all tree walks thru each imp class (one set per event loop)
+_provider_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[type, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def _provider_semaphore(imp_cls: type, limit: int) -> asyncio.Semaphore:
+    _loop_semaphores = _provider_semaphores.setdefault(asyncio.get_running_loop(), {})
+    try:
+        return _loop_semaphores[imp_cls]
+    except KeyError:
+        return _loop_semaphores.setdefault(imp_cls, asyncio.Semaphore(limit))
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import dataclasses
 import enum
+import functools
 import inspect
 import types
 import typing
@@ -20,6 +21,7 @@ __all__ = (
     "json_for_dataclass",
     "json_for_kwargs",
     "json_for_typed_value",
+    "kwargs_decoder_for",
     "kwargs_from_json",
     "typed_value_from_json",
 )
@@ -203,76 +205,21 @@ def json_for_typed_value(
     >>> json_for_typed_value(list[int], [2,3,'7'])
     [2, 3, 7]
     """
-    _type, _contained_type, _is_optional = _unwrap_type(
-        type_annotation, self_type=self_type
-    )
-    if value is None:
-        if not _is_optional:
-            raise exceptions.ValueNotJsonableWithType(value, type_annotation)
-        return None
-    if _type is typing.Any:
-        return value
-    if dataclasses.is_dataclass(_type):
-        if isinstance(value, dict):
-            return json_for_kwargs(_type, value)
-        if isinstance(value, _type):
-            return json_for_dataclass(value)
-        raise exceptions.ValueNotJsonableWithType(value, _type)
-    if isinstance(_type, type) and issubclass(_type, enum.Enum):
-        if value not in _type:
-            raise exceptions.ValueNotJsonableWithType(value, _type)
-        return value.name
-    if _type in (str, int, float, bool):  # check str before abc.Collection
-        if not isinstance(value, (str, int, float)):
-            raise exceptions.ValueNotJsonableWithType(value, _type)
-        assert issubclass(_type, (str, int, float))  # assertion for type-checker
-        return _type(value)
-    if _type is dict:
-        if isinstance(value, dict):
-            return {k: json_for_typed_value(typing.Any, v) for k, v in value.items()}
-        raise exceptions.ValueNotJsonableWithType(value, _type)
-
-    if _type is list:
-        if isinstance(value, list):
-            return [
-                json_for_typed_value(_contained_type or typing.Any, _item_value)
-                for _item_value in value
-            ]
-        raise exceptions.ValueNotJsonableWithType(value, _type)
-    if (
-        isinstance(_type, type)
-        and issubclass(_type, abc.Collection)
-        and _contained_type is not None
-    ):
-        return [
-            json_for_typed_value(_contained_type, _item_value) for _item_value in value
-        ]
-    raise exceptions.ValueNotJsonableWithType(value, _type)
+    return _encoder_for(type_annotation, self_type)(value)
 
 
 def json_for_kwargs(annotated_callable: abc.Callable, kwargs: dict) -> dict:
     """return json-serializable representation of the kwargs for the given signature"""
-    _annotations = inspect.get_annotations(annotated_callable, eval_str=True)
     return {
-        _keyword: json_for_typed_value(
-            _annotation,
-            kwargs[_keyword],
-            self_type=annotated_callable,
-        )
-        for (_keyword, _annotation) in _annotations.items()
+        _keyword: _encode(kwargs[_keyword])
+        for (_keyword, _encode) in _keyword_encoders_for(annotated_callable)
         if _keyword in kwargs
     }
 
 
 def json_for_dataclass(dataclass_instance) -> dict:
     """return json-serializable representation of the dataclass instance"""
-    _dataclass = dataclass_instance.__class__
-    _kwargs: dict = {}
-    for _field in dataclasses.fields(dataclass_instance):
-        _field_value = getattr(dataclass_instance, _field.name)
-        if _field_value != _field.default:
-            _kwargs[_field.name] = _field_value
-    return json_for_kwargs(_dataclass, _kwargs)
+    return _dataclass_encoder_for(dataclass_instance.__class__)(dataclass_instance)
 
 
 ###
@@ -284,24 +231,15 @@ def kwargs_from_json(
     args_from_json: dict,
 ) -> dict:
     """parse json into python kwargs"""
-    _signature = inspect.signature(annotated_callable)
-    _annotations = inspect.get_annotations(annotated_callable)
-    try:
-        _kwargs = {
-            _name: typed_value_from_json(
-                _annotations[_name], _value, self_type=annotated_callable
-            )
-            for (_name, _value) in args_from_json.items()
-        }
-        # use inspect.Signature.bind() to validate all required kwargs present
-        if "self" in _signature.parameters:
-            _bound_kwargs = _signature.bind(self=..., **_kwargs)
-            _bound_kwargs.arguments.pop("self", None)
-        else:
-            _bound_kwargs = _signature.bind(**_kwargs)
-    except (TypeError, KeyError):
-        raise exceptions.InvalidJsonArgsForSignature(args_from_json, _signature)
-    return _bound_kwargs.arguments
+    return _kwargs_decoder_for(annotated_callable)(args_from_json)
+
+
+def kwargs_decoder_for(annotated_callable: typing.Any) -> abc.Callable[[dict], dict]:
+    """get a function to parse json into python kwargs for the given signature
+
+    (same as `kwargs_from_json`, for callers that would rather hold onto the decoder)
+    """
+    return _kwargs_decoder_for(annotated_callable)
 
 
 def dataclass_from_json(dataclass: type, dataclass_json: dict):
@@ -314,32 +252,254 @@ def typed_value_from_json(
     type_annotation: type, json_value: typing.Any, self_type: type | None = None
 ) -> typing.Any:
     """parse json into a python value of the given type"""
-    _type, _contained_type, _is_optional = _unwrap_type(
-        type_annotation, self_type=self_type
+    return _decoder_for(type_annotation, self_type)(json_value)
+
+
+###
+# compiling codecs
+#
+# each type annotation (or annotated callable) is inspected only once, into an encoder
+# or decoder function specialized for it (cached for the life of the process -- fine,
+# since annotations come from static code)
+#
+# (compiling does not raise -- a problem with the annotation is instead raised by the
+# compiled function each time it is called, as when inspecting on every call)
+
+_Encoder = abc.Callable[[typing.Any], typing.Any]
+_Decoder = abc.Callable[[typing.Any], typing.Any]
+
+
+@functools.cache
+def _encoder_for(type_annotation: typing.Any, self_type: typing.Any = None) -> _Encoder:
+    try:
+        _type, _contained_type, _is_optional = _unwrap_type(
+            type_annotation, self_type=self_type
+        )
+    except exceptions.JsonArgumentsError as _error:
+        return _raiser_for(_error)
+    _encode_nonnone = _nonnone_encoder_for(_type, _contained_type)
+
+    def _encode(value):
+        if value is None:
+            if not _is_optional:
+                raise exceptions.ValueNotJsonableWithType(value, type_annotation)
+            return None
+        return _encode_nonnone(value)
+
+    return _encode
+
+
+def _nonnone_encoder_for(
+    nonnone_type: typing.Any, contained_type: typing.Any
+) -> _Encoder:
+    if nonnone_type is typing.Any:
+        return _same_value
+    if dataclasses.is_dataclass(nonnone_type):
+        assert isinstance(nonnone_type, type)  # assertion for type-checker
+
+        def _encode_dataclass(value):
+            if isinstance(value, dict):
+                return json_for_kwargs(nonnone_type, value)
+            if isinstance(value, nonnone_type):
+                return json_for_dataclass(value)
+            raise exceptions.ValueNotJsonableWithType(value, nonnone_type)
+
+        return _encode_dataclass
+    if isinstance(nonnone_type, type) and issubclass(nonnone_type, enum.Enum):
+
+        def _encode_enum(value):
+            if value not in nonnone_type:
+                raise exceptions.ValueNotJsonableWithType(value, nonnone_type)
+            return value.name
+
+        return _encode_enum
+    if nonnone_type in (str, int, float, bool):  # check str before abc.Collection
+
+        def _encode_scalar(value):
+            if not isinstance(value, (str, int, float)):
+                raise exceptions.ValueNotJsonableWithType(value, nonnone_type)
+            return nonnone_type(value)
+
+        return _encode_scalar
+    if nonnone_type is dict:
+        _encode_any = _encoder_for(typing.Any)
+
+        def _encode_dict(value):
+            if isinstance(value, dict):
+                return {k: _encode_any(v) for k, v in value.items()}
+            raise exceptions.ValueNotJsonableWithType(value, nonnone_type)
+
+        return _encode_dict
+    if nonnone_type is list:
+        _encode_list_item = _encoder_for(contained_type or typing.Any)
+
+        def _encode_list(value):
+            if isinstance(value, list):
+                return [_encode_list_item(_item_value) for _item_value in value]
+            raise exceptions.ValueNotJsonableWithType(value, nonnone_type)
+
+        return _encode_list
+    if (
+        isinstance(nonnone_type, type)
+        and issubclass(nonnone_type, abc.Collection)
+        and contained_type is not None
+    ):
+        _encode_item = _encoder_for(contained_type)
+        return lambda value: [_encode_item(_item_value) for _item_value in value]
+
+    def _encode_unjsonable(value):
+        raise exceptions.ValueNotJsonableWithType(value, nonnone_type)
+
+    return _encode_unjsonable
+
+
+@functools.cache
+def _keyword_encoders_for(
+    annotated_callable: typing.Any,
+) -> tuple[tuple[str, _Encoder], ...]:
+    _annotations = inspect.get_annotations(annotated_callable, eval_str=True)
+    return tuple(
+        (_keyword, _encoder_for(_annotation, annotated_callable))
+        for (_keyword, _annotation) in _annotations.items()
+    )
+
+
+@functools.cache
+def _dataclass_encoder_for(dataclass: type) -> _Encoder:
+    # fields with default values are omitted while equal to the default
+    _defaults = {
+        _field.name: _field.default for _field in dataclasses.fields(dataclass)
+    }
+    _field_encoders = tuple(
+        (_keyword, _defaults[_keyword], _encode)
+        for (_keyword, _encode) in _keyword_encoders_for(dataclass)
+        if _keyword in _defaults
     )
-    if json_value is None:
-        if not _is_optional:
-            raise exceptions.JsonValueInvalidForType(json_value, type_annotation)
-        return None
-    if dataclasses.is_dataclass(_type):
-        if not isinstance(json_value, dict):
-            raise exceptions.JsonValueInvalidForType(json_value, _type)
-        return dataclass_from_json(_type, json_value)
-    if isinstance(_type, type) and issubclass(_type, enum.Enum):
-        return _type(json_value.lower() if isinstance(json_value, str) else json_value)
-    if _type in (str, int, float):
-        if not isinstance(json_value, _type):
-            raise exceptions.JsonValueInvalidForType(json_value, _type)
-        return json_value
-    if _contained_type is not None and issubclass(_type, abc.Collection):
-        _container_type = _type if issubclass(_type, (tuple, set, frozenset)) else list
-        return _container_type(
-            typed_value_from_json(
-                _contained_type, _contained_value, self_type=self_type
-            )
-            for _contained_value in json_value
+
+    def _encode_dataclass_instance(dataclass_instance):
+        _json = {}
+        for _keyword, _default, _encode in _field_encoders:
+            _field_value = getattr(dataclass_instance, _keyword)
+            if _field_value != _default:
+                _json[_keyword] = _encode(_field_value)
+        return _json
+
+    return _encode_dataclass_instance
+
+
+@functools.cache
+def _decoder_for(type_annotation: typing.Any, self_type: typing.Any = None) -> _Decoder:
+    try:
+        _type, _contained_type, _is_optional = _unwrap_type(
+            type_annotation, self_type=self_type
+        )
+    except exceptions.JsonArgumentsError as _error:
+        return _raiser_for(_error)
+    _decode_nonnone = _nonnone_decoder_for(_type, _contained_type, self_type)
+
+    def _decode(json_value):
+        if json_value is None:
+            if not _is_optional:
+                raise exceptions.JsonValueInvalidForType(json_value, type_annotation)
+            return None
+        return _decode_nonnone(json_value)
+
+    return _decode
+
+
+def _nonnone_decoder_for(
+    nonnone_type: typing.Any, contained_type: typing.Any, self_type: typing.Any
+) -> _Decoder:
+    if dataclasses.is_dataclass(nonnone_type):
+        assert isinstance(nonnone_type, type)  # assertion for type-checker
+
+        def _decode_dataclass(json_value):
+            if not isinstance(json_value, dict):
+                raise exceptions.JsonValueInvalidForType(json_value, nonnone_type)
+            return dataclass_from_json(nonnone_type, json_value)
+
+        return _decode_dataclass
+    if isinstance(nonnone_type, type) and issubclass(nonnone_type, enum.Enum):
+        return lambda json_value: nonnone_type(
+            json_value.lower() if isinstance(json_value, str) else json_value
         )
-    raise exceptions.TypeNotJsonable(_type)
+    if nonnone_type in (str, int, float):
+
+        def _decode_scalar(json_value):
+            if not isinstance(json_value, nonnone_type):
+                raise exceptions.JsonValueInvalidForType(json_value, nonnone_type)
+            return json_value
+
+        return _decode_scalar
+    if contained_type is not None and issubclass(nonnone_type, abc.Collection):
+        _container_type = (
+            nonnone_type if issubclass(nonnone_type, (tuple, set, frozenset)) else list
+        )
+        _decode_item = _decoder_for(contained_type, self_type)
+        return lambda json_value: _container_type(map(_decode_item, json_value))
+
+    def _decode_unjsonable(json_value):
+        raise exceptions.TypeNotJsonable(nonnone_type)
+
+    return _decode_unjsonable
+
+
+@functools.cache
+def _kwargs_decoder_for(annotated_callable: typing.Any) -> abc.Callable[[dict], dict]:
+    _signature = inspect.signature(annotated_callable)
+    _decoders = {
+        _name: _decoder_for(_annotation, annotated_callable)
+        for (_name, _annotation) in inspect.get_annotations(annotated_callable).items()
+    }
+    _has_self = "self" in _signature.parameters
+    # for the usual signature (all parameters may be given by name), check kwargs
+    # the way `inspect.Signature.bind()` would, but without binding
+    _bindable_by_name = all(
+        _param.kind in (_param.POSITIONAL_OR_KEYWORD, _param.KEYWORD_ONLY)
+        for _param in _signature.parameters.values()
+    )
+    _param_names = tuple(_name for _name in _signature.parameters if _name != "self")
+    _all_names = frozenset(_param_names)
+    _required_names = frozenset(
+        _name
+        for _name in _param_names
+        if _signature.parameters[_name].default is inspect.Parameter.empty
+    )
+
+    def _decode_kwargs(args_from_json: dict) -> dict:
+        try:
+            _kwargs = {
+                _name: _decoders[_name](_value)
+                for (_name, _value) in args_from_json.items()
+            }
+            if _bindable_by_name:
+                if not (_required_names <= _kwargs.keys() <= _all_names):
+                    raise TypeError
+                return {
+                    _name: _kwargs[_name] for _name in _param_names if _name in _kwargs
+                }
+            # use inspect.Signature.bind() to validate all required kwargs present
+            if _has_self:
+                _bound_kwargs = _signature.bind(self=..., **_kwargs)
+                _bound_kwargs.arguments.pop("self", None)
+            else:
+                _bound_kwargs = _signature.bind(**_kwargs)
+        except (TypeError, KeyError):
+            raise exceptions.InvalidJsonArgsForSignature(args_from_json, _signature)
+        return _bound_kwargs.arguments
+
+    return _decode_kwargs
+
+
+def _same_value(value):
+    return value
+
+
+def _raiser_for(error: Exception) -> abc.Callable[[typing.Any], typing.NoReturn]:
+    def _raise(value):
+        raise type(error)(*error.args)
+
+    return _raise
 
 
 ###
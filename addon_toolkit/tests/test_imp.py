@@ -1,6 +1,10 @@
+import asyncio
 import dataclasses
 import unittest
 from http import HTTPMethod
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
 
 from addon_toolkit import (
     AddonCapabilities,
@@ -13,6 +17,14 @@ from addon_toolkit import (
     immediate_operation,
     redirect_operation,
 )
+from addon_toolkit.interfaces.storage import (
+    ItemResult,
+    ItemSampleResult,
+    ItemType,
+    StorageAddonImp,
+    StorageAddonInterface,
+    StorageConfig,
+)
 
 
 class TestAddonImp(unittest.TestCase):
@@ -155,3 +167,253 @@ class TestAddonImp(unittest.TestCase):
                 HTTPMethod.GET,
             ),
         )
+
+    def test_operation_invokers(self) -> None:
+        # prepared for each implemented operation when the imp class is created
+        self.assertEqual(
+            set(self._MyImp._operation_invokers),
+            {"url_for_get", "url_for_put"},
+        )
+        self.assertIs(
+            self._MyImp._operation_invokers["url_for_get"].operation,
+            self._MyImp.get_operation_declaration("url_for_get"),
+        )
+
+    def test_invoke_replaced_operation(self) -> None:
+        # a method replaced after the class was created is still the one invoked
+        _replaced_result = RedirectResult("https://elsewhere.example/", HTTPMethod.GET)
+        with patch.object(self._MyImp, "url_for_get", return_value=_replaced_result):
+            _result = self._MyImp().invoke_operation__blocking(
+                self._MyImp.get_operation_declaration("url_for_get"),
+                {"checksum_iri": "..."},
+            )
+        self.assertEqual(_result, _replaced_result)
+
+
+class TestAddonImpIterOperationItems(unittest.TestCase):
+    # streaming items from listing operations
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        @dataclasses.dataclass
+        class _MyListingResult:
+            items: list[str]
+            next_sample_cursor: str | None = None
+
+        class _MyListingInterface(BaseAddonInterface):
+            @immediate_operation(capability=AddonCapabilities.ACCESS)
+            async def list_things(
+                self, prefix: str, page_cursor: str = ""
+            ) -> _MyListingResult:
+                raise exceptions.OperationNotImplemented
+
+            @immediate_operation(capability=AddonCapabilities.ACCESS)
+            async def get_thing(self, thing_id: str) -> RedirectResult:
+                raise exceptions.OperationNotImplemented
+
+        class _MyPagedImp(AddonImp):
+            ADDON_INTERFACE = _MyListingInterface
+
+            async def list_things(
+                self, prefix: str, page_cursor: str = ""
+            ) -> _MyListingResult:
+                _page = int(page_cursor or 0)
+                return _MyListingResult(
+                    items=[f"{prefix}{_page}a", f"{prefix}{_page}b"],
+                    next_sample_cursor=(str(_page + 1) if _page < 2 else None),
+                )
+
+        class _MyStreamingImp(_MyPagedImp):
+            async def list_things__stream(self, prefix: str):
+                for _i in range(3):
+                    yield f"{prefix}{_i}"
+
+        cls._list_op = _MyListingInterface.get_operation_by_name("list_things")
+        cls._get_op = _MyListingInterface.get_operation_by_name("get_thing")
+        cls._MyPagedImp = _MyPagedImp
+        cls._MyStreamingImp = _MyStreamingImp
+
+    def _collect(self, imp: AddonImp, operation, json_kwargs) -> list:
+        async def _collect_items():
+            return [
+                _item
+                async for _item in imp.iter_operation_items(operation, json_kwargs)
+            ]
+
+        return async_to_sync(_collect_items)()
+
+    def test_is_listing(self) -> None:
+        self.assertTrue(self._list_op.is_listing)
+        self.assertTrue(self._list_op.is_paged)
+        self.assertFalse(self._get_op.is_listing)
+        self.assertFalse(self._get_op.is_paged)
+
+    def test_follows_pages(self) -> None:
+        self.assertEqual(
+            self._collect(self._MyPagedImp(), self._list_op, {"prefix": "p"}),
+            ["p0a", "p0b", "p1a", "p1b", "p2a", "p2b"],
+        )
+        self.assertEqual(
+            self._collect(
+                self._MyPagedImp(), self._list_op, {"prefix": "p", "page_cursor": "2"}
+            ),
+            ["p2a", "p2b"],
+        )
+
+    def test_stream_method(self) -> None:
+        self.assertEqual(
+            self._collect(
+                self._MyStreamingImp(),
+                self._list_op,
+                {"prefix": "s", "page_cursor": ""},
+            ),
+            ["s0", "s1", "s2"],
+        )
+
+    def test_not_listing(self) -> None:
+        with self.assertRaises(exceptions.OperationNotValid):
+            self._collect(self._MyPagedImp(), self._get_op, {"thing_id": "x"})
+
+    def test_pages_prefetched(self) -> None:
+        _imp = self._MyPagedImp()
+        _requested_cursors = []
+        _list_things = _imp.list_things
+
+        async def _recording_list_things(prefix: str, page_cursor: str = ""):
+            _requested_cursors.append(page_cursor)
+            return await _list_things(prefix, page_cursor)
+
+        _imp.list_things = _recording_list_things
+
+        async def _first_page_only():
+            _pages = _imp.iter_operation_pages(self._list_op, {"prefix": "p"})
+            _first_page = await anext(_pages)
+            await asyncio.sleep(0)  # (let the next page start)
+            _requested_so_far = list(_requested_cursors)
+            await _pages.aclose()
+            return _first_page, _requested_so_far
+
+        _first_page, _requested_so_far = async_to_sync(_first_page_only)()
+        self.assertEqual(_first_page.items, ["p0a", "p0b"])
+        self.assertEqual(_requested_so_far, ["", "1"])  # next page underway
+        self.assertEqual(_requested_cursors, ["", "1"])  # ...but no further
+
+
+class TestStorageImpWalkItemTree(unittest.TestCase):
+    # walking folder subtrees (by default, with `list_child_items`)
+
+    _TREE = {  # folder id: child ids
+        "root": ["a", "b", "f1"],
+        "a": ["a1", "shared"],
+        "b": ["shared", "b1"],
+        "shared": ["deep"],
+        "deep": ["deeper"],
+    }
+
+    def setUp(self) -> None:
+        _tree = self._TREE
+        self._in_flight = 0
+        self._max_in_flight = 0
+
+        class _MyTreeImp(StorageAddonImp):
+            TREE_WALK_CONCURRENCY = 2
+
+            async def list_child_items(
+                _self, item_id: str, page_cursor: str = "", item_type=None
+            ) -> ItemSampleResult:
+                self._in_flight += 1
+                self._max_in_flight = max(self._max_in_flight, self._in_flight)
+                await asyncio.sleep(0.001)
+                self._in_flight -= 1
+                _child_ids = _tree[item_id]
+                _start = int(page_cursor or 0)  # one child per page
+                return ItemSampleResult(
+                    items=[
+                        ItemResult(
+                            item_id=_child_id,
+                            item_name=f"{_child_id}!",
+                            item_type=(
+                                ItemType.FOLDER if _child_id in _tree else ItemType.FILE
+                            ),
+                        )
+                        for _child_id in _child_ids[_start:][:1]
+                    ],
+                    next_sample_cursor=(
+                        str(_start + 1) if _start + 1 < len(_child_ids) else None
+                    ),
+                )
+
+        self._imp = _MyTreeImp(
+            config=StorageConfig(max_upload_mb=1, external_api_url="")
+        )
+
+    def _walk(self, item_id: str, max_depth: int) -> dict[str, tuple]:
+        _result = async_to_sync(self._imp.walk_item_tree)(item_id, max_depth)
+        return {
+            _tree_item.item.item_id: (
+                _tree_item.parent_item_id,
+                _tree_item.path,
+                _tree_item.depth,
+            )
+            for _tree_item in _result.items
+        }
+
+    def test_walk(self) -> None:
+        _walked = self._walk("root", 3)
+        self.assertEqual(
+            set(_walked),
+            {"a", "b", "f1", "a1", "shared", "b1", "deep"},  # each once, to depth 3
+        )
+        self.assertEqual(_walked["a1"], ("a", "a!/a1!", 2))
+        self.assertIn(_walked["shared"][0], ("a", "b"))
+        self.assertEqual(_walked["deep"][0], "shared")
+        self.assertEqual(_walked["deep"][2], 3)
+        self.assertEqual(self._max_in_flight, 2)
+
+    def test_shallow(self) -> None:
+        self.assertEqual(
+            self._walk("root", 1),
+            {
+                "a": ("root", "a!", 1),
+                "b": ("root", "b!", 1),
+                "f1": ("root", "f1!", 1),
+            },
+        )
+
+    def test_limits(self) -> None:
+        with self.subTest("depth"):
+            with self.assertRaises(ValueError):
+                self._walk("root", self._imp.TREE_WALK_MAX_DEPTH + 1)
+            with self.assertRaises(ValueError):
+                self._walk("root", 0)
+        with self.subTest("items"):
+            with patch.object(self._imp, "TREE_WALK_MAX_ITEMS", 2):
+                with self.assertRaises(ValueError):
+                    self._walk("root", 1)
+                _operation = StorageAddonInterface.get_operation_by_name(
+                    "walk_item_tree"
+                )
+
+                async def _stream_all():
+                    return [
+                        _item
+                        async for _item in self._imp.iter_operation_items(
+                            _operation, {"item_id": "root", "max_depth": 1}
+                        )
+                    ]
+
+                with self.assertRaises(ValueError):
+                    async_to_sync(_stream_all)()
+
+    def test_is_operation(self) -> None:
+        _operation = StorageAddonInterface.get_operation_by_name("walk_item_tree")
+        self.assertTrue(_operation.is_listing)
+        self.assertFalse(_operation.is_paged)
+        self.assertEqual(
+            async_to_sync(self._imp.invoke_operation)(
+                _operation, {"item_id": "shared", "max_depth": 5}
+            )
+            .items[-1]
+            .path,
+            "deep!/deeper!",
+        )
@@ -0,0 +1,446 @@
+"""property tests: compiled json codecs give exactly what inspecting on every call gave
+
+(compared with a copy of `addon_toolkit.json_arguments` as it was before compiling,
+over many random -- and often invalid -- values)
+"""
+
+import dataclasses
+import enum
+import inspect
+import random
+import typing
+import unittest
+from collections import abc
+
+from addon_toolkit import (
+    exceptions,
+    json_arguments,
+)
+from addon_toolkit.interfaces.storage import (
+    ItemResult,
+    ItemSampleResult,
+    ItemType,
+    StorageAddonInterface,
+    TreeItemResult,
+)
+
+
+_CASES_PER_ANNOTATION = 200
+
+
+class _Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+@dataclasses.dataclass
+class _Node:
+    name: str
+    weight: float = 1.0
+    color: _Color | None = None
+    tags: tuple[str] = ()
+    children: list[typing.Self] = dataclasses.field(default_factory=list)
+    extra: dict | None = None
+
+
+@dataclasses.dataclass
+class _Labeled(_Node):
+    label: str = ""
+
+
+def _operation_like(
+    self,
+    item_id: str,
+    page_cursor: str = "",
+    limit: int | None = None,
+    colors: frozenset[_Color] = frozenset(),
+    node: _Node | None = None,
+): ...
+
+
+def _keyword_only_like(*, item_id: str, limit: int = 10): ...
+
+
+def _unusual_signature_like(item_id: str, /, limit: int = 10, **more: str): ...
+
+
+_ANNOTATIONS = (
+    str,
+    int,
+    float,
+    bool,
+    dict,
+    list,
+    typing.Any,
+    str | None,
+    list[int],
+    tuple[str],
+    frozenset[_Color],
+    abc.Sequence[_Node] | None,
+    dict[str, int],  # not jsonable
+    _Color,
+    ItemType,
+    _Node,
+    _Labeled,
+    _Node | None,
+    ItemResult,
+    ItemSampleResult,
+    TreeItemResult,
+)
+
+_JUNK = (None, 0, 7, -2.5, "", "red", "FILE", True, [], [1, "a"], {}, {"a": None})
+
+
+###
+# reference: json_arguments as it was (inspecting annotations on every call)
+
+
+def _reference_json_for_typed_value(
+    type_annotation: typing.Any,
+    value: typing.Any,
+    *,
+    self_type: typing.Any = None,
+):
+    _type, _contained_type, _is_optional = json_arguments._unwrap_type(
+        type_annotation, self_type=self_type
+    )
+    if value is None:
+        if not _is_optional:
+            raise exceptions.ValueNotJsonableWithType(value, type_annotation)
+        return None
+    if _type is typing.Any:
+        return value
+    if dataclasses.is_dataclass(_type):
+        if isinstance(value, dict):
+            return _reference_json_for_kwargs(_type, value)
+        if isinstance(value, _type):
+            return _reference_json_for_dataclass(value)
+        raise exceptions.ValueNotJsonableWithType(value, _type)
+    if isinstance(_type, type) and issubclass(_type, enum.Enum):
+        if value not in _type:
+            raise exceptions.ValueNotJsonableWithType(value, _type)
+        return value.name
+    if _type in (str, int, float, bool):  # check str before abc.Collection
+        if not isinstance(value, (str, int, float)):
+            raise exceptions.ValueNotJsonableWithType(value, _type)
+        assert issubclass(_type, (str, int, float))  # assertion for type-checker
+        return _type(value)
+    if _type is dict:
+        if isinstance(value, dict):
+            return {
+                k: _reference_json_for_typed_value(typing.Any, v)
+                for k, v in value.items()
+            }
+        raise exceptions.ValueNotJsonableWithType(value, _type)
+
+    if _type is list:
+        if isinstance(value, list):
+            return [
+                _reference_json_for_typed_value(
+                    _contained_type or typing.Any, _item_value
+                )
+                for _item_value in value
+            ]
+        raise exceptions.ValueNotJsonableWithType(value, _type)
+    if (
+        isinstance(_type, type)
+        and issubclass(_type, abc.Collection)
+        and _contained_type is not None
+    ):
+        return [
+            _reference_json_for_typed_value(_contained_type, _item_value)
+            for _item_value in value
+        ]
+    raise exceptions.ValueNotJsonableWithType(value, _type)
+
+
+def _reference_json_for_kwargs(annotated_callable: abc.Callable, kwargs: dict) -> dict:
+    _annotations = inspect.get_annotations(annotated_callable, eval_str=True)
+    return {
+        _keyword: _reference_json_for_typed_value(
+            _annotation,
+            kwargs[_keyword],
+            self_type=annotated_callable,
+        )
+        for (_keyword, _annotation) in _annotations.items()
+        if _keyword in kwargs
+    }
+
+
+def _reference_json_for_dataclass(dataclass_instance) -> dict:
+    _dataclass = dataclass_instance.__class__
+    _kwargs: dict = {}
+    for _field in dataclasses.fields(dataclass_instance):
+        _field_value = getattr(dataclass_instance, _field.name)
+        if _field_value != _field.default:
+            _kwargs[_field.name] = _field_value
+    return _reference_json_for_kwargs(_dataclass, _kwargs)
+
+
+def _reference_kwargs_from_json(
+    annotated_callable: typing.Any,
+    args_from_json: dict,
+) -> dict:
+    _signature = inspect.signature(annotated_callable)
+    _annotations = inspect.get_annotations(annotated_callable)
+    try:
+        _kwargs = {
+            _name: _reference_typed_value_from_json(
+                _annotations[_name], _value, self_type=annotated_callable
+            )
+            for (_name, _value) in args_from_json.items()
+        }
+        # use inspect.Signature.bind() to validate all required kwargs present
+        if "self" in _signature.parameters:
+            _bound_kwargs = _signature.bind(self=..., **_kwargs)
+            _bound_kwargs.arguments.pop("self", None)
+        else:
+            _bound_kwargs = _signature.bind(**_kwargs)
+    except (TypeError, KeyError):
+        raise exceptions.InvalidJsonArgsForSignature(args_from_json, _signature)
+    return _bound_kwargs.arguments
+
+
+def _reference_dataclass_from_json(dataclass: type, dataclass_json: dict):
+    _kwargs = _reference_kwargs_from_json(dataclass, dataclass_json)
+    return dataclass(**_kwargs)
+
+
+def _reference_typed_value_from_json(
+    type_annotation: type, json_value: typing.Any, self_type: type | None = None
+) -> typing.Any:
+    _type, _contained_type, _is_optional = json_arguments._unwrap_type(
+        type_annotation, self_type=self_type
+    )
+    if json_value is None:
+        if not _is_optional:
+            raise exceptions.JsonValueInvalidForType(json_value, type_annotation)
+        return None
+    if dataclasses.is_dataclass(_type):
+        if not isinstance(json_value, dict):
+            raise exceptions.JsonValueInvalidForType(json_value, _type)
+        return _reference_dataclass_from_json(_type, json_value)
+    if isinstance(_type, type) and issubclass(_type, enum.Enum):
+        return _type(json_value.lower() if isinstance(json_value, str) else json_value)
+    if _type in (str, int, float):
+        if not isinstance(json_value, _type):
+            raise exceptions.JsonValueInvalidForType(json_value, _type)
+        return json_value
+    if _contained_type is not None and issubclass(_type, abc.Collection):
+        _container_type = _type if issubclass(_type, (tuple, set, frozenset)) else list
+        return _container_type(
+            _reference_typed_value_from_json(
+                _contained_type, _contained_value, self_type=self_type
+            )
+            for _contained_value in json_value
+        )
+    raise exceptions.TypeNotJsonable(_type)
+
+
+###
+# random values
+
+
+def _random_value(rng: random.Random, annotation: typing.Any, depth: int = 0):
+    """a random python value for the annotation (sometimes wrong on purpose)"""
+    if rng.random() < 0.1:
+        return rng.choice(_JUNK)
+    if isinstance(annotation, typing._GenericAlias | type(str | None)) and (
+        type(None) in typing.get_args(annotation)
+    ):
+        if rng.random() < 0.3:
+            return None
+        (annotation,) = (
+            _arg for _arg in typing.get_args(annotation) if _arg is not type(None)
+        )
+    _origin = typing.get_origin(annotation)
+    if _origin is not None:
+        _args = typing.get_args(annotation)
+        _item_annotation = _args[0] if len(_args) == 1 else typing.Any
+        _items = [
+            _random_value(rng, _item_annotation, depth + 1)
+            for _ in range(rng.randrange(3 if depth < 2 else 1))
+        ]
+        if _origin in (tuple, frozenset, list):
+            try:
+                return _origin(_items)
+            except TypeError:  # unhashable junk in a frozenset
+                return tuple(_items)
+        return _items
+    if dataclasses.is_dataclass(annotation):
+        _kwargs = {
+            _field.name: _random_value(
+                rng,
+                (annotation if _field.type is typing.Self else _field.type),
+                depth + 1,
+            )
+            for _field in dataclasses.fields(annotation)
+            if depth < 2 or _field.default is dataclasses.MISSING
+            if _field.default_factory is dataclasses.MISSING or depth < 2
+        }
+        if rng.random() < 0.2:
+            return _kwargs  # dataclass kwargs may be given as a dict
+        try:
+            return annotation(**_kwargs)
+        except Exception:
+            return _kwargs
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return rng.choice(list(annotation))
+    if annotation in (str, typing.Any):
+        return rng.choice(("", "a", "folder/file.txt", "7"))
+    if annotation is int:
+        return rng.randrange(-5, 500)
+    if annotation is float:
+        return rng.choice((0.0, 2.5, -1e9))
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is dict:
+        return {"a": rng.choice(_JUNK[1:]), "b": [1, 2]}
+    if annotation is list:
+        return [rng.choice(_JUNK[1:]) for _ in range(rng.randrange(3))]
+    return rng.choice(_JUNK)
+
+
+def _mangled_json(rng: random.Random, json_value):
+    """the given json, maybe with one value replaced by junk"""
+    if rng.random() < 0.15:
+        return rng.choice(_JUNK)
+    if isinstance(json_value, dict) and json_value:
+        _key = rng.choice(list(json_value))
+        return {**json_value, _key: _mangled_json(rng, json_value[_key])}
+    if isinstance(json_value, list) and json_value:
+        _index = rng.randrange(len(json_value))
+        return [
+            (_mangled_json(rng, _item) if _i == _index else _item)
+            for _i, _item in enumerate(json_value)
+        ]
+    return json_value
+
+
+def _outcome(fn, *args, **kwargs):
+    """return value or raised error (as comparable tuple)"""
+    try:
+        return ("returned", fn(*args, **kwargs))
+    except Exception as _error:
+        return ("raised", type(_error), _error.args)
+
+
+class TestCompiledJsonCodecs(unittest.TestCase):
+    def _assert_same_outcome(self, compiled_fn, reference_fn, *args, **kwargs):
+        _expected = _outcome(reference_fn, *args, **kwargs)
+        _actual = _outcome(compiled_fn, *args, **kwargs)
+        self.assertEqual(_actual, _expected, msg=args)
+        return _expected
+
+    def _json_values(self, annotation, seed):
+        # random (valid and invalid) json for the annotation
+        _rng = random.Random(seed)
+        for _ in range(_CASES_PER_ANNOTATION):
+            _value = _random_value(_rng, annotation)
+            _outcome_kind, *_rest = _outcome(
+                _reference_json_for_typed_value, annotation, _value
+            )
+            _json = _rest[0] if _outcome_kind == "returned" else _value
+            yield _mangled_json(_rng, _json)
+
+    def test_json_for_typed_value(self):
+        for _i, _annotation in enumerate(_ANNOTATIONS):
+            _rng = random.Random(_i)
+            with self.subTest(annotation=_annotation):
+                for _ in range(_CASES_PER_ANNOTATION):
+                    self._assert_same_outcome(
+                        json_arguments.json_for_typed_value,
+                        _reference_json_for_typed_value,
+                        _annotation,
+                        _random_value(_rng, _annotation),
+                    )
+
+    def test_json_for_typed_value_with_self_type(self):
+        _rng = random.Random(17)
+        for _ in range(_CASES_PER_ANNOTATION):
+            self._assert_same_outcome(
+                json_arguments.json_for_typed_value,
+                _reference_json_for_typed_value,
+                list[typing.Self],
+                _random_value(_rng, list[_Node]),
+                self_type=_Node,
+            )
+
+    def test_json_for_dataclass(self):
+        for _i, _dataclass in enumerate(
+            (_Node, _Labeled, ItemResult, ItemSampleResult, TreeItemResult)
+        ):
+            _rng = random.Random(_i)
+            with self.subTest(dataclass=_dataclass):
+                for _ in range(_CASES_PER_ANNOTATION):
+                    _value = _random_value(_rng, _dataclass)
+                    if isinstance(_value, _dataclass):
+                        self._assert_same_outcome(
+                            json_arguments.json_for_dataclass,
+                            _reference_json_for_dataclass,
+                            _value,
+                        )
+
+    def test_json_for_kwargs(self):
+        _rng = random.Random(5)
+        _annotations = inspect.get_annotations(_operation_like)
+        for _ in range(_CASES_PER_ANNOTATION):
+            _kwargs = {
+                _name: _random_value(_rng, _annotation)
+                for _name, _annotation in _annotations.items()
+                if _rng.random() < 0.7
+            }
+            self._assert_same_outcome(
+                json_arguments.json_for_kwargs,
+                _reference_json_for_kwargs,
+                _operation_like,
+                _kwargs,
+            )
+
+    def test_typed_value_from_json(self):
+        for _i, _annotation in enumerate(_ANNOTATIONS):
+            with self.subTest(annotation=_annotation):
+                for _json in self._json_values(_annotation, seed=_i):
+                    self._assert_same_outcome(
+                        json_arguments.typed_value_from_json,
+                        _reference_typed_value_from_json,
+                        _annotation,
+                        _json,
+                    )
+
+    def test_kwargs_from_json(self):
+        _operation_fns = [
+            _operation_like,
+            _keyword_only_like,
+            _unusual_signature_like,
+            *(
+                _operation.operation_fn
+                for _operation in StorageAddonInterface.iter_declared_operations()
+            ),
+        ]
+        for _i, _fn in enumerate(_operation_fns):
+            _rng = random.Random(_i)
+            _annotations = {
+                _name: _annotation
+                for _name, _annotation in inspect.get_annotations(
+                    _fn, eval_str=True
+                ).items()
+                if _name not in ("self", "return")
+            }
+            with self.subTest(operation_fn=_fn):
+                for _ in range(_CASES_PER_ANNOTATION):
+                    _kwargs_json = {
+                        _name: next(self._json_values(_annotation, _rng.random()))
+                        for _name, _annotation in _annotations.items()
+                        if _rng.random() < 0.8
+                    }
+                    if _rng.random() < 0.1:
+                        _kwargs_json[_rng.choice(("unexpected", "more", "self"))] = (
+                            "surprise"
+                        )
+                    self._assert_same_outcome(
+                        json_arguments.kwargs_from_json,
+                        _reference_kwargs_from_json,
+                        _fn,
+                        _kwargs_json,
+                    )
@@ -44,6 +44,10 @@ app = Celery(
     ),
     task_routes={
         "addon_service.tasks.invocation.*": {"queue": gv_interactive_queue},
+        # (scheduled invocations are sent to REACTIVE or CHILL; see invocation_scheduling)
+        "addon_service.tasks.invocation_scheduling.*": {"queue": gv_reactive_queue},
+        "addon_service.tasks.invocation_write_behind.*": {"queue": gv_chill_queue},
+        "addon_service.tasks.invocation_retention.*": {"queue": gv_chill_queue},
         "addon_service.tasks.osf_backchannel.*": {"queue": gv_reactive_queue},
         "addon_service.tasks.key_rotation.*": {"queue": gv_chill_queue},
         "addon_service.tasks.clear_expired_sessions.*": {"queue": gv_chill_queue},
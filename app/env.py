@@ -37,6 +37,24 @@ OSFDB_SSLMODE = os.environ.get("OSFDB_SSLMODE", "prefer")
 
 REDIS_HOST = os.environ.get("REDIS_HOST", "redis://192.168.168.167:6379")
 
+# cached operation results (for operations that declare `result_cache_ttl`)
+# may be served this long past their ttl while a fresh result is fetched
+# (set INVOCATION_RESULT_CACHE_ENABLED to "" to disable result caching)
+INVOCATION_RESULT_CACHE_ENABLED = bool(
+    os.environ.get("INVOCATION_RESULT_CACHE_ENABLED", "1")
+)
+INVOCATION_RESULT_CACHE_STALE_SECONDS = int(
+    os.environ.get("INVOCATION_RESULT_CACHE_STALE_SECONDS", 300)
+)
+# "not found" and "access denied" results are cached for a short time,
+# and at most so many at once for any one account
+INVOCATION_NEGATIVE_CACHE_SECONDS = int(
+    os.environ.get("INVOCATION_NEGATIVE_CACHE_SECONDS", 15)
+)
+INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT = int(
+    os.environ.get("INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT", 500)
+)
+
 ###
 # for interacting with osf
 
@@ -44,10 +62,31 @@ OSF_SENSITIVE_DATA_SECRET = os.environ.get("OSF_SENSITIVE_DATA_SECRET", "")
 OSF_SENSITIVE_DATA_SALT = os.environ.get("OSF_SENSITIVE_DATA_SALT", "")
 OSF_HMAC_KEY = os.environ.get("OSF_HMAC_KEY")
 OSF_HMAC_EXPIRATION_SECONDS = int(os.environ.get("OSF_HMAC_EXPIRATION_SECONDS", 110))
+# set OSF_HMAC_REJECT_REPLAYS (to anything) to accept each hmac signature for only one
+# request, remembered in redis until it expires -- off by default, since a client
+# retrying a request may resend its signature; signatures are accepted anyway (with a
+# warning logged) while redis is unavailable
+OSF_HMAC_REJECT_REPLAYS = bool(os.environ.get("OSF_HMAC_REJECT_REPLAYS", ""))
 OSF_BASE_URL = os.environ.get("OSF_BASE_URL", "https://osf.example")
 OSF_API_BASE_URL = os.environ.get("OSF_API_BASE_URL", "https://api.osf.example")
 OSF_AUTH_COOKIE_NAME = os.environ.get("OSF_AUTH_COOKIE_NAME", "osf")
 OSF_AUTH_COOKIE_SECRET = os.environ.get("OSF_AUTH_COOKIE_SECRET", "CHANGEME")
+# permissions from the osf api are cached for OSF_PERMISSION_CACHE_SECONDS (set to 0
+# to ask osf every time) -- a lack of any permission, for OSF_PERMISSION_NEGATIVE_CACHE_SECONDS
+OSF_PERMISSION_CACHE_SECONDS = int(os.environ.get("OSF_PERMISSION_CACHE_SECONDS", 60))
+OSF_PERMISSION_NEGATIVE_CACHE_SECONDS = int(
+    os.environ.get("OSF_PERMISSION_NEGATIVE_CACHE_SECONDS", 10)
+)
+# the user each personal access token belongs to (per the osf api) is cached for
+# OSF_TOKEN_USER_CACHE_SECONDS (set to 0 to ask osf every time), for at most
+# OSF_TOKEN_USER_CACHE_MAX_SIZE tokens at once
+OSF_TOKEN_USER_CACHE_SECONDS = int(os.environ.get("OSF_TOKEN_USER_CACHE_SECONDS", 300))
+OSF_TOKEN_USER_CACHE_MAX_SIZE = int(
+    os.environ.get("OSF_TOKEN_USER_CACHE_MAX_SIZE", 10000)
+)
+# user reference pks are cached by user uri for USER_REFERENCE_CACHE_SECONDS
+# (see `user_reference_cache`; set to 0 to look each up in the database)
+USER_REFERENCE_CACHE_SECONDS = int(os.environ.get("USER_REFERENCE_CACHE_SECONDS", 3600))
 SESSION_COOKIE_DOMAIN = os.environ.get("SESSION_COOKIE_DOMAIN", None)
 SESSION_COOKIE_SECURE = os.environ.get(
     "SESSION_COOKIE_SECURE", True
@@ -57,6 +96,162 @@ SESSION_COOKIE_SAMESITE = os.environ.get(
     "SESSION_COOKIE_SAMESITE", "None"
 )  # Change to "Lax" for local dev
 
+###
+# addon operation invocations
+
+# invocations of "ephemeral" operations are saved after responding, in batches
+# (and only a sample of them, if EPHEMERAL_INVOCATION_SAMPLE_RATE is less than 1 --
+# failed invocations are always saved, but successful ones not sampled leave no
+# record at all, so are missing from the invocation audit log)
+EPHEMERAL_INVOCATION_SAMPLE_RATE = float(
+    os.environ.get("EPHEMERAL_INVOCATION_SAMPLE_RATE", 1.0)
+)
+EPHEMERAL_INVOCATION_BATCH_SIZE = int(
+    os.environ.get("EPHEMERAL_INVOCATION_BATCH_SIZE", 50)
+)
+EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS = int(
+    os.environ.get("EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS", 10)
+)
+
+# the batch invocation endpoint accepts so many invocations per request,
+# and performs at most so many concurrently
+INVOCATION_BATCH_MAX_SIZE = int(os.environ.get("INVOCATION_BATCH_MAX_SIZE", 50))
+INVOCATION_BATCH_CONCURRENCY = int(os.environ.get("INVOCATION_BATCH_CONCURRENCY", 8))
+
+# aggregated listing invocations follow cursors for at most so many items, bytes
+# (of items, as json) and seconds (see `aggregate_invocation__async`)
+INVOCATION_AGGREGATE_MAX_ITEMS = int(
+    os.environ.get("INVOCATION_AGGREGATE_MAX_ITEMS", 10000)
+)
+INVOCATION_AGGREGATE_MAX_BYTES = int(
+    os.environ.get("INVOCATION_AGGREGATE_MAX_BYTES", 4 * 1024 * 1024)
+)
+INVOCATION_AGGREGATE_MAX_SECONDS = int(
+    os.environ.get("INVOCATION_AGGREGATE_MAX_SECONDS", 30)
+)
+
+# live invocation events (server-sent) are streamed for at most
+# INVOCATION_EVENTS_MAX_SECONDS per request, with a keepalive comment when idle
+INVOCATION_EVENTS_MAX_SECONDS = int(
+    os.environ.get("INVOCATION_EVENTS_MAX_SECONDS", 300)
+)
+INVOCATION_EVENTS_KEEPALIVE_SECONDS = int(
+    os.environ.get("INVOCATION_EVENTS_KEEPALIVE_SECONDS", 15)
+)
+
+# operation results longer than INVOCATION_RESULT_INLINE_MAX_LENGTH (as json) are
+# stored compressed and deduplicated, apart from the invocation (as are all tracebacks)
+INVOCATION_RESULT_INLINE_MAX_LENGTH = int(
+    os.environ.get("INVOCATION_RESULT_INLINE_MAX_LENGTH", 4096)
+)
+
+# invocations are kept for INVOCATION_RETENTION_DAYS, unless a longer or shorter
+# retention is given in INVOCATION_RETENTION_POLICY for the invocation's status and/or
+# operation name -- comma-separated, like "ERROR=90,get_item_info=7,get_item_info:ERROR=30"
+INVOCATION_RETENTION_DAYS = int(os.environ.get("INVOCATION_RETENTION_DAYS", 30))
+INVOCATION_RETENTION_POLICY = {
+    _key.strip(): int(_days)
+    for _key, _, _days in (
+        _policy_entry.partition("=")
+        for _policy_entry in os.environ.get(
+            "INVOCATION_RETENTION_POLICY", "ERROR=90"
+        ).split(",")
+        if _policy_entry.strip()
+    )
+}
+
+# eventual invocations are scheduled fairly (see `invocation_scheduling`): at most
+# so many in flight per user and per external service, users with at least
+# INVOCATION_SCHEDULER_BULK_THRESHOLD waiting or in flight get the CHILL queue, and
+# urgency classes are dispatched round-robin by weight (like "REACTIVE=4,CHILL=1")
+INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER = int(
+    os.environ.get("INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER", 4)
+)
+INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE = int(
+    os.environ.get("INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE", 32)
+)
+INVOCATION_SCHEDULER_BULK_THRESHOLD = int(
+    os.environ.get("INVOCATION_SCHEDULER_BULK_THRESHOLD", 10)
+)
+INVOCATION_SCHEDULER_CLASS_WEIGHTS = {
+    _urgency_name.strip(): int(_weight)
+    for _urgency_name, _, _weight in (
+        _weight_entry.partition("=")
+        for _weight_entry in os.environ.get(
+            "INVOCATION_SCHEDULER_CLASS_WEIGHTS", "REACTIVE=4,CHILL=1"
+        ).split(",")
+        if _weight_entry.strip()
+    )
+}
+INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS = int(
+    os.environ.get("INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS", 3600)
+)
+
+# an immediate invocation (thru the async views) still going after
+# INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS is left to finish in the background, with
+# a 202 response to poll -- and once an operation's recent median latency for the same
+# external service or account (over at least INVOCATION_PROMOTION_MIN_SAMPLES) passes
+# that deadline, its invocations are scheduled like eventual ones from the start
+# (set INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS to 0 to always wait)
+# note: the deadline is enforced only in the async invocation views -- the (drf)
+# addon-operation-invocations create view promotes only by that prediction, and
+# otherwise waits for the operation however long it takes
+INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS = float(
+    os.environ.get("INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS", 10)
+)
+INVOCATION_PROMOTION_MIN_SAMPLES = int(
+    os.environ.get("INVOCATION_PROMOTION_MIN_SAMPLES", 5)
+)
+# an immediate invocation still going after INVOCATION_STALE_GOING_TIMEOUT_SECONDS
+# (e.g. left finishing in the background by a process since stopped) is marked failed
+INVOCATION_STALE_GOING_TIMEOUT_SECONDS = int(
+    os.environ.get("INVOCATION_STALE_GOING_TIMEOUT_SECONDS", 600)
+)
+
+# an invocation the same (in user, account, addon, operation and kwargs) as one
+# created less than INVOCATION_COLLAPSE_WINDOW_SECONDS before is not performed again
+# -- it gets the earlier invocation instead (set to 0 to perform every invocation);
+# likewise for the same `Idempotency-Key` header, for INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS
+# (a duplicate waits up to INVOCATION_COLLAPSE_WAIT_SECONDS for the earlier to finish)
+INVOCATION_COLLAPSE_WINDOW_SECONDS = int(
+    os.environ.get("INVOCATION_COLLAPSE_WINDOW_SECONDS", 5)
+)
+INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS = int(
+    os.environ.get("INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS", 86400)
+)
+INVOCATION_COLLAPSE_WAIT_SECONDS = float(
+    os.environ.get("INVOCATION_COLLAPSE_WAIT_SECONDS", 10)
+)
+
+# clients made by addon imps with their own clients (e.g. boto3) are kept for reuse
+# (by imp and credentials) in the same thread for ADDON_IMP_POOL_TTL_SECONDS, at most
+# ADDON_IMP_POOL_MAX_SIZE per thread (see `addon_imp.instantiation`) -- imp instances
+# themselves are not reused; set ADDON_IMP_POOL_MAX_SIZE to 0 to disable
+ADDON_IMP_POOL_MAX_SIZE = int(os.environ.get("ADDON_IMP_POOL_MAX_SIZE", 256))
+ADDON_IMP_POOL_TTL_SECONDS = int(os.environ.get("ADDON_IMP_POOL_TTL_SECONDS", 300))
+
+###
+# inbound rate limits
+
+# requests are rate-limited by scope (see `rate_limiting`), per client (authenticated
+# user, personal access token, or ip address if not authenticated) -- each scope's
+# limit is "<count>/<period>" (period: second, minute, hour or day), a token bucket
+# holding at most <count>, refilled over the period; comma-separated, like "invocation=600/minute,invocation:immediate=300/minute"
+# (scopes: "invocation" for each request creating invocations, "invocation:immediate"
+# for each immediate invocation, "invocation:<operation name>" for each invocation of
+# that operation, "api" for each request to any other endpoint, "api:<resource type>"
+# for each request to that resource type's endpoints -- a scope not given is not limited)
+RATE_LIMITS = {
+    _scope.strip(): _rate.strip()
+    for _scope, _, _rate in (
+        _limit_entry.partition("=")
+        for _limit_entry in os.environ.get(
+            "RATE_LIMITS", "invocation=600/minute,invocation:immediate=300/minute"
+        ).split(",")
+        if _limit_entry.strip()
+    )
+}
+
 ###
 # amqp/celery
 
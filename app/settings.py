@@ -38,6 +38,7 @@ if env.NEW_RELIC_CONFIG_FILE:
 SECRET_KEY = env.SECRET_KEY
 OSF_HMAC_KEY = env.OSF_HMAC_KEY or "changeme"
 OSF_HMAC_EXPIRATION_SECONDS = env.OSF_HMAC_EXPIRATION_SECONDS
+OSF_HMAC_REJECT_REPLAYS = env.OSF_HMAC_REJECT_REPLAYS
 
 GRAVYVALET_ENCRYPT_SECRET: bytes | None = (
     env.GRAVYVALET_ENCRYPT_SECRET.encode() if env.GRAVYVALET_ENCRYPT_SECRET else None
@@ -65,6 +66,11 @@ SILKY_PYTHON_PROFILER = env.SILKY_PYTHON_PROFILER
 OSF_AUTH_COOKIE_NAME = env.OSF_AUTH_COOKIE_NAME
 OSF_BASE_URL = env.OSF_BASE_URL.rstrip("/")
 OSF_API_BASE_URL = env.OSF_API_BASE_URL.rstrip("/")
+OSF_PERMISSION_CACHE_SECONDS = env.OSF_PERMISSION_CACHE_SECONDS
+OSF_PERMISSION_NEGATIVE_CACHE_SECONDS = env.OSF_PERMISSION_NEGATIVE_CACHE_SECONDS
+OSF_TOKEN_USER_CACHE_SECONDS = env.OSF_TOKEN_USER_CACHE_SECONDS
+OSF_TOKEN_USER_CACHE_MAX_SIZE = env.OSF_TOKEN_USER_CACHE_MAX_SIZE
+USER_REFERENCE_CACHE_SECONDS = env.USER_REFERENCE_CACHE_SECONDS
 ALLOWED_RESOURCE_URI_PREFIXES = {OSF_BASE_URL}
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_COOKIE_NAME = env.OSF_AUTH_COOKIE_NAME
@@ -81,6 +87,12 @@ CACHES = {
         "LOCATION": REDIS_HOST,
     },
 }
+INVOCATION_RESULT_CACHE_ENABLED = env.INVOCATION_RESULT_CACHE_ENABLED
+INVOCATION_RESULT_CACHE_STALE_SECONDS = env.INVOCATION_RESULT_CACHE_STALE_SECONDS
+INVOCATION_NEGATIVE_CACHE_SECONDS = env.INVOCATION_NEGATIVE_CACHE_SECONDS
+INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT = (
+    env.INVOCATION_NEGATIVE_CACHE_MAX_PER_ACCOUNT
+)
 
 if DEBUG:
     # allow for local osf shenanigans
@@ -197,6 +209,9 @@ DATABASE_ROUTERS = ["addon_service.osf_models.db_router.OsfDatabaseRouter"]
 REST_FRAMEWORK = {
     "PAGE_SIZE": 101,
     "EXCEPTION_HANDLER": "addon_service.exception_handler.api_exception_handler",
+    "DEFAULT_THROTTLE_CLASSES": (
+        "addon_service.common.rate_limiting.RateLimitThrottle",
+    ),
     "DEFAULT_PAGINATION_CLASS": "drf_spectacular_jsonapi.schemas.pagination.JsonApiPageNumberPagination",
     "DEFAULT_PARSER_CLASSES": (
         "rest_framework_json_api.parsers.JSONParser",
@@ -263,6 +278,51 @@ OSF_SENSITIVE_DATA_SECRET = env.OSF_SENSITIVE_DATA_SECRET
 OSF_SENSITIVE_DATA_SALT = env.OSF_SENSITIVE_DATA_SALT
 
 
+###
+# addon operation invocations
+
+EPHEMERAL_INVOCATION_SAMPLE_RATE = env.EPHEMERAL_INVOCATION_SAMPLE_RATE
+EPHEMERAL_INVOCATION_BATCH_SIZE = env.EPHEMERAL_INVOCATION_BATCH_SIZE
+EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS = env.EPHEMERAL_INVOCATION_MAX_DELAY_SECONDS
+INVOCATION_BATCH_MAX_SIZE = env.INVOCATION_BATCH_MAX_SIZE
+INVOCATION_BATCH_CONCURRENCY = env.INVOCATION_BATCH_CONCURRENCY
+INVOCATION_AGGREGATE_MAX_ITEMS = env.INVOCATION_AGGREGATE_MAX_ITEMS
+INVOCATION_AGGREGATE_MAX_BYTES = env.INVOCATION_AGGREGATE_MAX_BYTES
+INVOCATION_AGGREGATE_MAX_SECONDS = env.INVOCATION_AGGREGATE_MAX_SECONDS
+INVOCATION_EVENTS_MAX_SECONDS = env.INVOCATION_EVENTS_MAX_SECONDS
+INVOCATION_EVENTS_KEEPALIVE_SECONDS = env.INVOCATION_EVENTS_KEEPALIVE_SECONDS
+INVOCATION_RESULT_INLINE_MAX_LENGTH = env.INVOCATION_RESULT_INLINE_MAX_LENGTH
+INVOCATION_RETENTION_DAYS = env.INVOCATION_RETENTION_DAYS
+INVOCATION_RETENTION_POLICY = env.INVOCATION_RETENTION_POLICY
+INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER = (
+    env.INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_USER
+)
+INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE = (
+    env.INVOCATION_SCHEDULER_MAX_IN_FLIGHT_PER_SERVICE
+)
+INVOCATION_SCHEDULER_BULK_THRESHOLD = env.INVOCATION_SCHEDULER_BULK_THRESHOLD
+INVOCATION_SCHEDULER_CLASS_WEIGHTS = env.INVOCATION_SCHEDULER_CLASS_WEIGHTS
+INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS = (
+    env.INVOCATION_SCHEDULER_IN_FLIGHT_TIMEOUT_SECONDS
+)
+INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS = (
+    env.INVOCATION_PROMOTION_SOFT_DEADLINE_SECONDS
+)
+INVOCATION_PROMOTION_MIN_SAMPLES = env.INVOCATION_PROMOTION_MIN_SAMPLES
+INVOCATION_STALE_GOING_TIMEOUT_SECONDS = env.INVOCATION_STALE_GOING_TIMEOUT_SECONDS
+INVOCATION_COLLAPSE_WINDOW_SECONDS = env.INVOCATION_COLLAPSE_WINDOW_SECONDS
+INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS = env.INVOCATION_IDEMPOTENCY_KEY_TTL_SECONDS
+INVOCATION_COLLAPSE_WAIT_SECONDS = env.INVOCATION_COLLAPSE_WAIT_SECONDS
+ADDON_IMP_POOL_MAX_SIZE = env.ADDON_IMP_POOL_MAX_SIZE
+ADDON_IMP_POOL_TTL_SECONDS = env.ADDON_IMP_POOL_TTL_SECONDS
+
+
+###
+# inbound rate limits
+
+RATE_LIMITS = env.RATE_LIMITS
+
+
 ###
 # amqp/celery
 
@@ -289,4 +349,16 @@ CELERY_BEAT_SCHEDULE = {
         "task": "addon_service.tasks.clear_expired_sessions.clear_expired_sessions",
         "schedule": crontab(minute=0, hour=7),  # Daily midnight,
     },
+    "dispatch_scheduled_invocations": {
+        "task": "addon_service.tasks.invocation_scheduling.dispatch_scheduled_invocations__celery",
+        "schedule": 60.0,  # every minute (in case a worker died mid-invocation)
+    },
+    "fail_stale_invocations": {
+        "task": "addon_service.tasks.invocation.fail_stale_invocations__celery",
+        "schedule": 300.0,  # every 5 minutes
+    },
+    "maintain_invocation_partitions": {
+        "task": "addon_service.tasks.invocation_retention.maintain_invocation_partitions__celery",
+        "schedule": crontab(minute=30, hour=7),  # Daily 12:30 a.m,
+    },
 }